@@ -0,0 +1,74 @@
+"""Measure the recall and latency of the vector index backends.
+
+The exact mmap backend provides the ground truth. The FAISS HNSW backend is measured
+for each ef_search value, so that recall can be traded against latency.
+
+Usage:
+    python scripts/bench_ann.py --vectors 100000 --dim 384 --M 32 --ef-search 16 32 64 128
+    python scripts/bench_ann.py --vectors-file exported.npy --queries 200
+"""
+
+import sys
+import time
+import tempfile
+import argparse
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from vectordb.ann_index import ann_index_factory
+
+
+def measure(index, queries: np.ndarray, k: int) -> tuple:
+    """Run the queries on an index and return the results and the mean latency in ms."""
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([chunk_id for chunk_id, _ in index.search(query, k)])
+    return results, 1000 * (time.perf_counter() - start) / len(queries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--vectors-file", default=None, help="Matrix of real embeddings (.npy)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--M", type=int, default=32)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.vectors_file:
+        vectors = np.load(args.vectors_file).astype(np.float32)
+    else:
+        vectors = rng.standard_normal((args.vectors, args.dim), dtype=np.float32)
+    # Queries are perturbed corpus vectors, like questions close to stored chunks
+    picks = rng.choice(len(vectors), size=args.queries, replace=False)
+    queries = vectors[picks] + 0.1 * rng.standard_normal((args.queries, vectors.shape[1]), dtype=np.float32)
+    ids = [str(i) for i in range(len(vectors))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exact = ann_index_factory("mmap", f"{tmp}/mmap")
+        exact.add(ids, vectors)
+        truth, latency = measure(exact, queries, args.k)
+        print(f"backend=mmap vectors={len(vectors)} recall@{args.k}=1.000 latency={latency:.2f}ms")
+
+        start = time.perf_counter()
+        hnsw = ann_index_factory("faiss", f"{tmp}/faiss", M=args.M, ef_construction=args.ef_construction)
+        hnsw.add(ids, vectors)
+        hnsw.flush()
+        print(f"backend=faiss M={args.M} ef_construction={args.ef_construction} build={time.perf_counter() - start:.1f}s")
+
+        for ef_search in args.ef_search:
+            hnsw.ef_search = ef_search
+            results, latency = measure(hnsw, queries, args.k)
+            recall = np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)])
+            print(f"backend=faiss ef_search={ef_search} recall@{args.k}={recall:.3f} latency={latency:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure the ingestion throughput (docs/sec) of the text embedding models.
+
+Usage:
+    python scripts/bench_embeddings.py --model minilm --device cpu --quantize int8 --num-threads 8
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models.text_embedding.embedding_factory import embedding_factory, embedders
+
+
+def make_corpus(n_docs: int, seed: int = 0) -> list:
+    """Build a synthetic corpus with realistic chunk lengths (roughly 50 to 512 tokens)."""
+    rng = random.Random(seed)
+    words = (
+        "budget allocation ministry programme subsidy government revenue tax development "
+        "education health infrastructure fiscal deficit growth economy rural digital"
+    ).split()
+    return [
+        " ".join(rng.choice(words) for _ in range(rng.randint(40, 400)))
+        for _ in range(n_docs)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="stella", choices=sorted(embedders))
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--quantize", default=None, choices=["int8", "onnx"])
+    parser.add_argument("--num-threads", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-seq-length", type=int, default=512)
+    parser.add_argument("--docs", type=int, default=512)
+    args = parser.parse_args()
+
+    embedder = embedding_factory(
+        args.model,
+        device=args.device,
+        quantize=args.quantize,
+        num_threads=args.num_threads,
+        batch_size=args.batch_size,
+        max_seq_length=args.max_seq_length
+    )
+    corpus = make_corpus(args.docs)
+
+    # Warm up so that lazy initialization is not counted.
+    embedder.embed_documents(corpus[:8])
+
+    start = time.perf_counter()
+    embedder.embed_documents(corpus)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"model={args.model} device={embedder.device} quantize={args.quantize} "
+        f"threads={args.num_threads} docs={len(corpus)} "
+        f"time={elapsed:.2f}s rate={len(corpus) / elapsed:.1f} docs/sec"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Measure the PDF text extraction throughput (pages/sec) of the extractor tiers.
+
+Usage:
+    python scripts/bench_pdf_extraction.py path/to/a.pdf path/to/b.pdf --extractors auto pymupdf docling
+"""
+
+import sys
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils import PDF_EXTRACTORS, get_pdf_converter, iter_pdf_pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--extractors", nargs="+", default=list(PDF_EXTRACTORS), choices=PDF_EXTRACTORS)
+    parser.add_argument("--pages-per-batch", type=int, default=8)
+    args = parser.parse_args()
+
+    # Load the docling models upfront so that initialization is not counted.
+    get_pdf_converter("lean")
+    get_pdf_converter("ocr")
+
+    for extractor in args.extractors:
+        pages = Counter()
+        start = time.perf_counter()
+        for path in args.paths:
+            for page in iter_pdf_pages(path, pages_per_batch=args.pages_per_batch, extractor=extractor):
+                pages[page.metadata["extractor"]] += 1
+        elapsed = time.perf_counter() - start
+
+        total = sum(pages.values())
+        print(
+            f"extractor={extractor} files={len(args.paths)} pages={total} "
+            f"pymupdf_pages={pages['pymupdf']} docling_pages={pages['docling']} "
+            f"time={elapsed:.2f}s rate={total / elapsed:.1f} pages/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
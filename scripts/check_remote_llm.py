@@ -0,0 +1,161 @@
+"""Check the OpenAI-compatible remote chat model against a local stub server.
+
+The stub server answers /v1/chat/completions like vLLM or a llama.cpp server. It
+fails the first requests with 503 and a large Retry-After, to exercise the retries
+and the cap on the retry delay, and streams its replies as server-sent events. The
+script checks plain and streamed generation, the retries, the concurrency cap and
+the reuse of the pooled keep-alive connections.
+
+Usage:
+    python scripts/check_remote_llm.py
+    python scripts/check_remote_llm.py --base-url http://gpu-host:8000/v1 --model Qwen/Qwen3-4B-AWQ
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models.llm.openai_compatible import RemoteChatModel
+
+
+class StubState:
+    """Counters shared by the stub server handlers."""
+
+    def __init__(self, failures: int):
+        self.lock = threading.Lock()
+        self.failures = failures
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = set()
+        self.payloads = []
+
+
+def stub_handler(state: StubState):
+    """Build the request handler of the stub server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str, headers: dict = None) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with state.lock:
+                state.requests += 1
+                state.connections.add(self.client_address)
+                state.payloads.append(payload)
+                if state.failures > 0:
+                    state.failures -= 1
+                    fail = True
+                else:
+                    fail = False
+                    state.in_flight += 1
+                    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            if fail:
+                self._send(503, b"", "text/plain", {"Retry-After": "3600"})
+                return
+
+            time.sleep(0.05)
+            pieces = ["Hello", ",", " world"]
+            if payload.get("stream"):
+                events = [{"choices": [{"delta": {"content": piece}}]} for piece in pieces]
+                body = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+                self._send(200, body.encode("utf-8"), "text/event-stream")
+            else:
+                body = {
+                    "choices": [{"message": {"role": "assistant", "content": "".join(pieces)}, "finish_reason": "stop"}],
+                    "usage": {"completion_tokens": len(pieces)}
+                }
+                self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+            with state.lock:
+                state.in_flight -= 1
+
+    return Handler
+
+
+def check_stub() -> None:
+    """Run the checks against the stub server."""
+    state = StubState(failures=2)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stub_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    model = RemoteChatModel(
+        base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        model="stub",
+        max_concurrency=2,
+        backoff=0.01,
+        max_retry_delay=0.05
+    )
+    try:
+        # Two 503s are retried, and Retry-After: 3600 is capped at max_retry_delay
+        start = time.perf_counter()
+        reply = model.bind(max_tokens=16, temperature=0.0, stop=["</tool_call>"]).invoke("Hi")
+        assert reply.content == "Hello, world", reply.content
+        assert state.requests == 3, state.requests
+        assert time.perf_counter() - start < 5, "the Retry-After delay was not capped"
+        payload = state.payloads[-1]
+        assert payload["max_tokens"] == 16 and payload["temperature"] == 0.0 and payload["stop"] == ["</tool_call>"], payload
+        print("retries and generation arguments: ok")
+
+        chunks = [chunk.content for chunk in model.stream("Hi")]
+        assert chunks == ["Hello", ",", " world"], chunks
+        assert state.payloads[-1]["stream"] is True
+        print("streaming: ok")
+
+        with ThreadPoolExecutor(8) as executor:
+            replies = list(executor.map(lambda _: model.invoke("Hi").content, range(8)))
+        assert replies == ["Hello, world"] * 8, replies
+        assert state.max_in_flight <= 2, state.max_in_flight
+        assert len(state.connections) <= 4, state.connections
+        print(f"concurrency cap (max {state.max_in_flight} in flight) and {len(state.connections)} pooled connections: ok")
+    finally:
+        model.close()
+        server.shutdown()
+
+
+def check_server(base_url: str, model_name: str) -> None:
+    """Run a plain and a streamed generation against a real server."""
+    model = RemoteChatModel(base_url=base_url, model=model_name)
+    try:
+        start = time.perf_counter()
+        print(model.bind(max_tokens=32).invoke("Say hello in one sentence.").content)
+        print(f"invoke: {time.perf_counter() - start:.2f}s")
+        start = time.perf_counter()
+        for chunk in model.bind(max_tokens=32).stream("Count from 1 to 10."):
+            print(chunk.content, end="", flush=True)
+        print(f"\nstream: {time.perf_counter() - start:.2f}s")
+    finally:
+        model.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Check a real OpenAI-compatible server instead of the stub")
+    parser.add_argument("--model", default="Qwen/Qwen3-4B-AWQ", help="Name of the served model")
+    args = parser.parse_args()
+
+    if args.base_url:
+        check_server(args.base_url, args.model)
+    else:
+        check_stub()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Add a batch of PDF files to a collection, converting them in parallel worker processes.
+
+Files are converted on a process pool (see utils.read_pdfs) and each one is added to
+the collection as soon as it is converted, so embedding overlaps with the conversion of
+the remaining files. Files already stored are only re-embedded where they changed.
+
+Usage:
+    python scripts/ingest_pdfs.py data/*.pdf --collection documents --workers 4
+    python scripts/ingest_pdfs.py data/reports --collection reports --replace
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models.text_embedding.embedding_factory import embedding_factory, embedders
+from models.text_embedding.cached import CachedEmbeddings
+from vectordb.chroma import SourceConflictError
+from vectordb.collection_manager import CollectionManager
+from utils import read_pdfs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="PDF files, or directories searched for PDF files")
+    parser.add_argument("--collection", default="documents")
+    parser.add_argument("--persist-directory", default="./chromadb")
+    parser.add_argument("--model", default="stella", choices=sorted(embedders))
+    parser.add_argument("--embedding-cache", default="./cache/embeddings.db")
+    parser.add_argument("--workers", type=int, default=None, help="Number of conversion processes. Defaults to the number of CPUs.")
+    parser.add_argument("--replace", action="store_true", help="Replace stored documents with the same names")
+    args = parser.parse_args()
+
+    paths = []
+    for path in map(Path, args.paths):
+        paths.extend(sorted(path.rglob("*.pdf")) if path.is_dir() else [path])
+
+    embedding_function = CachedEmbeddings(embedding_factory(args.model), persist_path=args.embedding_cache)
+    collections = CollectionManager(embedding_function=embedding_function, persist_directory=args.persist_directory)
+
+    start = time.perf_counter()
+    added, failed = 0, []
+    for path, pages in read_pdfs([str(path) for path in paths], max_workers=args.workers):
+        try:
+            collections.add_documents(args.collection, pages, replace=args.replace)
+        except SourceConflictError as e:
+            failed.append(path)
+            print(f"Skipped {path}: {e}")
+            continue
+        added += 1
+        print(f"Added {path} ({len(pages)} pages)")
+
+    print(f"Added {added}/{len(paths)} files to {args.collection} in {time.perf_counter() - start:.1f}s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
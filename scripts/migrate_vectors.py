@@ -0,0 +1,55 @@
+"""Copy the vectors of a collection from one index backend to another without re-embedding.
+
+Usage:
+    python scripts/migrate_vectors.py --collection documents --source chroma --target faiss --M 32 --ef-construction 200
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from models.text_embedding.embedding_factory import embedding_factory, embedders
+from vectordb.ann_index import ann_backends
+from vectordb.chroma import ChromaVectorStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--collection", default="documents")
+    parser.add_argument("--persist-directory", default="./chromadb")
+    parser.add_argument("--model", default="stella", choices=sorted(embedders))
+    parser.add_argument("--source", default="chroma", choices=["chroma", *sorted(ann_backends)])
+    parser.add_argument("--target", required=True, choices=["chroma", *sorted(ann_backends)])
+    parser.add_argument("--M", type=int, default=None)
+    parser.add_argument("--ef-construction", type=int, default=None)
+    parser.add_argument("--ef-search", type=int, default=None)
+    args = parser.parse_args()
+
+    hnsw = {
+        key: value for key, value in
+        (("M", args.M), ("ef_construction", args.ef_construction), ("ef_search", args.ef_search))
+        if value is not None
+    }
+    # Queries are never embedded here, the model is only attached to the stores
+    embedding_function = embedding_factory(args.model)
+    source = ChromaVectorStore(
+        embedding_function=embedding_function,
+        collection_name=args.collection,
+        persist_directory=args.persist_directory,
+        backend=args.source
+    )
+    target = ChromaVectorStore(
+        embedding_function=embedding_function,
+        collection_name=args.collection,
+        persist_directory=args.persist_directory,
+        backend=args.target,
+        hnsw=hnsw
+    )
+    imported = target.import_vectors(source.export_vectors())
+    print(f"Imported {imported} vectors of {args.collection} from {args.source} into {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
+import time
+import logging
+from string import Formatter
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import Any, Optional
 from models.llm.llm_pipe_factory import llm_pipe_factory
-from langchain_huggingface import ChatHuggingFace
+from models.llm.streaming import StreamingChatHuggingFace
+from models.llm.generation import GenerationParams, count_generated_tokens, get_generation_stats
 from langchain_core.prompts import PromptTemplate
 from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableConfig
 from langgraph.graph import MessagesState
 
 
+logger = logging.getLogger(__name__)
+
+
 class BaseAgent(ABC):
     """Abstract Base Agent Class for implementing AI agents in the workflow.
 
@@ -14,24 +22,38 @@ class BaseAgent(ABC):
     initialization and system prompt loading while defining the interface that all
     agents must implement.
 
+    Each agent declares its own generation settings (token budget, stop sequences,
+    greedy or sampled decoding) in generation_params. They are applied to every call of
+    the agent rather than baked into the shared pipeline, and the number of tokens
+    generated by each agent is recorded in the shared GenerationStats.
+
     Attributes:
         model_name (str): Name of the language model to use
         model (BaseChatModel): The underlying language model instance
         sysprompt_path (str): Path to the system prompt file
         thinking_mode (bool): Flag to indicate if use thinking mode
+        generation_params (GenerationParams): Generation settings of the agent
 
     Args:
         model_name (str, optional): Name of the model to use. Defaults to "qwen".
         model (BaseChatModel, optional): Pre-initialized model instance. Defaults to None.
         sysprompt_path (str, optional): Path to system prompt file. Defaults to None.
+        generation_params (GenerationParams, optional): Generation settings overriding the
+            agent's defaults. Defaults to None.
     """
+    generation_params = GenerationParams()
+
     def __init__(
             self,
             model_name: str = "qwen",
             model: Optional[BaseChatModel] = None,
             sysprompt_path: Optional[str] = None,
-            thinking_mode: bool = False
+            thinking_mode: bool = False,
+            generation_params: Optional[GenerationParams] = None
     ):
+        if generation_params is not None:
+            self.generation_params = generation_params
+
         # Load system prompt
         self.sysprompt_path = sysprompt_path
         self.sys_prompt = None
@@ -66,33 +88,82 @@ class BaseAgent(ABC):
         """Initialize the language model for the agent.
         
         Creates a new language model instance using the factory pattern.
-        If the model is not a ChatModel, wraps it in ChatHuggingFace.
+        If the model is not a ChatModel, wraps it in StreamingChatHuggingFace so that
+        its output can be streamed token by token.
         """
         llm = llm_pipe_factory(self.model_name)
         if isinstance(llm, BaseChatModel):
             self.model = llm
         else:
-            self.model = ChatHuggingFace(llm=llm)
+            self.model = StreamingChatHuggingFace(llm=llm)
+
+    def cache_prefix(self) -> str:
+        """Get the fixed text every prompt of the agent starts with.
+
+        This is the system prompt, or the literal text of the prompt template before
+        its first placeholder. Local pipelines cache its KV state across calls.
+
+        Returns:
+            str: The fixed prompt prefix
+        """
+        if isinstance(self.sys_prompt, PromptTemplate):
+            return next(Formatter().parse(self.sys_prompt.template), ("",))[0]
+        return self.sys_prompt
+
+    def generation_model(self) -> Runnable:
+        """Get the model bound to the agent's generation settings and prompt prefix.
+
+        Returns:
+            Runnable: The model, generating with the agent's settings
+        """
+        return self.model.bind(**self.generation_params.model_kwargs(self.model, cache_prefix=self.cache_prefix()))
+
+    def generate(self, runnable: Runnable, inputs: Any, config: Optional[RunnableConfig] = None) -> Any:
+        """Run a runnable ending with the agent's model, recording the generated tokens.
+
+        Args:
+            runnable: The model or chain to run, built on generation_model()
+            inputs: Inputs of the runnable
+            config: Configuration of the run. Optional.
+
+        Returns:
+            The output of the runnable, a message or a string
+        """
+        start = time.perf_counter()
+        output = runnable.invoke(inputs, config)
+        seconds = time.perf_counter() - start
+
+        text = output if isinstance(output, str) else str(output.content)
+        tokens = count_generated_tokens(self.model, text)
+        get_generation_stats().record(type(self).__name__, tokens, seconds, self.generation_params.max_new_tokens)
+        logger.debug(
+            "%s: generated %d/%d tokens in %.2fs",
+            type(self).__name__, tokens, self.generation_params.max_new_tokens, seconds
+        )
+        return output
 
     @abstractmethod
-    def invoke(self, state: MessagesState) -> dict:
+    def invoke(self, state: MessagesState, config: Optional[RunnableConfig] = None) -> dict:
         """Process the current message state and generate a response.
 
         Args:
             state (MessagesState): Current state containing message history and context
+            config (RunnableConfig, optional): Configuration of the graph run, forwarded to
+                the model so that its tokens reach the graph stream. Defaults to None.
 
         Returns:
             dict: Response containing new messages or actions to be taken
         """
         pass
     
-    def __call__(self, state: MessagesState) -> dict:
+    def __call__(self, state: MessagesState, config: RunnableConfig) -> dict:
         """Make the agent callable, delegating to invoke method.
         
         Args:
             state (MessagesState): Current state containing message history and context
+            config (RunnableConfig): Configuration of the graph run
             
         Returns:
             dict: Response containing new messages or actions to be taken
         """
-        return self.invoke(state)
+        return self.invoke(state, config)
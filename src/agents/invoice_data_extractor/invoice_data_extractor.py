@@ -1,8 +1,11 @@
 import os
+from typing import Optional
 from agents.base_agent import BaseAgent
+from models.llm.generation import GenerationParams
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState
 
 
@@ -14,7 +17,10 @@ class InvoiceDataExtractorAgent(BaseAgent):
     - total amount
     - bank account number
     - bank name
+
+    The JSON output is short, so generation is greedy and capped at 256 tokens.
     """
+    generation_params = GenerationParams(max_new_tokens=256)
 
     def load_system_prompt(self) -> None:
         """Load the invoice data extractor system prompt from file.
@@ -34,13 +40,14 @@ class InvoiceDataExtractorAgent(BaseAgent):
                 template=f.read()
             )
 
-    def invoke(self, state: MessagesState) -> dict:
+    def invoke(self, state: MessagesState, config: Optional[RunnableConfig] = None) -> dict:
         """Process the current state and extract invoice data.
 
         Takes the OCR-ed invoice text and extract data.
 
         Args:
             state: Current conversation state (append the OCR-ed invoice text to the end)
+            config: Configuration of the run, forwarded to the model. Optional.
 
         Returns:
             dict: Contains the extracted data in JSON format
@@ -49,8 +56,8 @@ class InvoiceDataExtractorAgent(BaseAgent):
         docs = messages[-1]["content"]
 
         # Chain
-        summarize_chain = self.sys_prompt | self.model | StrOutputParser()
+        summarize_chain = self.sys_prompt | self.generation_model() | StrOutputParser()
 
         # Run
-        response = summarize_chain.invoke({"context": docs})
+        response = self.generate(summarize_chain, {"context": docs}, config)
         return {"messages": [AIMessage(content=response)]}
@@ -1,8 +1,11 @@
 import os
+from typing import Optional
 from agents.base_agent import BaseAgent
-from langchain_core.messages import AIMessage, HumanMessage
+from models.llm.generation import GenerationParams
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState
 from utils import remove_think
 
@@ -19,7 +22,10 @@ class SummarizerAgent(BaseAgent):
     - Produce summaries between 100-250 words
     - Only use information from the provided context
     - Acknowledge when information is insufficient
+
+    A 250-word summary is about 350 tokens, so generation is capped at 768 tokens.
     """
+    generation_params = GenerationParams(max_new_tokens=768, repetition_penalty=1.05)
 
     def load_system_prompt(self) -> None:
         """Load the summarizer system prompt from file.
@@ -40,14 +46,17 @@ class SummarizerAgent(BaseAgent):
                 template=f.read()
             )
 
-    def invoke(self, state: MessagesState) -> dict:
+    def invoke(self, state: MessagesState, config: Optional[RunnableConfig] = None) -> dict:
         """Process the current state and generate a summary.
 
-        Takes the most recent question and retrieved content from the message history,
-        applies the summarization prompt template, and generates a concise summary.
+        Takes the most recent question and the retrieved content of every tool called in
+        the current turn from the message history, applies the summarization prompt
+        template, and generates a concise summary.
 
         Args:
             state: Current conversation state containing the question and retrieved content
+            config: Configuration of the graph run, forwarded to the model so that the
+                summary is streamed token by token. Optional.
 
         Returns:
             dict: Contains the generated summary as a new message
@@ -58,12 +67,18 @@ class SummarizerAgent(BaseAgent):
                 question = item.content
                 break
         
-        docs = messages[-1].content
-        
+        # Gather the output of every tool called in this turn
+        docs = []
+        for item in reversed(messages):
+            if not isinstance(item, ToolMessage):
+                break
+            docs.insert(0, item.content)
+        docs = "\n\n".join(docs) if docs else messages[-1].content
+
         # Chain
-        summarize_chain = self.sys_prompt | self.model | StrOutputParser()
+        summarize_chain = self.sys_prompt | self.generation_model() | StrOutputParser()
 
         # Run
-        response = summarize_chain.invoke({"context": docs, "question": question})
+        response = self.generate(summarize_chain, {"context": docs, "question": question}, config)
         response = remove_think(response)
         return {"messages": [AIMessage(content=response)]}
@@ -1,9 +1,12 @@
 import os
 import json
 import uuid
+from typing import Optional
 from utils import remove_think
 from agents.base_agent import BaseAgent
+from models.llm.generation import GenerationParams
 from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState
 
 
@@ -16,7 +19,11 @@ class WebSearcherAgent(BaseAgent):
 
     The agent uses a system prompt (loaded from a file) that guides its behavior and decision
     making process for tool selection and query formulation.
+
+    The reply is either a short direct answer or a list of tool calls, so generation
+    is greedy, capped at 512 tokens and stopped at the closing </tool_call> tag.
     """
+    generation_params = GenerationParams(max_new_tokens=512, stop=("</tool_call>",))
 
     def load_system_prompt(self) -> None:
         """Load the websearcher system prompt from file.
@@ -48,7 +55,10 @@ class WebSearcherAgent(BaseAgent):
                 "description": tool.description,
                 "parameters": {
                     "properties": tool.args,
-                    "required": list(tool.args.keys())
+                    "required": [
+                        name for name in tool.args
+                        if name in tool.tool_call_schema.model_json_schema().get("required", [])
+                    ]
                 }
             }
             for tool in tools
@@ -57,7 +67,7 @@ class WebSearcherAgent(BaseAgent):
         tools_str = "[" + ','.join([json.dumps(func) for func in functions]) + "]"
         self.sys_prompt = self.sys_prompt.replace("{tools}", tools_str)
         
-    def invoke(self, state: MessagesState) -> dict:
+    def invoke(self, state: MessagesState, config: Optional[RunnableConfig] = None) -> dict:
         """Process the current conversation state and determine next actions.
 
         Takes the current message state, prepends the system prompt, and generates
@@ -65,12 +75,14 @@ class WebSearcherAgent(BaseAgent):
 
         Args:
             state (MessagesState): Current conversation state with message history
+            config (RunnableConfig, optional): Configuration of the graph run, forwarded to
+                the model so that a direct answer is streamed token by token. Defaults to None.
 
         Returns:
             dict: Contains either new messages or tool calls to be executed
         """
         messages = [SystemMessage(self.sys_prompt)] + [msg for msg in state["messages"] if isinstance(msg, (HumanMessage, AIMessage))]
-        output = {"messages": [self.model.invoke(messages)]}
+        output = {"messages": [self.generate(self.generation_model(), messages, config)]}
         contents = output["messages"][-1].content
         contents = remove_think(contents)
         if contents.startswith('<tool_call>'):
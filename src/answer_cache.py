@@ -0,0 +1,194 @@
+import time
+import itertools
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+@dataclass
+class CachedAnswer:
+    """An answer served from the SemanticAnswerCache.
+
+    Attributes:
+        question (str): The question the answer was generated for
+        answer (str): The summary shown in the chat
+        tool_output (str): The tool output shown next to the chat, empty if no tool was used
+        tools (List[str]): Names of the tools called to answer the question
+        stored_at (float): Monotonic time at which the answer was stored
+        similarity (float): Cosine similarity between the cached and the asked question
+    """
+    question: str
+    answer: str
+    tool_output: str
+    tools: List[str]
+    stored_at: float
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """In-memory cache of workflow answers, matched by question similarity.
+
+    Questions are embedded, and a new question is answered from the cache when a prior
+    question is at least `threshold` cosine-similar to it and its answer is still fresh,
+    so near-duplicate questions skip the LLM calls and tool execution of the workflow.
+    Questions are matched without their conversation, so the cache is only meant for
+    standalone questions, e.g. the first question of a conversation.
+
+    The freshness of an answer depends on the tools used to produce it: each tool
+    name has a time-to-live, falling back to the "vectordb" TTL for vector store
+    retriever tools (named "<collection>_vectordb") and to the "default" TTL otherwise.
+    An answer expires with the shortest TTL of its tools. The cache is a bounded LRU.
+
+    Attributes:
+        embedding_function (Embeddings): Embedder of the questions
+        threshold (float): Minimum cosine similarity of a cache hit
+        ttls (dict): Time-to-live in seconds per tool name
+        max_entries (int): Maximum number of cached answers
+
+    Args:
+        embedding_function (Embeddings): Embedder of the questions
+        threshold (float, optional): Minimum cosine similarity of a cache hit. Defaults to 0.92.
+        ttls (dict, optional): TTL per tool name. Defaults to 10 minutes for news_search,
+            6 hours for web_search, 7 days for vectordb tools and 1 hour otherwise.
+        max_entries (int, optional): Maximum number of cached answers. Defaults to 512.
+    """
+
+    def __init__(
+            self,
+            embedding_function: Embeddings,
+            threshold: float = 0.92,
+            ttls: Optional[Dict[str, float]] = None,
+            max_entries: int = 512
+    ):
+        self.embedding_function = embedding_function
+        self.threshold = threshold
+        self.ttls = {
+            "news_search": 600,
+            "web_search": 6 * 3600,
+            "vectordb": 7 * 24 * 3600,
+            "default": 3600,
+            **(ttls or {})
+        }
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # id -> (normalized question vector, ttl, CachedAnswer)
+        self._ids = itertools.count()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    def ttl(self, tools: List[str]) -> float:
+        """Get the time-to-live of an answer produced with the given tools.
+
+        Args:
+            tools: Names of the tools called to answer the question
+
+        Returns:
+            The shortest TTL of the tools, or the default TTL if no tool was used
+        """
+        ttls = []
+        for name in tools:
+            if name in self.ttls:
+                ttls.append(self.ttls[name])
+            elif name.endswith("_vectordb"):
+                ttls.append(self.ttls["vectordb"])
+            else:
+                ttls.append(self.ttls["default"])
+        return min(ttls, default=self.ttls["default"])
+
+    def _embed(self, question: str) -> np.ndarray:
+        """Embed a question as a normalized vector."""
+        vector = np.array(self.embedding_function.embed_query(question), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, question: str) -> Optional[CachedAnswer]:
+        """Find a fresh answer to a near-duplicate of the question.
+
+        Args:
+            question: The question asked
+
+        Returns:
+            The cached answer of the most similar prior question, or None if no fresh
+            answer is similar enough
+        """
+        vector = self._embed(question)
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, ttl, entry) in self._entries.items() if now - entry.stored_at > ttl]
+            for key in expired:
+                del self._entries[key]
+            self._stats["expired"] += len(expired)
+
+            best_key, best_similarity = None, self.threshold
+            for key, (cached_vector, _, _) in self._entries.items():
+                similarity = float(cached_vector @ vector)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+
+            if best_key is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._stats["hits"] += 1
+            entry = self._entries[best_key][2]
+
+        return CachedAnswer(
+            question=entry.question,
+            answer=entry.answer,
+            tool_output=entry.tool_output,
+            tools=list(entry.tools),
+            stored_at=entry.stored_at,
+            similarity=best_similarity
+        )
+
+    def store(self, question: str, answer: str, tool_output: str = "", tools: Optional[List[str]] = None) -> None:
+        """Cache the answer to a question.
+
+        Args:
+            question: The question asked
+            answer: The summary shown in the chat
+            tool_output: The tool output shown next to the chat. Defaults to "".
+            tools: Names of the tools called to answer the question, setting its TTL. Optional.
+        """
+        tools = list(tools or [])
+        entry = CachedAnswer(question, answer, tool_output, tools, time.monotonic())
+        vector = self._embed(question)
+        with self._lock:
+            self._entries[next(self._ids)] = (vector, self.ttl(tools), entry)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, tools: Optional[List[str]] = None) -> int:
+        """Drop cached answers, e.g. after new documents are added to a collection.
+
+        Args:
+            tools: Drop only the answers produced with one of these tools. Defaults to all answers.
+
+        Returns:
+            The number of dropped answers
+        """
+        with self._lock:
+            keys = [
+                key for key, (_, _, entry) in self._entries.items()
+                if tools is None or set(entry.tools) & set(tools)
+            ]
+            for key in keys:
+                del self._entries[key]
+            self._stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def stats(self) -> dict:
+        """Get the cache statistics.
+
+        Returns:
+            dict: Hit, miss, expiry, eviction and invalidation counts, hit rate and number
+            of cached answers
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
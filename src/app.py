@@ -10,54 +10,168 @@ The interface allows users to:
 - View search results and summaries in a split-panel interface
 """
 
-import uuid
+import os
+import time
+import logging
+from typing import Optional
 import gradio as gr
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
 from graph import WorkflowGraph
+from answer_cache import SemanticAnswerCache
 from agents.invoice_data_extractor.invoice_data_extractor import InvoiceDataExtractorAgent
-from vectordb.chroma import ChromaVectorStore
-from utils import read_pdf, remove_think
+from vectordb.collection_manager import CollectionManager
+from vectordb.chroma import SourceConflictError
+from models.text_embedding.embedding_factory import embedding_factory
+from models.text_embedding.cached import CachedEmbeddings
+from models.llm.generation import get_generation_stats
+from models.llm.prefix_cache import get_prefix_cache
+from models.llm.batch_scheduler import BatchScheduler
+from retrieval.reranker import Reranker
+from tools.vector_store_retriever import MY_BUDGET_DESCRIPTION, MY_BUDGET_TOOL_NAME
+from utils import ThinkFilter, iter_pdf_pages, pdf_page_count, read_pdf, remove_think
 import json
 
 
-config = {
-    "configurable": {
-        "thread_id": uuid.uuid4()  # Unique identifier for each chat session
-    }
-}
+logger = logging.getLogger(__name__)
 
 # Initialize models here so that they are not loaded more than once.
 if gr.NO_RELOAD:
-    # Load the vector database
-    vectordb = ChromaVectorStore()
-
-    # Load the workflow graph with Qwen model and vector store retriever
-    workflow = WorkflowGraph(model_name="qwen3", vectorstore=vectordb.get_retriever())
+    # Load the vector database collections, caching embeddings so repeated texts are
+    # embedded once, and reranking the retrieved chunks on CPU so that at most 2048
+    # tokens of them reach the summarizer
+    embedding_function = CachedEmbeddings(embedding_factory("stella"), persist_path="./cache/embeddings.db")
+    collections = CollectionManager(
+        embedding_function=embedding_function,
+        retriever_kwargs={"reranker": Reranker(max_tokens=2048)}
+    )
+    collections.ensure_collection(
+        "documents",
+        {"type": "pdf", "description": MY_BUDGET_DESCRIPTION, "tool_name": MY_BUDGET_TOOL_NAME}
+    )
+
+    # Load the workflow graph with Qwen model and one retriever tool per collection. Set
+    # LLM_BACKEND=openai to use a remote OpenAI-compatible server instead of a local GPU.
+    workflow = WorkflowGraph(
+        model_name=os.environ.get("LLM_BACKEND", "qwen3"),
+        retriever_tools=collections.build_retriever_tools()
+    )
     invoice_agent = InvoiceDataExtractorAgent(model=workflow.model)
 
+    # Generate the concurrent calls of all chat sessions in shared batches on the local model
+    scheduler = None
+    pipeline = getattr(getattr(workflow.model, "llm", None), "pipeline", None)
+    if pipeline is not None:
+        scheduler = BatchScheduler(pipeline)
+        workflow.model.scheduler = scheduler
+
+    # Answer near-duplicate questions from the cache instead of running the workflow
+    answer_cache = SemanticAnswerCache(embedding_function=embedding_function)
+
+
+def session_config(request: gr.Request) -> dict:
+    """Get the graph run configuration of a chat session.
+
+    Each browser session has its own conversation thread in the graph's checkpointer,
+    so that concurrent chats never read each other's messages.
+
+    Args:
+        request: The Gradio request of the session
+
+    Returns:
+        The configuration with the thread ID of the session
+    """
+    return {
+        "configurable": {
+            "thread_id": request.session_hash  # Unique identifier for each chat session
+        }
+    }
+
 
-def stream_chat_graph_updates(chat_history: list, markdown_box: str):
+def stream_chat_graph_updates(chat_history: list, markdown_box: str, request: gr.Request):
     """Update the chat interface with streaming responses from the workflow.
 
     This function processes workflow updates in real-time, showing both the chatbot's
-    responses and any intermediate tool outputs.
+    responses and any intermediate tool outputs. Replies are streamed token by token,
+    with their <think> spans filtered out as they are generated. Near-duplicate questions are answered
+    from the semantic answer cache without running the workflow, and fresh answers are
+    cached along with the tools used to produce them. Only the first question of a
+    conversation goes through the cache, since follow-up questions depend on the
+    conversation. A cached answer is recorded in the conversation thread like a
+    generated one.
 
     Args:
         chat_history: List of message dictionaries representing the chat history
         markdown_box: Current content of the markdown display box
+        request: The Gradio request of the session, injected by Gradio
 
     Yields:
         Tuple of updated chat_history and markdown_box content
     """
-    for event in workflow().stream({"messages": [("user", chat_history[-1]["content"])]}, config, stream_mode="updates"):
+    question = chat_history[-1]["content"]
+    config = session_config(request)
+    first_turn = not workflow().get_state(config).values.get("messages")
+    cached = answer_cache.lookup(question) if first_turn else None
+    if cached is not None:
+        logger.debug("Answer cache hit (similarity %.3f): %s", cached.similarity, cached.question)
+        logger.debug("Answer cache: %s", answer_cache.stats())
+        # Record the turn in the thread so that the next questions see it
+        workflow().update_state(
+            config, {"messages": [HumanMessage(question), AIMessage(cached.answer)]}, as_node="summarizer"
+        )
+        chat_history.append({"role": "assistant", "content": cached.answer})
+        yield chat_history, cached.tool_output or markdown_box
+        return
+
+    answer, tool_output, tools = None, "", []
+    streams = {}  # node -> think filter, visible text and chat index of its streamed reply
+    start = time.perf_counter()
+    first_token_at = None
+    for mode, event in workflow().stream({"messages": [("user", question)]}, config, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            # Show the agents' replies token by token, without their <think> spans
+            chunk, metadata = event
+            node = metadata.get("langgraph_node")
+            if not isinstance(chunk, AIMessageChunk) or node not in ("websearcher", "summarizer"):
+                continue
+            stream = streams.setdefault(node, {"filter": ThinkFilter(), "text": "", "index": None})
+            stream["text"] += stream["filter"].feed(str(chunk.content))
+            text = stream["text"].lstrip()
+            # A websearcher reply made of tool calls is not shown
+            if not text or "<tool_call>".startswith(text) or text.startswith("<tool_call>"):
+                continue
+            if stream["index"] is None:
+                chat_history.append({"role": "assistant", "content": ""})
+                stream["index"] = len(chat_history) - 1
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                logger.debug("Time to first token: %.2fs", first_token_at - start)
+            chat_history[stream["index"]]["content"] = text
+            yield chat_history, markdown_box
+            continue
+
         print("-----------event----------------")
         print(event)
 
-        if "tools" in event:
-            message = event['tools']['messages'][-1]
-            markdown_box = message.content
+        if "context_packer" in event:
+            # The packed context only feeds the summarizer, the raw tool output stays on display.
+            continue
+        elif "tools" in event:
+            # Tool calls run concurrently, show the output of every call of the turn
+            messages = event['tools']['messages']
+            message = messages[-1]
+            markdown_box = "\n\n".join(str(tool_message.content) for tool_message in messages)
+            tool_output = markdown_box
         else:
-            message = event[list(event.keys())[0]]['messages'][-1]
-            chat_history.append({"role": "assistant", "content": message.content})
+            node = list(event.keys())[0]
+            message = event[node]['messages'][-1]
+            # The final message replaces the streamed text of the node, if any
+            stream = streams.pop(node, None)
+            if stream is not None and stream["index"] is not None:
+                chat_history[stream["index"]]["content"] = message.content
+            else:
+                chat_history.append({"role": "assistant", "content": message.content})
+            tools.extend(tool_call["name"] for tool_call in getattr(message, "tool_calls", []))
+            answer = message.content
 
         print("--------Print From Stream-----------")
         if isinstance(message, tuple):
@@ -67,6 +181,13 @@ def stream_chat_graph_updates(chat_history: list, markdown_box: str):
         
         yield chat_history, markdown_box
 
+    logger.debug("Generation: %s", get_generation_stats().stats())
+    logger.debug("Prefix cache: %s", get_prefix_cache().stats())
+    if scheduler is not None:
+        logger.debug("Batch scheduler: %s", scheduler.stats())
+    if answer and first_turn:
+        answer_cache.store(question, answer, tool_output=tool_output, tools=tools)
+
 
 def stream_user_message(message: str, chat_history: list):
     """Add a user message to the chat history.
@@ -82,25 +203,54 @@ def stream_user_message(message: str, chat_history: list):
     return "", chat_history
 
 
-def upload_document(uploaded_file: gr.UploadButton, progress=gr.Progress()):
-    """Process and index an uploaded PDF document.
+def upload_document(uploaded_file: gr.UploadButton, collection: str, progress=gr.Progress()):
+    """Process and index an uploaded PDF document into a collection.
 
-    Reads the PDF file, splits it into chunks, and adds it to the vector store
-    for future retrieval.
+    Pages are read in small batches and streamed into the vector store, so chunks
+    are embedded while the rest of the document is still being converted. The
+    progress is reported after each embedded batch of chunks, along with the number
+    of pages read so far. Uploading to a new collection creates it and adds a
+    retriever tool for it to the workflow graph.
 
     Args:
         uploaded_file: The uploaded PDF file information
+        collection: Name of the collection the document is routed to
         progress: Gradio progress indicator
 
     Returns:
-        The uploaded file information for display
+        The uploaded file information for display and the updated collection choices
     """
+    collection = collection or "documents"
+    is_new = collection not in collections.list_collections()
+
     progress(0, desc="Reading document...")
-    doc = read_pdf(uploaded_file.name)
-    progress(0.2, desc="Uploading document...")
-    vectordb.add_documents(doc)
+    total_pages = pdf_page_count(uploaded_file.name)
+    pages_read = 0
+
+    def pages():
+        nonlocal pages_read
+        for page in iter_pdf_pages(uploaded_file.name):
+            pages_read = page.metadata["page"] + 1
+            yield page
+
+    def report(batches_done: int, total_batches: Optional[int]):
+        # Chunks of the pages read so far are embedded, up to the last batch
+        progress(
+            pages_read / total_pages,
+            desc=f"Embedded {batches_done} batches, page {pages_read}/{total_pages} read..."
+        )
+
+    try:
+        collections.add_documents(collection, pages(), progress_callback=report)
+    except SourceConflictError as e:
+        # Another document with the same file name is already in the collection
+        raise gr.Error(str(e))
+    # Answers retrieved from this collection may be missing the new document
+    answer_cache.invalidate([collections.tool_name(collection)])
+    if is_new:
+        workflow.set_retriever_tools(collections.build_retriever_tools())
     progress(1, desc="Document uploaded successfully.")
-    return uploaded_file
+    return uploaded_file, gr.Dropdown(choices=collections.list_collections(), value=collection)
 
 
 def read_invoice(uploaded_file: gr.UploadButton, chat_history: list):
@@ -123,6 +273,12 @@ with gr.Blocks() as demo:
             with gr.Row():
                 with gr.Column(scale=1):
                     filebox_vectordb = gr.File()
+                    collection_vectordb = gr.Dropdown(
+                        choices=collections.list_collections(),
+                        value="documents",
+                        allow_custom_value=True,
+                        label="Collection"
+                    )
                     upload_button_vectordb = gr.UploadButton("Upload file to VectorDB", file_count="single", size="sm")
                 
                 msg = gr.Textbox(placeholder="Type your message here...", submit_btn=True, lines=1, max_lines=2, scale=9)
@@ -131,9 +287,11 @@ with gr.Blocks() as demo:
             md = gr.Markdown("Content here...", container=True, height="75vh", max_height="75vh")
             upload_button_tempfile = gr.UploadButton("Upload an invoice", file_count="single", size="sm")
 
-    upload_button_vectordb.upload(upload_document, [upload_button_vectordb], [filebox_vectordb], show_progress_on=filebox_vectordb)
+    upload_button_vectordb.upload(upload_document, [upload_button_vectordb, collection_vectordb], [filebox_vectordb, collection_vectordb], show_progress_on=filebox_vectordb)
     upload_button_tempfile.upload(read_invoice, [upload_button_tempfile, chat], [chat, md])
-    msg.submit(stream_user_message, [msg, chat], [msg, chat], queue=False).then(stream_chat_graph_updates, [chat, md], [chat, md])
+    msg.submit(stream_user_message, [msg, chat], [msg, chat], queue=False).then(
+        stream_chat_graph_updates, [chat, md], [chat, md], concurrency_limit=8
+    )
 
 
 if __name__ == "__main__":
@@ -1,21 +1,24 @@
 import io
 from PIL import Image
 
-from typing import Optional
+from typing import List, Optional
 from models.llm.llm_pipe_factory import llm_pipe_factory
 from tools.newssearch import news_search
 from tools.websearch import web_search
 from tools.vector_store_retriever import build_my_budget_retriever
 from tools.tools_cond import tools_condition
+from tools.parallel_tool_node import ParallelToolNode
 from agents.websearcher.websercher import WebSearcherAgent
 from agents.summarizer.summarizer import SummarizerAgent
+from retrieval.context_packer import ContextPacker
 
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseChatModel
-from langchain_huggingface import ChatHuggingFace
+from models.llm.streaming import StreamingChatHuggingFace
 from langgraph.graph import MessagesState, StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt import ToolNode
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.tools import BaseTool
 
 
 class WorkflowGraph:
@@ -29,12 +32,16 @@ class WorkflowGraph:
     The workflow consists of:
     1. WebSearcher agent for query interpretation and tool selection
     2. Tool execution nodes for information retrieval
-    3. Summarizer agent for condensing retrieved information
+    3. Context packer for keeping only the most relevant retrieved content
+    4. Summarizer agent for condensing retrieved information
 
     Attributes:
         model_name (str): Name of the language model to use
         model (BaseChatModel): The language model instance
         vectorstore_retriever (Tool): Vector store retrieval tool if configured
+        retriever_tools (List[BaseTool]): One retrieval tool per vector store collection
+        embedding_function (Embeddings): Embedder used by the context packer if configured
+        checkpointer (MemorySaver): Store of the conversation threads, kept across rebuilds
         graph (StateGraph): The compiled workflow graph
     """
 
@@ -42,7 +49,9 @@ class WorkflowGraph:
             self,
             model_name: str = "qwen",
             model: Optional[BaseChatModel] = None,
-            vectorstore: Optional[VectorStoreRetriever] = None
+            vectorstore: Optional[BaseRetriever] = None,
+            embedding_function: Optional[Embeddings] = None,
+            retriever_tools: Optional[List[BaseTool]] = None
     ):
         """Initialize the workflow graph.
 
@@ -50,6 +59,10 @@ class WorkflowGraph:
             model_name: Name of the LLM to use. Defaults to "qwen".
             model: Pre-initialized model instance. Optional.
             vectorstore: Vector store retriever for document search. Optional.
+            embedding_function: Embedder used alongside BM25 to rank tool output
+                before summarization. Optional.
+            retriever_tools: Retrieval tools of the vector store collections, e.g. from
+                CollectionManager.build_retriever_tools. Optional.
         """
         # Load model
         self.model_name = model_name
@@ -58,9 +71,15 @@ class WorkflowGraph:
         else:
             self.model = model
 
+        self.embedding_function = embedding_function
+
         # Build vectorstore retriever
         self.vectorstore_retriever = build_my_budget_retriever(vectorstore) if vectorstore else None
-        
+        self.retriever_tools = retriever_tools or []
+
+        # Conversations are kept when the graph is rebuilt
+        self.checkpointer = MemorySaver()
+
         # Build workflow graph
         self.build_graph()
 
@@ -68,53 +87,79 @@ class WorkflowGraph:
         """Initialize the language model.
 
         Creates a new language model instance using the factory pattern,
-        wrapping it in ChatHuggingFace if needed.
+        wrapping it in StreamingChatHuggingFace if needed so that its output
+        can be streamed token by token.
         """
         llm = llm_pipe_factory(self.model_name)
         if not isinstance(llm, BaseChatModel):
-            self.model = ChatHuggingFace(llm=llm)
+            self.model = StreamingChatHuggingFace(llm=llm)
         else:
             self.model = llm
 
-    def build_graph(self) -> None:
+    def build_graph(self, draw: bool = True) -> None:
         """Construct the workflow graph.
 
         Creates and configures the workflow graph with:
-        - Memory-based checkpointing
+        - Memory-based checkpointing, shared by every build of the graph
         - WebSearcher and Summarizer agents
-        - Tool nodes for search operations
+        - A tool node running the search tool calls concurrently
+        - Context packing of the tool output before summarization
         - Conditional edges for workflow control
         
         Also generates and saves a visualization of the graph structure.
+
+        Args:
+            draw: Render and save the graph diagram. Defaults to True.
         """
-        memory = MemorySaver()
         graph_builder = StateGraph(MessagesState)
 
         # Agents
         websearcher_agent = WebSearcherAgent(model=self.model)
         summarizer_agent = SummarizerAgent(model=self.model)
+        # The packed context leaves room for the summarizer's own generation budget
+        context_packer = ContextPacker(
+            model=self.model,
+            embedding_function=self.embedding_function,
+            max_new_tokens=summarizer_agent.generation_params.max_new_tokens
+        )
 
         # tools
         tools = [news_search, web_search]
         if self.vectorstore_retriever:
             tools = [self.vectorstore_retriever] + tools
+        tools = self.retriever_tools + tools
 
-        tool_node = ToolNode(tools=tools)
+        tool_node = ParallelToolNode(tools=tools)
         websearcher_agent.bind_tools(tools)
 
         graph_builder.add_node("websearcher", websearcher_agent)
         graph_builder.add_node("tools", tool_node)
+        graph_builder.add_node("context_packer", context_packer)
         graph_builder.add_node("summarizer", summarizer_agent)
         
         graph_builder.set_entry_point("websearcher")
         graph_builder.add_conditional_edges("websearcher", tools_condition)
-        graph_builder.add_edge("tools", "summarizer")
+        graph_builder.add_edge("tools", "context_packer")
+        graph_builder.add_edge("context_packer", "summarizer")
         graph_builder.add_edge("summarizer", END)
 
-        self.graph = graph_builder.compile(checkpointer=memory)
-        print(self.graph.get_graph().draw_mermaid())
-        image = Image.open(io.BytesIO(self.graph.get_graph().draw_mermaid_png()))
-        image.save("./docs/assets/workflow-graph.png")
+        self.graph = graph_builder.compile(checkpointer=self.checkpointer)
+        if draw:
+            print(self.graph.get_graph().draw_mermaid())
+            image = Image.open(io.BytesIO(self.graph.get_graph().draw_mermaid_png()))
+            image.save("./docs/assets/workflow-graph.png")
+
+    def set_retriever_tools(self, retriever_tools: List[BaseTool]) -> None:
+        """Replace the retrieval tools of the collections, e.g. after a collection is added.
+
+        The graph is rebuilt with the same model and checkpointer, so ongoing and past
+        conversations are kept, and the diagram is not rendered again.
+
+        Args:
+            retriever_tools: Retrieval tools of the vector store collections
+        """
+        self.retriever_tools = retriever_tools
+        self.build_graph(draw=False)
 
     def __call__(self):
         """Make the workflow graph callable.
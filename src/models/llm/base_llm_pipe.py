@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import Iterator
+from .streaming import stream_pipeline
 
 
 class BaseLLMPipe(ABC):
@@ -42,3 +44,15 @@ class BaseLLMPipe(ABC):
             The initialized language model pipeline
         """
         return self.pipe
+
+    def stream(self, prompt: str, **generate_kwargs) -> Iterator[str]:
+        """Generate text for a formatted prompt, yielding it token by token.
+
+        Args:
+            prompt: The formatted prompt
+            **generate_kwargs: Generation arguments overriding the pipeline ones
+
+        Yields:
+            The generated text, piece by piece
+        """
+        yield from stream_pipeline(self.pipe.pipeline, prompt, **generate_kwargs)
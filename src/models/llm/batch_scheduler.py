@@ -0,0 +1,311 @@
+import queue
+import time
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+from transformers import StoppingCriteria, StoppingCriteriaList
+from transformers.generation.streamers import BaseStreamer
+from .prefix_cache import get_prefix_cache
+
+
+class SchedulerBusyError(RuntimeError):
+    """Raised when the scheduler queue stays full for longer than the submit timeout."""
+    pass
+
+
+_END = object()
+
+
+class GenerationRequest:
+    """A generate request submitted to the BatchScheduler.
+
+    The generated text can be consumed piece by piece by iterating over the request,
+    or as a whole with result(). cancel() stops the generation of the request, even in
+    the middle of a batch, without affecting the other requests of the batch.
+
+    Attributes:
+        prompt (str): The formatted prompt
+        generate_kwargs (dict): Generation arguments of the request
+        prefix (str): Fixed text the prompt starts with, whose KV cache may be reused
+        cancelled (bool): Whether the request was cancelled
+    """
+
+    def __init__(self, prompt: str, generate_kwargs: Optional[dict] = None, prefix: Optional[str] = None):
+        self.prompt = prompt
+        self.generate_kwargs = generate_kwargs or {}
+        self.prefix = prefix
+        self.cancelled = False
+        self._pieces = queue.Queue()
+        self._text = []
+        self._error = None
+        self._done = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop generating for this request."""
+        self.cancelled = True
+
+    def _emit(self, text: str) -> None:
+        """Deliver a new piece of generated text."""
+        self._text.append(text)
+        self._pieces.put(text)
+
+    def _finish(self, error: Optional[BaseException] = None) -> None:
+        """Mark the request as done, with the error that ended it if any."""
+        if self._done.is_set():
+            return
+        self._error = error
+        self._done.set()
+        self._pieces.put(_END)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            piece = self._pieces.get()
+            if piece is _END:
+                break
+            yield piece
+        if self._error is not None:
+            raise self._error
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        """Wait for the request to finish and get the generated text.
+
+        Args:
+            timeout: Maximum wait in seconds. Optional.
+
+        Returns:
+            The generated text
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError("Generation did not finish in time.")
+        if self._error is not None:
+            raise self._error
+        return "".join(self._text)
+
+
+class _BatchStreamer(BaseStreamer):
+    """Streamer dispatching the tokens generated for each row of a batch to its request."""
+
+    def __init__(self, tokenizer, requests: List[GenerationRequest]):
+        self.tokenizer = tokenizer
+        self.requests = requests
+        self.tokens = [[] for _ in requests]
+        self.printed = [0 for _ in requests]
+        self.prompt_seen = False
+
+    def _emit_new_text(self, i: int, final: bool = False) -> None:
+        text = self.tokenizer.decode(self.tokens[i], skip_special_tokens=True)
+        # Wait for the rest of a multi-byte character before emitting it
+        if not final and text.endswith("�"):
+            return
+        if len(text) > self.printed[i]:
+            self.requests[i]._emit(text[self.printed[i]:])
+            self.printed[i] = len(text)
+
+    def put(self, value) -> None:
+        # The first call carries the prompts
+        if not self.prompt_seen:
+            self.prompt_seen = True
+            return
+        for i, ids in enumerate(value.reshape(len(self.requests), -1).tolist()):
+            if not self.requests[i].cancelled:
+                self.tokens[i].extend(ids)
+                self._emit_new_text(i)
+
+    def end(self) -> None:
+        for i, request in enumerate(self.requests):
+            if not request.cancelled:
+                self._emit_new_text(i, final=True)
+
+
+class _CancelledCriteria(StoppingCriteria):
+    """Stop the rows of a batch whose request was cancelled."""
+
+    def __init__(self, requests: List[GenerationRequest]):
+        self.requests = requests
+
+    def __call__(self, input_ids, scores, **kwargs):
+        import torch
+        return torch.tensor([request.cancelled for request in self.requests], device=input_ids.device)
+
+
+class BatchScheduler:
+    """Scheduler batching the concurrent generate requests sent to a local LLM.
+
+    A worker thread takes the first pending request, then keeps collecting requests for
+    a short window (or until max_batch_size requests are collected), and runs the
+    requests with the same generation arguments as one left-padded batch. Throughput
+    therefore grows with the number of concurrent chat sessions instead of latency
+    growing linearly. A request running alone reuses the KV cache of its fixed prompt
+    prefix, batched requests are prefilled together instead.
+
+    Requests can be cancelled at any time, and a cancelled row stops generating within
+    one decoding step. The queue of pending requests is bounded: once max_pending
+    requests are waiting, submit() blocks up to submit_timeout seconds and then raises
+    SchedulerBusyError, so overload is reported to the caller instead of piling up.
+
+    run_batch() is the extension point for a continuous batching engine, which would
+    admit newly submitted requests into the running batch between decoding steps
+    instead of waiting for the batch to finish.
+
+    Requests are generated with the generation arguments of the pipeline (e.g. its
+    max_new_tokens and repetition_penalty), overridden by the arguments of the request,
+    as when the pipeline is called directly.
+
+    Attributes:
+        pipeline: The transformers text-generation pipeline
+        model: The transformers model
+        tokenizer: The tokenizer of the model
+        max_batch_size (int): Maximum number of requests per batch
+        window (float): Collection window in seconds after the first request of a batch
+        max_pending (int): Maximum number of pending requests
+        submit_timeout (float): Maximum wait in seconds for a free slot in the queue
+
+    Args:
+        pipeline: The transformers text-generation pipeline of the model
+        max_batch_size (int, optional): Maximum number of requests per batch. Defaults to 8.
+        window (float, optional): Collection window in seconds. Defaults to 0.02.
+        max_pending (int, optional): Maximum number of pending requests. Defaults to 64.
+        submit_timeout (float, optional): Maximum wait for a free queue slot. Defaults to 30.
+    """
+
+    def __init__(
+            self,
+            pipeline,
+            max_batch_size: int = 8,
+            window: float = 0.02,
+            max_pending: int = 64,
+            submit_timeout: float = 30.0
+    ):
+        self.pipeline = pipeline
+        self.model = pipeline.model
+        self.tokenizer = pipeline.tokenizer
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.max_pending = max_pending
+        self.submit_timeout = submit_timeout
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "batches": 0, "batched_requests": 0, "max_batch": 0, "rejected": 0, "cancelled": 0, "errors": 0}
+        self._worker = threading.Thread(target=self._loop, daemon=True, name="llm-batch-scheduler")
+        self._worker.start()
+
+    def submit(self, prompt: str, generate_kwargs: Optional[dict] = None, prefix: Optional[str] = None) -> GenerationRequest:
+        """Submit a generate request.
+
+        Args:
+            prompt: The formatted prompt
+            generate_kwargs: Generation arguments, e.g. max_new_tokens. Optional.
+            prefix: Fixed text the prompt starts with, whose KV cache may be reused. Optional.
+
+        Returns:
+            GenerationRequest: The request, to iterate over, wait for or cancel
+
+        Raises:
+            SchedulerBusyError: If the queue stays full for submit_timeout seconds
+        """
+        request = GenerationRequest(prompt, generate_kwargs, prefix)
+        try:
+            self._queue.put(request, timeout=self.submit_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise SchedulerBusyError(f"{self.max_pending} generate requests are already pending, try again later.")
+        with self._lock:
+            self._stats["requests"] += 1
+        return request
+
+    def _collect(self) -> List[GenerationRequest]:
+        """Wait for a request, then collect the requests arriving within the window."""
+        requests = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(requests) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                requests.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return requests
+
+    @staticmethod
+    def _batch_key(request: GenerationRequest) -> str:
+        """Key of the generation arguments, requests can only be batched with the same key."""
+        return repr(sorted((key, repr(value)) for key, value in request.generate_kwargs.items() if key != "tokenizer"))
+
+    def _loop(self) -> None:
+        """Worker loop running the collected requests batch by batch."""
+        while True:
+            groups = OrderedDict()
+            for request in self._collect():
+                if request.cancelled:
+                    with self._lock:
+                        self._stats["cancelled"] += 1
+                    request._finish()
+                    continue
+                groups.setdefault(self._batch_key(request), []).append(request)
+
+            for requests in groups.values():
+                try:
+                    self.run_batch(requests)
+                except Exception as e:
+                    with self._lock:
+                        self._stats["errors"] += 1
+                    for request in requests:
+                        request._finish(e)
+                else:
+                    with self._lock:
+                        self._stats["cancelled"] += sum(request.cancelled for request in requests)
+                    for request in requests:
+                        request._finish()
+
+    def run_batch(self, requests: List[GenerationRequest]) -> None:
+        """Generate the requests as one padded batch, streaming the text of each row to its request.
+
+        Args:
+            requests: Requests with the same generation arguments
+        """
+        import torch
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["batched_requests"] += len(requests)
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(requests))
+
+        # Arguments of the request override the pipeline ones, as in pipeline(prompt, **kwargs)
+        generate_kwargs = {**getattr(self.pipeline, "_forward_params", {}), **requests[0].generate_kwargs}
+        generate_kwargs.pop("return_full_text", None)
+        generate_kwargs.setdefault("pad_token_id", self.tokenizer.pad_token_id)
+        if len(requests) == 1 and requests[0].prefix:
+            past_key_values = get_prefix_cache().lookup(self.model, self.tokenizer, requests[0].prompt, requests[0].prefix)
+            if past_key_values is not None:
+                generate_kwargs["past_key_values"] = past_key_values
+
+        # Decoder-only models generate from the right, so prompts are padded on the left.
+        # The tokenizer is shared with the pipeline, so its padding side is left as is.
+        inputs = self.tokenizer(
+            [request.prompt for request in requests], return_tensors="pt", padding=True, padding_side="left"
+        )
+        with torch.no_grad():
+            self.model.generate(
+                **inputs.to(self.model.device),
+                streamer=_BatchStreamer(self.tokenizer, requests),
+                stopping_criteria=StoppingCriteriaList([_CancelledCriteria(requests)]),
+                **generate_kwargs
+            )
+
+    def stats(self) -> dict:
+        """Get the scheduler statistics.
+
+        Returns:
+            dict: Submitted, rejected, cancelled and failed requests, number of batches,
+            average and maximum batch size, and number of pending requests
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["pending"] = self._queue.qsize()
+        stats["batch_avg"] = stats["batched_requests"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
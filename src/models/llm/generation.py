@@ -0,0 +1,147 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from langchain_core.language_models import BaseChatModel
+from utils import count_tokens
+
+
+@dataclass(frozen=True)
+class GenerationParams:
+    """Generation settings of an agent, applied per call instead of baked into the pipeline.
+
+    Attributes:
+        max_new_tokens (int): Maximum number of generated tokens
+        stop (Tuple[str, ...]): Stop sequences, generation ends once one is produced
+        do_sample (bool): Sample the output, otherwise decode greedily
+        temperature (float): Sampling temperature, only used when sampling
+        top_p (float): Nucleus sampling probability mass, only used when sampling
+        repetition_penalty (float): Penalty on repeated tokens. Optional.
+    """
+    max_new_tokens: int = 1024
+    stop: Tuple[str, ...] = ()
+    do_sample: bool = False
+    temperature: Optional[float] = None
+    top_p: Optional[float] = None
+    repetition_penalty: Optional[float] = None
+
+    def model_kwargs(self, model: BaseChatModel, cache_prefix: Optional[str] = None) -> dict:
+        """Translate the settings into the call arguments of a chat model.
+
+        Local HuggingFace pipelines receive them as "pipeline_kwargs" generation arguments,
+        with stop sequences as stop_strings, along with the fixed prompt prefix whose KV
+        state is cached. Other chat models receive the usual max_tokens, stop and
+        temperature arguments.
+
+        Args:
+            model: The chat model the settings are applied to
+            cache_prefix: Fixed text every prompt of the caller starts with. Optional.
+
+        Returns:
+            dict: Arguments to bind to the model
+        """
+        pipeline = getattr(getattr(model, "llm", None), "pipeline", None)
+        if pipeline is None:
+            kwargs = {"max_tokens": self.max_new_tokens, "temperature": self.temperature if self.do_sample else 0.0}
+            if self.do_sample and self.top_p is not None:
+                kwargs["top_p"] = self.top_p
+            if self.stop:
+                kwargs["stop"] = list(self.stop)
+            return kwargs
+
+        kwargs = {"max_new_tokens": self.max_new_tokens, "do_sample": self.do_sample}
+        if self.do_sample:
+            kwargs.update({
+                key: value for key, value in (("temperature", self.temperature), ("top_p", self.top_p))
+                if value is not None
+            })
+        else:
+            # Unset the sampling parameters of the model's generation config to silence warnings
+            kwargs.update({"temperature": None, "top_p": None, "top_k": None})
+        if self.repetition_penalty is not None:
+            kwargs["repetition_penalty"] = self.repetition_penalty
+        if self.stop:
+            kwargs["stop_strings"] = list(self.stop)
+            kwargs["tokenizer"] = pipeline.tokenizer
+        if cache_prefix:
+            return {"pipeline_kwargs": kwargs, "cache_prefix": cache_prefix}
+        return {"pipeline_kwargs": kwargs}
+
+
+def count_generated_tokens(model: BaseChatModel, text: str) -> int:
+    """Count the tokens of a generated text with the model's tokenizer.
+
+    Args:
+        model: The chat model that generated the text
+        text: The generated text
+
+    Returns:
+        The number of tokens, counted with tiktoken if the model has no local tokenizer
+    """
+    tokenizer = getattr(getattr(getattr(model, "llm", None), "pipeline", None), "tokenizer", None)
+    if tokenizer is None:
+        return count_tokens(text)
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+class GenerationStats:
+    """Generated-token counts and generation latency per agent.
+
+    A call is counted as truncated when it generated as many tokens as its budget,
+    which usually means the model rambled or looped until the limit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._agents = {}
+
+    def record(self, agent: str, tokens: int, seconds: float, max_new_tokens: int) -> None:
+        """Record a generation.
+
+        Args:
+            agent: Name of the agent
+            tokens: Number of generated tokens
+            seconds: Generation time in seconds
+            max_new_tokens: Token budget of the call
+        """
+        with self._lock:
+            stats = self._agents.setdefault(
+                agent,
+                {"calls": 0, "tokens_total": 0, "tokens_max": 0, "last_tokens": 0, "truncated": 0, "seconds_total": 0.0}
+            )
+            stats["calls"] += 1
+            stats["tokens_total"] += tokens
+            stats["tokens_max"] = max(stats["tokens_max"], tokens)
+            stats["last_tokens"] = tokens
+            stats["truncated"] += tokens >= max_new_tokens
+            stats["seconds_total"] += seconds
+
+    def stats(self) -> dict:
+        """Get the generation statistics.
+
+        Returns:
+            dict: Per agent, the number of calls, total, maximum, average and last generated
+            tokens, truncated calls, total seconds and tokens per second
+        """
+        with self._lock:
+            agents = {agent: dict(stats) for agent, stats in self._agents.items()}
+        for stats in agents.values():
+            stats["tokens_avg"] = stats["tokens_total"] / stats["calls"]
+            stats["tokens_per_second"] = stats["tokens_total"] / stats["seconds_total"] if stats["seconds_total"] else 0.0
+        return agents
+
+
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_generation_stats() -> GenerationStats:
+    """Get the generation statistics shared by the agents, creating them on first use.
+
+    Returns:
+        GenerationStats: The shared generation statistics
+    """
+    global _stats
+    with _stats_lock:
+        if _stats is None:
+            _stats = GenerationStats()
+    return _stats
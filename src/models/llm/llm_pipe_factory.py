@@ -1,17 +1,19 @@
 from .smollm2 import SmolLM2
 from .qwen import Qwen
 from .qwen3 import Qwen3
+from .openai_compatible import OpenAICompatible
 
 
 # define models here
 models = {
     "smollm2": SmolLM2,
     "qwen": Qwen,
-    "qwen3": Qwen3
+    "qwen3": Qwen3,
+    "openai": OpenAICompatible
 }
 
 
-def llm_pipe_factory(model_name="qwen"):
+def llm_pipe_factory(model_name="qwen", **kwargs):
     """Factory function for creating language model pipeline instances.
 
     This function implements the factory pattern to instantiate different language
@@ -19,9 +21,11 @@ def llm_pipe_factory(model_name="qwen"):
     - SmolLM2: A 1.7B parameter instruction-tuned model
     - Qwen: A 3B parameter instruction-tuned model with AWQ quantization
     - Qwen3: A 1.7/4B parameter instruction-tuned model (some with AWQ quantization)
+    - OpenAI: A chat model served by a remote OpenAI-compatible endpoint (e.g. vLLM)
 
     Args:
         model_name (str, optional): Name of the model to instantiate. Defaults to "qwen".
+        **kwargs: Settings of the model, e.g. base_url and max_concurrency of "openai"
 
     Returns:
         BaseChatModel or HuggingFacePipeline: The initialized language model pipeline
@@ -29,4 +33,4 @@ def llm_pipe_factory(model_name="qwen"):
     Raises:
         KeyError: If the requested model name is not found in the supported models
     """
-    return models[model_name]().get_pipe()
+    return models[model_name](**kwargs).get_pipe()
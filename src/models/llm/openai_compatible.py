@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+import httpx
+from pydantic import PrivateAttr
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, convert_to_openai_messages
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from .base_llm_pipe import BaseLLMPipe
+
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class RemoteChatModel(BaseChatModel):
+    """Chat model served by an OpenAI-compatible HTTP endpoint (vLLM, llama.cpp server, ...).
+
+    Requests go through one pooled httpx client, so connections to the server are kept
+    alive and reused across calls instead of being opened for every generation. At most
+    max_concurrency requests are in flight at once, further calls wait for a free slot.
+
+    Connection errors, timeouts and retryable status codes (429 and 5xx) are retried up
+    to max_retries times with exponential backoff and jitter, honouring the Retry-After
+    header of the server. Every delay is capped at max_retry_delay, so that a server
+    asking to come back much later cannot hold a worker thread and a concurrency slot
+    for that long. A stream is only retried until its first token is received.
+
+    The max_tokens, temperature, top_p and stop arguments bound by the agents (see
+    GenerationParams.model_kwargs) are sent as the usual chat completion parameters.
+
+    Attributes:
+        base_url (str): Base URL of the API, e.g. "http://localhost:8000/v1"
+        model (str): Name of the served model
+        api_key (str): API key sent as a bearer token. Optional.
+        max_concurrency (int): Maximum number of concurrent requests
+        timeout (float): Timeout in seconds of a request, and of each streamed chunk
+        max_retries (int): Maximum number of retries of a failed request
+        backoff (float): Delay in seconds before the first retry, doubled at each retry
+        max_retry_delay (float): Maximum delay in seconds before a retry
+    """
+    base_url: str
+    model: str
+    api_key: Optional[str] = None
+    max_concurrency: int = 8
+    timeout: float = 120.0
+    max_retries: int = 3
+    backoff: float = 0.5
+    max_retry_delay: float = 10.0
+
+    _client: httpx.Client = PrivateAttr()
+    _semaphore: threading.BoundedSemaphore = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self._client = httpx.Client(
+            base_url=self.base_url.rstrip("/"),
+            headers=headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=60.0
+            )
+        )
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+
+    @property
+    def _llm_type(self) -> str:
+        return "openai-compatible"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"base_url": self.base_url, "model": self.model}
+
+    def close(self) -> None:
+        """Close the pooled connections to the server."""
+        self._client.close()
+
+    def _payload(self, messages: List[BaseMessage], stop: Optional[List[str]], stream: bool, **kwargs: Any) -> dict:
+        """Build the body of a chat completion request."""
+        payload = {"model": self.model, "messages": convert_to_openai_messages(messages), "stream": stream}
+        for key in ("max_tokens", "temperature", "top_p"):
+            if kwargs.get(key) is not None:
+                payload[key] = kwargs[key]
+        stop = stop or kwargs.get("stop")
+        if stop:
+            payload["stop"] = list(stop)
+        return payload
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Get the delay before a retry, from the Retry-After header or the backoff, capped at max_retry_delay."""
+        delay = self.backoff * 2 ** attempt * (1 + random.random() * 0.1)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass
+        return min(max(delay, 0.0), self.max_retry_delay)
+
+    def _send(self, payload: dict, stream: bool) -> httpx.Response:
+        """Send a chat completion request, retrying transient failures.
+
+        Returns:
+            The successful response, to be closed by the caller when streaming
+        """
+        attempt = 0
+        while True:
+            try:
+                request = self._client.build_request("POST", "/chat/completions", json=payload)
+                response = self._client.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._retry_delay(attempt)
+            else:
+                if response.status_code < 400:
+                    return response
+                if stream:
+                    response.read()
+                response.close()
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                delay = self._retry_delay(attempt, response)
+            logger.warning("LLM request failed, retrying in %.2fs (%d/%d)", delay, attempt + 1, self.max_retries)
+            time.sleep(delay)
+            attempt += 1
+
+    def _generate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> ChatResult:
+        """Generate the reply to the messages.
+
+        Args:
+            messages: The conversation messages
+            stop: Stop sequences. Optional.
+            run_manager: Callback manager of the LLM run
+            **kwargs: May contain max_tokens, temperature, top_p and stop
+
+        Returns:
+            The reply, with the token usage reported by the server
+        """
+        payload = self._payload(messages, stop, stream=False, **kwargs)
+        with self._semaphore:
+            response = self._send(payload, stream=False)
+        body = response.json()
+        choice = body["choices"][0]
+        message = AIMessage(content=choice["message"].get("content") or "")
+        return ChatResult(
+            generations=[ChatGeneration(message=message, generation_info={"finish_reason": choice.get("finish_reason")})],
+            llm_output={"token_usage": body.get("usage", {}), "model_name": self.model}
+        )
+
+    def _stream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream the reply to the messages from the server-sent events of the endpoint.
+
+        Args:
+            messages: The conversation messages
+            stop: Stop sequences. Optional.
+            run_manager: Callback manager of the LLM run, notified of every new token
+            **kwargs: May contain max_tokens, temperature, top_p and stop
+
+        Yields:
+            The reply, chunk by chunk
+        """
+        payload = self._payload(messages, stop, stream=True, **kwargs)
+        with self._semaphore:
+            response = self._send(payload, stream=True)
+            try:
+                for line in response.iter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices")
+                    text = choices[0].get("delta", {}).get("content") if choices else None
+                    if not text:
+                        continue
+                    chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+                    if run_manager is not None:
+                        run_manager.on_llm_new_token(text, chunk=chunk)
+                    yield chunk
+            finally:
+                # Closing the response early aborts the generation on the server
+                response.close()
+
+
+class OpenAICompatible(BaseLLMPipe):
+    """Remote language model served by an OpenAI-compatible endpoint.
+
+    The inference server runs separately from the app, so app nodes without a GPU can
+    run the workflow and scale independently of inference. The settings default to
+    the environment variables:
+    - LLM_BASE_URL: Base URL of the API. Defaults to "http://localhost:8000/v1".
+    - LLM_MODEL: Name of the served model. Defaults to "Qwen/Qwen3-4B-AWQ".
+    - LLM_API_KEY: API key. Optional.
+    - LLM_MAX_CONCURRENCY: Maximum number of concurrent requests. Defaults to 8.
+
+    Args:
+        base_url (str, optional): Base URL of the API. Defaults to LLM_BASE_URL.
+        model (str, optional): Name of the served model. Defaults to LLM_MODEL.
+        api_key (str, optional): API key. Defaults to LLM_API_KEY.
+        max_concurrency (int, optional): Maximum number of concurrent requests. Defaults
+            to LLM_MAX_CONCURRENCY.
+        **kwargs: Other RemoteChatModel settings, e.g. timeout, max_retries, backoff and
+            max_retry_delay
+    """
+
+    def __init__(
+            self,
+            base_url: Optional[str] = None,
+            model: Optional[str] = None,
+            api_key: Optional[str] = None,
+            max_concurrency: Optional[int] = None,
+            **kwargs: Any
+    ):
+        self.settings = {
+            "base_url": base_url or os.environ.get("LLM_BASE_URL", "http://localhost:8000/v1"),
+            "model": model or os.environ.get("LLM_MODEL", "Qwen/Qwen3-4B-AWQ"),
+            "api_key": api_key or os.environ.get("LLM_API_KEY"),
+            "max_concurrency": max_concurrency or int(os.environ.get("LLM_MAX_CONCURRENCY", 8)),
+            **kwargs
+        }
+        super().__init__()
+
+    def build_pipe(self) -> None:
+        """Build the chat model of the remote endpoint."""
+        self.pipe = RemoteChatModel(**self.settings)
+
+    def stream(self, prompt: str, **generate_kwargs) -> Iterator[str]:
+        """Generate text for a prompt, yielding it token by token.
+
+        Args:
+            prompt: The user prompt
+            **generate_kwargs: Generation arguments, e.g. max_tokens and temperature
+
+        Yields:
+            The generated text, piece by piece
+        """
+        for chunk in self.pipe.stream(prompt, **generate_kwargs):
+            yield chunk.content
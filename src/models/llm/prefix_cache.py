@@ -0,0 +1,139 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class PrefixKVCache:
+    """Bounded cache of the KV state of fixed prompt prefixes for local pipelines.
+
+    Agents send the same long prefix on every call (the websearcher system prompt with
+    its tool schemas, the fixed head of the summarizer and invoice templates). The KV
+    state of such a prefix is computed once with a forward pass, and every later prompt
+    starting with the same tokens is generated from a copy of it, so only the rest of
+    the prompt is prefilled.
+
+    Entries are keyed by model and by the hash of the prefix token IDs, and the least
+    recently used entries are evicted beyond max_entries (a prefix of a few thousand
+    tokens takes hundreds of MB of GPU memory on a 4B model).
+
+    Attributes:
+        max_entries (int): Maximum number of cached prefixes
+        min_tokens (int): Minimum prefix length worth caching
+
+    Args:
+        max_entries (int, optional): Maximum number of cached prefixes. Defaults to 4.
+        min_tokens (int, optional): Minimum prefix length worth caching. Defaults to 32.
+    """
+
+    def __init__(self, max_entries: int = 4, min_tokens: int = 32):
+        self.max_entries = max_entries
+        self.min_tokens = min_tokens
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "skipped": 0, "evictions": 0, "tokens_reused": 0}
+
+    @staticmethod
+    def _model_id(model) -> str:
+        """Get an identifier of a loaded model."""
+        return f"{getattr(model, 'name_or_path', type(model).__name__)}@{id(model)}"
+
+    def _build(self, model, token_ids: list) -> Any:
+        """Run the prefix through the model and return its KV cache."""
+        import torch
+        from transformers import DynamicCache
+
+        cache = DynamicCache()
+        with torch.no_grad():
+            model(input_ids=torch.tensor([token_ids], device=model.device), past_key_values=cache, use_cache=True)
+        return cache
+
+    def lookup(self, model, tokenizer, prompt: str, prefix: str) -> Optional[Any]:
+        """Get the KV cache of the fixed prefix of a prompt, computing it on first use.
+
+        The prefix ends where the fixed text ends in the prompt. Only the tokens the
+        prefix and the prompt have in common are cached, so a token merged across the
+        prefix boundary is never reused, and at least one prompt token is left to
+        prefill.
+
+        Args:
+            model: The transformers model generating the prompt
+            tokenizer: The tokenizer of the model
+            prompt: The formatted prompt
+            prefix: The fixed text of the prompt, e.g. the system prompt
+
+        Returns:
+            A copy of the prefix KV cache to pass to generate as past_key_values, or
+            None if the prompt does not contain the prefix or the prefix is too short
+        """
+        end = prompt.find(prefix)
+        if end == -1:
+            with self._lock:
+                self._stats["skipped"] += 1
+            return None
+        prompt_ids = tokenizer(prompt)["input_ids"]
+        prefix_ids = tokenizer(prompt[:end + len(prefix)])["input_ids"]
+        n_tokens = 0
+        for prompt_id, prefix_id in zip(prompt_ids[:len(prompt_ids) - 1], prefix_ids):
+            if prompt_id != prefix_id:
+                break
+            n_tokens += 1
+        if n_tokens < self.min_tokens:
+            with self._lock:
+                self._stats["skipped"] += 1
+            return None
+
+        token_ids = prompt_ids[:n_tokens]
+        key = (self._model_id(model), hashlib.sha256(str(token_ids).encode("utf-8")).hexdigest())
+        with self._lock:
+            cache = self._entries.get(key)
+            if cache is None:
+                self._stats["misses"] += 1
+                cache = self._build(model, token_ids)
+                self._entries[key] = cache
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats["tokens_reused"] += n_tokens
+            self._entries.move_to_end(key)
+            # Generation appends to the cache, so every request gets its own copy
+            return copy.deepcopy(cache)
+
+    def clear(self) -> None:
+        """Drop all cached prefixes."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Get the cache statistics.
+
+        Returns:
+            dict: Hit, miss, skip and eviction counts, number of prefix tokens reused, hit
+            rate and number of cached prefixes
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prefix_cache() -> PrefixKVCache:
+    """Get the prefix KV cache shared by the local LLM pipes, creating it on first use.
+
+    Returns:
+        PrefixKVCache: The shared prefix cache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PrefixKVCache()
+    return _cache
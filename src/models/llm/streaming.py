@@ -0,0 +1,159 @@
+from threading import Thread
+from typing import Any, Iterator, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_huggingface import ChatHuggingFace
+from transformers import TextIteratorStreamer
+from .prefix_cache import get_prefix_cache
+
+
+def stream_pipeline(pipeline, prompt: str, timeout: float = 120.0, **generate_kwargs) -> Iterator[str]:
+    """Generate text with a HuggingFace text-generation pipeline, yielding it as it is decoded.
+
+    The pipeline runs in a background thread and feeds a TextIteratorStreamer, which
+    yields the new text of every decoded token (without the prompt and special tokens).
+    An error raised during generation is re-raised in the caller once the stream ends.
+
+    Args:
+        pipeline: The transformers text-generation pipeline
+        prompt: The formatted prompt
+        timeout (float, optional): Maximum wait in seconds for the next piece of text. Defaults to 120.
+        **generate_kwargs: Generation arguments overriding the pipeline ones
+
+    Yields:
+        The generated text, piece by piece
+    """
+    streamer = TextIteratorStreamer(pipeline.tokenizer, skip_prompt=True, skip_special_tokens=True, timeout=timeout)
+    errors = []
+
+    def generate():
+        try:
+            pipeline(prompt, streamer=streamer, **generate_kwargs)
+        except BaseException as e:
+            errors.append(e)
+            streamer.end()
+
+    thread = Thread(target=generate, daemon=True)
+    thread.start()
+    for text in streamer:
+        if text:
+            yield text
+    thread.join()
+    if errors:
+        raise errors[0]
+
+
+class StreamingChatHuggingFace(ChatHuggingFace):
+    """ChatHuggingFace streaming the output of local HuggingFace pipelines token by token.
+
+    ChatHuggingFace only streams from inference endpoints, so with a local pipeline
+    stream() (and stream_mode="messages" in LangGraph) would wait for the whole
+    generation. This subclass streams local pipelines through stream_pipeline, and
+    invoke() streams too whenever a streaming callback handler is attached, e.g. when
+    the graph is streamed with stream_mode="messages".
+
+    Calls may pass a "cache_prefix" argument, the fixed text every prompt of the caller
+    starts with (e.g. its system prompt). The KV state of that prefix is then taken
+    from the shared PrefixKVCache instead of being prefilled again.
+
+    When a BatchScheduler is attached, calls are submitted to it instead of running the
+    pipeline directly, so the concurrent calls of several chat sessions are generated
+    in shared batches. A stream closed early cancels its request.
+
+    Attributes:
+        scheduler (BatchScheduler): Scheduler batching the generate calls. Optional.
+    """
+    scheduler: Optional[Any] = None
+
+    def _with_prefix_cache(self, messages: List[BaseMessage], kwargs: dict) -> dict:
+        """Replace the "cache_prefix" argument by the KV cache of the prefix, if any."""
+        kwargs = dict(kwargs)
+        prefix = kwargs.pop("cache_prefix", None)
+        pipeline = getattr(self.llm, "pipeline", None)
+        if not prefix or pipeline is None:
+            return kwargs
+        past_key_values = get_prefix_cache().lookup(
+            pipeline.model, pipeline.tokenizer, self._to_chat_prompt(messages), prefix
+        )
+        if past_key_values is not None:
+            kwargs["pipeline_kwargs"] = {**kwargs.get("pipeline_kwargs", {}), "past_key_values": past_key_values}
+        return kwargs
+
+    def _generate(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> ChatResult:
+        """Generate the reply to the messages, reusing the KV cache of the prompt prefix.
+
+        Args:
+            messages: The conversation messages
+            stop: Stop sequences
+            run_manager: Callback manager of the LLM run
+            **kwargs: May contain "pipeline_kwargs" and "cache_prefix"
+
+        Returns:
+            The reply
+        """
+        if self.scheduler is not None:
+            request = self.scheduler.submit(
+                self._to_chat_prompt(messages), kwargs.get("pipeline_kwargs"), prefix=kwargs.get("cache_prefix")
+            )
+            try:
+                text = request.result()
+            finally:
+                request.cancel()
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+        kwargs = self._with_prefix_cache(messages, kwargs)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(
+            self,
+            messages: List[BaseMessage],
+            stop: Optional[List[str]] = None,
+            run_manager: Optional[CallbackManagerForLLMRun] = None,
+            **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        """Stream the reply to the messages.
+
+        Args:
+            messages: The conversation messages
+            stop: Stop sequences, unused by local pipelines
+            run_manager: Callback manager of the LLM run, notified of every new token
+            **kwargs: May contain "pipeline_kwargs", generation arguments of the pipeline,
+                and "cache_prefix", the fixed prefix of the prompt
+
+        Yields:
+            The reply, chunk by chunk
+        """
+        pipeline = getattr(self.llm, "pipeline", None)
+        if pipeline is None:
+            # Not a local pipeline, the reply is returned as a single chunk
+            result = self._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=result.generations[0].message.content))
+            return
+
+        if self.scheduler is not None:
+            request = self.scheduler.submit(
+                self._to_chat_prompt(messages), kwargs.get("pipeline_kwargs"), prefix=kwargs.get("cache_prefix")
+            )
+            texts = iter(request)
+        else:
+            kwargs = self._with_prefix_cache(messages, kwargs)
+            request = None
+            texts = stream_pipeline(pipeline, self._to_chat_prompt(messages), **kwargs.get("pipeline_kwargs", {}))
+
+        try:
+            for text in texts:
+                chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+                if run_manager is not None:
+                    run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+        finally:
+            # Stop generating if the stream is closed before the end
+            if request is not None:
+                request.cancel()
@@ -0,0 +1,59 @@
+from typing import List, Optional
+import torch
+from sentence_transformers import CrossEncoder
+
+
+class CrossEncoderScorer:
+    """Small cross-encoder scoring (query, passage) pairs on CPU.
+
+    The default model, ms-marco-MiniLM-L-6-v2, has 22M parameters and scores a few
+    dozen passages in tens of milliseconds on CPU, which makes it cheap enough to
+    rerank retriever output on every query.
+
+    Attributes:
+        model_id (str): Hugging Face identifier of the model weights
+        device (str): Device the model runs on
+        batch_size (int): Number of pairs scored per forward pass
+        model (CrossEncoder): The underlying cross-encoder
+
+    Args:
+        model_id (str, optional): Model weights. Defaults to "cross-encoder/ms-marco-MiniLM-L-6-v2".
+        device (str, optional): Device to run on. Defaults to "cpu".
+        batch_size (int, optional): Pairs per forward pass. Defaults to 32.
+        max_length (int, optional): Maximum tokens per pair, longer pairs are truncated. Defaults to 512.
+        num_threads (int, optional): Number of CPU threads used by torch. Defaults to None.
+    """
+
+    def __init__(
+            self,
+            model_id: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+            device: str = "cpu",
+            batch_size: int = 32,
+            max_length: int = 512,
+            num_threads: Optional[int] = None
+    ):
+        self.model_id = model_id
+        self.device = device
+        self.batch_size = batch_size
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+        self.model = CrossEncoder(model_id, device=device, max_length=max_length)
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        """Score passages against a query.
+
+        Args:
+            query: The search query
+            texts: The passages to score
+
+        Returns:
+            The relevance score of each passage, higher is more relevant
+        """
+        if not texts:
+            return []
+        scores = self.model.predict(
+            [(query, text) for text in texts],
+            batch_size=self.batch_size,
+            show_progress_bar=False
+        )
+        return [float(score) for score in scores]
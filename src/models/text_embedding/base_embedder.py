@@ -0,0 +1,164 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+import torch
+from langchain_core.embeddings import Embeddings
+from sentence_transformers import SentenceTransformer
+
+
+def resolve_device(device: Optional[str] = None) -> str:
+    """Pick the device to run an embedding model on.
+
+    Args:
+        device: Requested device ("cuda", "cpu", "mps", ...). Defaults to the best available one.
+
+    Returns:
+        The device name
+    """
+    if device is not None:
+        return device
+    if torch.cuda.is_available():
+        return "cuda"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+class BaseEmbedder(Embeddings, ABC):
+    """Abstract base class for SentenceTransformer text embedding models.
+
+    This class handles device selection, thread-count control, optional quantized
+    inference and dynamic batching, so that concrete embedders only have to define
+    which weights to load. It implements the LangChain Embeddings interface.
+
+    Texts are sorted by length and grouped into batches of at most batch_size texts
+    and at most max_batch_tokens (estimated) padded tokens, so that short texts are not
+    padded to the length of long ones and long texts do not blow up memory.
+
+    Attributes:
+        model_id (str): Hugging Face identifier of the model weights
+        query_prompt_name (str): Name of the prompt used for queries, None for no prompt
+        device (str): Device the model runs on
+        batch_size (int): Maximum number of texts per batch
+        max_seq_length (int): Maximum number of tokens per text, longer texts are truncated
+        max_batch_tokens (int): Maximum number of padded tokens per batch
+        quantize (str): Quantized inference mode ("int8", "onnx") or None
+        model (SentenceTransformer): The underlying embedding model
+
+    Args:
+        device (str, optional): Device to run on. Defaults to the best available one.
+        batch_size (int, optional): Maximum texts per batch. Defaults to 32.
+        max_seq_length (int, optional): Maximum tokens per text. Defaults to 512.
+        max_batch_tokens (int, optional): Maximum padded tokens per batch. Defaults to 16384.
+        quantize (str, optional): "int8" for dynamic int8 quantization on CPU, "onnx" for the
+            ONNX Runtime backend. Defaults to None.
+        num_threads (int, optional): Number of CPU threads used by torch. Defaults to None.
+    """
+    model_id = None
+    query_prompt_name = None
+
+    def __init__(
+            self,
+            device: Optional[str] = None,
+            batch_size: int = 32,
+            max_seq_length: int = 512,
+            max_batch_tokens: int = 16384,
+            quantize: Optional[str] = None,
+            num_threads: Optional[int] = None
+    ):
+        if quantize not in (None, "int8", "onnx"):
+            raise ValueError(f"Unsupported quantization mode: {quantize}. Must be None, 'int8' or 'onnx'.")
+
+        self.device = resolve_device(device)
+        self.batch_size = batch_size
+        self.max_seq_length = max_seq_length
+        self.max_batch_tokens = max_batch_tokens
+        self.quantize = quantize
+        if num_threads is not None:
+            torch.set_num_threads(num_threads)
+
+        self.model = self.build_model()
+        self.model.max_seq_length = max_seq_length
+        if quantize == "int8":
+            if self.device != "cpu":
+                raise ValueError("int8 dynamic quantization is only supported on CPU.")
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+    @property
+    def cache_id(self) -> str:
+        """Identifier of the model, truncation length and inference mode, used as the embedding cache key.
+
+        Texts longer than max_seq_length tokens are truncated, so their embeddings
+        depend on it and vectors computed at different lengths must not be mixed.
+        """
+        cache_id = f"{self.model_id}:{self.max_seq_length}"
+        return cache_id if self.quantize is None else f"{cache_id}:{self.quantize}"
+
+    @abstractmethod
+    def build_model(self) -> SentenceTransformer:
+        """Load the SentenceTransformer model.
+
+        This method must be implemented by subclasses to load their specific weights
+        on self.device, using the ONNX backend when self.quantize is "onnx".
+
+        Returns:
+            The loaded model
+        """
+        pass
+
+    def _batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into length-sorted batches under the batch size and token limits."""
+        # Rough token estimate, good enough for grouping without running the tokenizer twice.
+        lengths = [min(self.max_seq_length, len(text) // 4 + 1) for text in texts]
+        order = sorted(range(len(texts)), key=lambda i: lengths[i], reverse=True)
+
+        batches, batch = [], []
+        for i in order:
+            # Sorted longest first, so the first text of a batch sets its padded length.
+            longest = lengths[batch[0]] if batch else lengths[i]
+            if batch and (len(batch) >= self.batch_size or (len(batch) + 1) * longest > self.max_batch_tokens):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _encode(self, texts: List[str], prompt_name: Optional[str] = None) -> List[List[float]]:
+        """Encode texts with dynamic batching, returning embeddings in input order."""
+        embeddings = [None] * len(texts)
+        for batch in self._batches(texts):
+            vectors = self.model.encode(
+                [texts[i] for i in batch],
+                prompt_name=prompt_name,
+                batch_size=len(batch),
+                convert_to_numpy=True
+            )
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector.tolist()
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        """Generate embeddings for a search query.
+
+        Uses the model's query prompt, if any, to optimize the embedding for search purposes.
+
+        Args:
+            text: The query text to embed
+
+        Returns:
+            A list of floating-point values representing the text embedding
+        """
+        return self._encode([text], prompt_name=self.query_prompt_name)[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a batch of documents.
+
+        Args:
+            texts: List of document texts to embed
+
+        Returns:
+            A list of embeddings, where each embedding is a list of floats
+        """
+        return self._encode(texts)
@@ -0,0 +1,30 @@
+from sentence_transformers import SentenceTransformer
+from .base_embedder import BaseEmbedder
+
+
+class BgeSmall(BaseEmbedder):
+    """BGE small EN v1.5 text embedding model.
+
+    A 33M parameter embedding model, small enough for CPU-only ingestion workers.
+    Queries are embedded with the retrieval instruction recommended for the model.
+
+    Attributes:
+        model_id (str): Hugging Face identifier of the model weights
+        query_prompt_name (str): Name of the prompt template for queries
+        model (SentenceTransformer): The underlying transformer model
+    """
+    model_id = "BAAI/bge-small-en-v1.5"
+    query_prompt_name = "query"
+
+    def build_model(self) -> SentenceTransformer:
+        """Load and configure the BGE small model on the selected device.
+
+        Returns:
+            The loaded model
+        """
+        return SentenceTransformer(
+            self.model_id,
+            device=self.device,
+            prompts={"query": "Represent this sentence for searching relevant passages: "},
+            backend="onnx" if self.quantize == "onnx" else "torch"
+        )
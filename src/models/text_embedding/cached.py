@@ -0,0 +1,188 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """Cache-backed wrapper around an embedding model.
+
+    Vectors are keyed by (model id, prompt name, text hash), so a text that has already
+    been embedded by the same model with the same prompt is never embedded again. The
+    cache has an in-memory LRU tier and an optional persistent SQLite tier storing the
+    vectors as float16. The wrapper implements the LangChain Embeddings interface and
+    can be passed wherever the wrapped model is used, e.g. to ChromaVectorStore.
+
+    Attributes:
+        embedder: The wrapped embedding model
+        model_id (str): Identifier of the wrapped model, part of the cache key
+        max_entries (int): Maximum number of vectors kept in memory
+        persist_path (str): Path of the SQLite database of the persistent tier, if any
+
+    Args:
+        embedder: Embedding model exposing embed_query and embed_documents
+        model_id (str, optional): Model identifier. Defaults to the embedder's cache_id or
+            model_id attribute, or its class name.
+        max_entries (int, optional): Size of the in-memory LRU. Defaults to 10000.
+        persist_path (str, optional): SQLite path of the persistent tier. Defaults to None.
+    """
+
+    def __init__(
+            self,
+            embedder,
+            model_id: Optional[str] = None,
+            max_entries: int = 10000,
+            persist_path: Optional[str] = None
+    ):
+        self.embedder = embedder
+        self.model_id = (
+            model_id
+            or getattr(embedder, "cache_id", None)
+            or getattr(embedder, "model_id", None)
+            or type(embedder).__name__
+        )
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        if persist_path is not None:
+            self._build_db()
+
+    def _build_db(self) -> None:
+        """Create the persistent tier database and table if they do not exist."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        conn = sqlite3.connect(self.persist_path)
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        finally:
+            conn.close()
+
+    def _key(self, prompt_name: str, text: str) -> str:
+        """Build the cache key of a text embedded with a given prompt."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_id}:{prompt_name}:{text_hash}"
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        """Store a vector in the in-memory tier, evicting the least recently used ones."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up keys in the in-memory tier, then in the persistent tier."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self._stats["memory_hits"] += 1
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.persist_path is not None:
+            conn = sqlite3.connect(self.persist_path, timeout=30)
+            try:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM vectors WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+            finally:
+                conn.close()
+
+            with self._lock:
+                for key in missing:
+                    if key in found:
+                        self._remember(key, found[key])
+                        self._stats["disk_hits"] += 1
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        """Store freshly computed vectors in both tiers."""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+                self._stats["misses"] += 1
+
+        if self.persist_path is not None:
+            conn = sqlite3.connect(self.persist_path, timeout=30)
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO vectors (key, vector) VALUES (?, ?)",
+                        [
+                            (key, np.asarray(vector, dtype=np.float16).tobytes())
+                            for key, vector in vectors.items()
+                        ]
+                    )
+            finally:
+                conn.close()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Generate (or fetch from cache) the embedding of a search query.
+
+        Args:
+            text: The query text to embed
+
+        Returns:
+            A list of floating-point values representing the text embedding
+        """
+        key = self._key(getattr(self.embedder, "query_prompt_name", "query"), text)
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+
+        vector = self.embedder.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Generate (or fetch from cache) the embeddings of a batch of documents.
+
+        Only the texts missing from the cache are sent to the wrapped model, in a
+        single batch.
+
+        Args:
+            texts: List of document texts to embed
+
+        Returns:
+            A list of embeddings, where each embedding is a list of floats
+        """
+        keys = [self._key("", text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing[key] = text
+        if missing:
+            vectors = self.embedder.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+
+        return [found[key] for key in keys]
+
+    def stats(self) -> dict:
+        """Get the cache statistics.
+
+        Returns:
+            dict: Memory hits, disk hits, misses, hit rate and in-memory entry count
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
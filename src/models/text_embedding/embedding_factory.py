@@ -0,0 +1,34 @@
+from .stella import Stella
+from .bge_small import BgeSmall
+from .minilm import MiniLM
+
+
+# define embedding models here
+embedders = {
+    "stella": Stella,
+    "bge-small": BgeSmall,
+    "minilm": MiniLM
+}
+
+
+def embedding_factory(model_name="stella", **kwargs):
+    """Factory function for creating text embedding model instances.
+
+    This function implements the factory pattern to instantiate different text
+    embedding models based on the requested model name. Currently supports:
+    - Stella: A 1.5B parameter embedding model (best quality, GPU recommended)
+    - BGE small: A 33M parameter embedding model suited to CPU ingestion
+    - MiniLM: A 22M parameter embedding model, the fastest on CPU
+
+    Args:
+        model_name (str, optional): Name of the model to instantiate. Defaults to "stella".
+        **kwargs: Device, batching and quantization options passed to the embedder
+            (device, batch_size, max_seq_length, max_batch_tokens, quantize, num_threads)
+
+    Returns:
+        BaseEmbedder: The initialized embedding model
+
+    Raises:
+        KeyError: If the requested model name is not found in the supported models
+    """
+    return embedders[model_name](**kwargs)
@@ -0,0 +1,27 @@
+from sentence_transformers import SentenceTransformer
+from .base_embedder import BaseEmbedder
+
+
+class MiniLM(BaseEmbedder):
+    """all-MiniLM-L6-v2 text embedding model.
+
+    A 22M parameter, 6-layer embedding model and the fastest of the available
+    embedders on CPU. Queries and documents are embedded the same way.
+
+    Attributes:
+        model_id (str): Hugging Face identifier of the model weights
+        model (SentenceTransformer): The underlying transformer model
+    """
+    model_id = "sentence-transformers/all-MiniLM-L6-v2"
+
+    def build_model(self) -> SentenceTransformer:
+        """Load and configure the MiniLM model on the selected device.
+
+        Returns:
+            The loaded model
+        """
+        return SentenceTransformer(
+            self.model_id,
+            device=self.device,
+            backend="onnx" if self.quantize == "onnx" else "torch"
+        )
@@ -0,0 +1,71 @@
+import re
+import math
+from collections import Counter
+from typing import List
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens for lexical matching.
+
+    Numbers and acronyms are kept as tokens, since exact figures and programme names
+    are often what a lexical match is needed for.
+
+    Args:
+        text: The input text
+
+    Returns:
+        The list of tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25:
+    """Okapi BM25 scorer over a small in-memory corpus.
+
+    Attributes:
+        k1 (float): Term frequency saturation parameter
+        b (float): Document length normalization parameter
+
+    Args:
+        corpus (List[List[str]]): Tokenized documents to score
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Length normalization. Defaults to 0.75.
+    """
+
+    def __init__(self, corpus: List[List[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in corpus]
+        self.doc_lens = [len(doc) for doc in corpus]
+        self.avg_doc_len = sum(self.doc_lens) / len(corpus) if corpus else 0.0
+
+        doc_freqs = Counter(term for tf in self.term_freqs for term in tf)
+        n_docs = len(corpus)
+        self.idf = {
+            term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def scores(self, query: List[str]) -> List[float]:
+        """Score every document of the corpus against the query.
+
+        Args:
+            query: The tokenized query
+
+        Returns:
+            The BM25 score of each document, in corpus order
+        """
+        query_terms = [term for term in set(query) if term in self.idf]
+        scores = []
+        for tf, doc_len in zip(self.term_freqs, self.doc_lens):
+            norm = self.k1 * (1 - self.b + self.b * doc_len / (self.avg_doc_len or 1))
+            score = 0.0
+            for term in query_terms:
+                freq = tf.get(term, 0)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
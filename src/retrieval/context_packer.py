@@ -0,0 +1,238 @@
+import re
+from typing import List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, ToolMessage
+from langgraph.graph import MessagesState
+from retrieval.bm25 import BM25, tokenize
+from utils import count_tokens
+
+
+def context_budget(
+        model: Optional[BaseChatModel],
+        max_tokens: int,
+        reserve_tokens: int,
+        max_new_tokens: Optional[int] = None
+) -> int:
+    """Derive the context token budget from the active model.
+
+    For local HuggingFace pipelines the budget is the model's context window minus the
+    generation length and a reserve for the prompt template and question, capped at
+    max_tokens. For other models max_tokens is used as is.
+
+    Args:
+        model: The chat model the packed context is sent to
+        max_tokens: Upper bound on the budget
+        reserve_tokens: Tokens reserved for the prompt template and question
+        max_new_tokens: Generation budget of the agent reading the context, e.g. the
+            summarizer's. Defaults to the max_new_tokens of the pipeline.
+
+    Returns:
+        The number of context tokens that can be sent to the model
+    """
+    pipeline = getattr(getattr(model, "llm", None), "pipeline", None)
+    config = getattr(getattr(pipeline, "model", None), "config", None)
+    window = getattr(config, "max_position_embeddings", None)
+    if not window:
+        return max_tokens
+
+    if max_new_tokens is None:
+        max_new_tokens = getattr(pipeline, "_forward_params", {}).get("max_new_tokens", 0)
+    return max(0, min(max_tokens, window - max_new_tokens - reserve_tokens))
+
+
+class ContextPacker:
+    """Relevance-ranked context packing between the tools and the summarizer.
+
+    The tool output of the current turn is split into chunks of roughly chunk_tokens
+    tokens, each chunk is scored against the user question with BM25 (fused with
+    embedding similarity when an embedding function is given), and the best chunks
+    are greedily packed up to a token budget derived from the active model. Packed
+    chunks are kept in their original order under their original page headings, and
+    the tool messages are replaced in place.
+
+    Attributes:
+        max_tokens (int): Token budget of the packed context
+        chunk_tokens (int): Target size of a chunk in tokens
+        embedding_function (Embeddings): Optional embedder used to score chunks
+
+    Args:
+        model (BaseChatModel, optional): Model the context is sent to, used to derive the budget.
+        embedding_function (Embeddings, optional): Embedder used alongside BM25. Defaults to None.
+        max_tokens (int, optional): Upper bound on the token budget. Defaults to 6000.
+        chunk_tokens (int, optional): Target chunk size in tokens. Defaults to 256.
+        reserve_tokens (int, optional): Tokens reserved for the prompt. Defaults to 1024.
+        max_new_tokens (int, optional): Generation budget of the agent reading the context.
+            Defaults to the max_new_tokens of the pipeline.
+    """
+
+    def __init__(
+            self,
+            model: Optional[BaseChatModel] = None,
+            embedding_function: Optional[Embeddings] = None,
+            max_tokens: int = 6000,
+            chunk_tokens: int = 256,
+            reserve_tokens: int = 1024,
+            max_new_tokens: Optional[int] = None
+    ):
+        self.max_tokens = context_budget(model, max_tokens, reserve_tokens, max_new_tokens)
+        self.chunk_tokens = chunk_tokens
+        self.embedding_function = embedding_function
+
+    def chunk(self, text: str) -> List[Tuple[str, str, int]]:
+        """Split a tool output into chunks of roughly chunk_tokens tokens.
+
+        Chunks never cross a page heading (a line starting with "#"), so that every
+        chunk can be attributed to its page.
+
+        Args:
+            text: The tool output
+
+        Returns:
+            (heading, chunk text, token count) triples in document order
+        """
+        pieces = []
+        heading = ""
+        for paragraph in text.split("\n\n"):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if paragraph.startswith("#"):
+                heading = paragraph
+                continue
+            tokens = count_tokens(paragraph)
+            if tokens <= self.chunk_tokens:
+                pieces.append((heading, paragraph, tokens))
+            else:
+                for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+                    pieces.append((heading, sentence, count_tokens(sentence)))
+
+        chunks = []
+        for heading, piece, tokens in pieces:
+            if chunks and chunks[-1][0] == heading and chunks[-1][2] + tokens <= self.chunk_tokens:
+                last_heading, last_text, last_tokens = chunks[-1]
+                chunks[-1] = (last_heading, last_text + "\n\n" + piece, last_tokens + tokens)
+            else:
+                chunks.append((heading, piece, tokens))
+        return chunks
+
+    def score(self, question: str, texts: List[str]) -> List[float]:
+        """Score chunks against the question.
+
+        BM25 scores are used as is when no embedding function is configured. Otherwise
+        the BM25 and embedding-similarity rankings are fused with reciprocal rank fusion.
+
+        Args:
+            question: The user question
+            texts: The chunk texts
+
+        Returns:
+            The relevance score of each chunk
+        """
+        bm25_scores = BM25([tokenize(text) for text in texts]).scores(tokenize(question))
+        if self.embedding_function is None:
+            return bm25_scores
+
+        query_vector = self.embedding_function.embed_query(question)
+        doc_vectors = self.embedding_function.embed_documents(texts)
+        similarities = [
+            sum(q * d for q, d in zip(query_vector, vector))
+            / ((sum(q * q for q in query_vector) * sum(d * d for d in vector)) ** 0.5 or 1.0)
+            for vector in doc_vectors
+        ]
+
+        fused = [0.0] * len(texts)
+        for scores in (bm25_scores, similarities):
+            ranking = sorted(range(len(texts)), key=lambda i: scores[i], reverse=True)
+            for rank, i in enumerate(ranking):
+                fused[i] += 1.0 / (60 + rank + 1)
+        return fused
+
+    def pack(self, question: str, outputs: List[str]) -> List[str]:
+        """Pack several tool outputs into one shared token budget.
+
+        Args:
+            question: The user question
+            outputs: The tool outputs of the current turn
+
+        Returns:
+            The packed version of each tool output, in the same order
+        """
+        chunks = [
+            (i, heading, text, tokens)
+            for i, output in enumerate(outputs)
+            for heading, text, tokens in self.chunk(output)
+        ]
+        if not chunks:
+            return outputs
+
+        scores = self.score(question, [text for _, _, text, _ in chunks])
+        budget = self.max_tokens
+        selected = set()
+        for j in sorted(range(len(chunks)), key=lambda j: scores[j], reverse=True):
+            tokens = chunks[j][3] + count_tokens(chunks[j][1])
+            if tokens <= budget:
+                selected.add(j)
+                budget -= tokens
+
+        packed = [[] for _ in outputs]
+        last_heading = [None for _ in outputs]
+        for j, (i, heading, text, _) in enumerate(chunks):
+            if j not in selected:
+                continue
+            if heading and heading != last_heading[i]:
+                packed[i].append(heading)
+                last_heading[i] = heading
+            packed[i].append(text)
+        return ["\n\n".join(parts) for parts in packed]
+
+    def invoke(self, state: MessagesState) -> dict:
+        """Pack the tool messages of the current turn if they exceed the token budget.
+
+        Args:
+            state: Current conversation state ending with the tool messages
+
+        Returns:
+            dict: Replacement tool messages (with the same ids), or no messages if the
+            tool output already fits the budget
+        """
+        messages = state["messages"]
+        tool_messages = []
+        for item in reversed(messages):
+            if not isinstance(item, ToolMessage):
+                break
+            tool_messages.insert(0, item)
+
+        outputs = [str(message.content) for message in tool_messages]
+        if sum(count_tokens(output) for output in outputs) <= self.max_tokens:
+            return {"messages": []}
+
+        question = ""
+        for item in reversed(messages):
+            if isinstance(item, HumanMessage):
+                question = item.content
+                break
+
+        packed = self.pack(question, outputs)
+        return {
+            "messages": [
+                ToolMessage(
+                    content=content,
+                    id=message.id,
+                    tool_call_id=message.tool_call_id,
+                    name=message.name
+                )
+                for message, content in zip(tool_messages, packed)
+            ]
+        }
+
+    def __call__(self, state: MessagesState) -> dict:
+        """Make the packer callable, delegating to invoke method.
+
+        Args:
+            state (MessagesState): Current state containing message history and context
+
+        Returns:
+            dict: Replacement tool messages
+        """
+        return self.invoke(state)
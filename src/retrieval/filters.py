@@ -0,0 +1,165 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+
+
+def _timestamp(date: str, end_of_day: bool = False) -> int:
+    """Convert an ISO date or datetime string to a Unix timestamp.
+
+    Args:
+        date: ISO date ("2025-05-01") or datetime ("2025-05-01T12:00:00")
+        end_of_day: Use the end of the day for a date without a time
+
+    Returns:
+        The Unix timestamp in seconds
+    """
+    parsed = datetime.fromisoformat(date)
+    if end_of_day and re.fullmatch(r"\d{4}-\d{2}-\d{2}", date.strip()):
+        parsed += timedelta(days=1, microseconds=-1)
+    return int(parsed.timestamp())
+
+
+def build_filter(
+        source: Optional[str] = None,
+        page_start: Optional[int] = None,
+        page_end: Optional[int] = None,
+        uploaded_after: Optional[str] = None,
+        uploaded_before: Optional[str] = None
+) -> Optional[dict]:
+    """Build a Chroma metadata filter restricting the search to part of a collection.
+
+    The filter uses the subset of the Chroma "where" syntax supported by the BM25
+    inverted index as well, so it can be pushed down into both searches.
+
+    Args:
+        source: File name of the document to search. Optional.
+        page_start: First page (1-based) of the page range to search. Optional.
+        page_end: Last page (1-based) of the page range to search. Optional.
+        uploaded_after: Only search documents uploaded on or after this ISO date. Optional.
+        uploaded_before: Only search documents uploaded on or before this ISO date. Optional.
+
+    Returns:
+        The filter, or None if no restriction is given
+    """
+    conditions = []
+    if source:
+        conditions.append({"file_name": {"$eq": source}})
+    # Chunks store 0-based page spans, and a chunk matches if its span overlaps the range
+    if page_start is not None:
+        conditions.append({"page_end": {"$gte": page_start - 1}})
+    if page_end is not None:
+        conditions.append({"page_start": {"$lte": page_end - 1}})
+    if uploaded_after:
+        conditions.append({"uploaded_at": {"$gte": _timestamp(uploaded_after)}})
+    if uploaded_before:
+        conditions.append({"uploaded_at": {"$lte": _timestamp(uploaded_before, end_of_day=True)}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+SQL_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+
+def filter_to_sql(where: dict, column: str = "metadata") -> Tuple[str, List]:
+    """Translate a Chroma metadata filter into a SQLite condition on a JSON column.
+
+    Supports $and, $or, $in, $nin and the comparison operators, with either
+    {"key": value} or {"key": {"$op": value}} conditions.
+
+    Args:
+        where: The Chroma metadata filter
+        column: Name of the JSON metadata column. Defaults to "metadata".
+
+    Returns:
+        The SQL condition and its parameters
+    """
+    clauses = []
+    params = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [filter_to_sql(sub, column) for sub in condition]
+            clauses.append("(" + (" AND " if key == "$and" else " OR ").join(sql for sql, _ in parts) + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        field = f"json_extract({column}, ?)"
+        for op, value in condition.items():
+            if op in ("$in", "$nin"):
+                negate = "NOT " if op == "$nin" else ""
+                clauses.append(f"{field} {negate}IN ({','.join('?' * len(value))})")
+                params.extend([f"$.{key}", *value])
+            elif op in SQL_OPERATORS:
+                clauses.append(f"{field} {SQL_OPERATORS[op]} ?")
+                params.extend([f"$.{key}", value])
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+    return " AND ".join(clauses) or "1", params
+
+
+def _merge_texts(first: str, second: str) -> str:
+    """Join the texts of two consecutive chunks, dropping the text they share."""
+    probe = second[:64]
+    pos = first.find(probe) if probe else -1
+    while pos != -1:
+        if second.startswith(first[pos:]):
+            return first[:pos] + second
+        pos = first.find(probe, pos + 1)
+    return first + "\n\n" + second
+
+
+def merge_contiguous(chunks: List[Document]) -> List[Document]:
+    """Merge retrieved chunks that are contiguous in the same document.
+
+    Consecutive chunks of a document overlap, so retrieving several of them repeats
+    the shared text. Chunks with consecutive chunk indexes in the same document are
+    merged into one result, without the repeated text and with the union of their
+    page spans. Results keep the order of their best-ranked chunk.
+
+    Args:
+        chunks: Retrieved chunks, best first
+
+    Returns:
+        The merged results, best first
+    """
+    groups: Dict[str, List[Tuple[int, Document]]] = {}
+    for rank, chunk in enumerate(chunks):
+        if "chunk_index" not in chunk.metadata:
+            groups[f"#{rank}"] = [(rank, chunk)]
+        else:
+            groups.setdefault(str(chunk.metadata.get("source")), []).append((rank, chunk))
+
+    merged = []
+    for group in groups.values():
+        group.sort(key=lambda item: item[1].metadata.get("chunk_index", 0))
+        runs = [[group[0]]]
+        for rank, chunk in group[1:]:
+            last_chunk = runs[-1][-1][1]
+            if chunk.metadata["chunk_index"] == last_chunk.metadata["chunk_index"] + 1:
+                runs[-1].append((rank, chunk))
+            else:
+                runs.append([(rank, chunk)])
+
+        for run in runs:
+            best_rank = min(rank for rank, _ in run)
+            first = run[0][1]
+            if len(run) == 1:
+                merged.append((best_rank, first))
+                continue
+            text = first.page_content
+            for _, chunk in run[1:]:
+                text = _merge_texts(text, chunk.page_content)
+            page_start = min(chunk.metadata.get("page_start", chunk.metadata.get("page", 0)) for _, chunk in run)
+            page_end = max(chunk.metadata.get("page_end", chunk.metadata.get("page", 0)) for _, chunk in run)
+            merged.append((best_rank, Document(
+                page_content=text,
+                metadata={**first.metadata, "page": page_start, "page_start": page_start, "page_end": page_end}
+            )))
+
+    return [chunk for _, chunk in sorted(merged, key=lambda item: item[0])]
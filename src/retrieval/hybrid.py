@@ -0,0 +1,136 @@
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+from retrieval.inverted_index import InvertedIndex
+
+
+logger = logging.getLogger(__name__)
+
+# Shared by all hybrid retrievers. A search that overruns its latency budget keeps
+# running here in the background while the query is answered without it.
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-retriever")
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], rrf_k: int = 60) -> List[Document]:
+    """Fuse several rankings of chunks with reciprocal rank fusion.
+
+    Chunks are identified by their ID, or by their content if they have none.
+
+    Args:
+        rankings: Rankings of chunks, best first
+        rrf_k: Rank offset damping the weight of the top ranks. Defaults to 60.
+
+    Returns:
+        The fused ranking, best first, with the fused score in the "rrf_score" metadata
+    """
+    scores = {}
+    chunks = {}
+    for ranking in rankings:
+        for rank, chunk in enumerate(ranking):
+            key = chunk.id or chunk.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            chunks.setdefault(key, chunk)
+
+    fused = []
+    for key in sorted(scores, key=scores.get, reverse=True):
+        chunk = chunks[key]
+        fused.append(Document(
+            id=chunk.id,
+            page_content=chunk.page_content,
+            metadata={**chunk.metadata, "rrf_score": scores[key]}
+        ))
+    return fused
+
+
+class HybridRetriever(BaseRetriever):
+    """Hybrid lexical and dense retriever fused with reciprocal rank fusion.
+
+    The query runs concurrently against the vector store (dense similarity) and the
+    persistent BM25 inverted index (exact terms such as figures, ministry names and
+    programme acronyms). Each returns its fetch_k best chunks, and the two rankings
+    are fused with RRF into the k final chunks.
+
+    The query is embedded before the budget starts, while the BM25 search runs, so that
+    a slow embedder (cold start, busy GPU) does not make the dense search miss the
+    budget. If a search has not finished within the latency budget, the query is
+    answered with the rankings available at that point (waiting for the first one if
+    none is).
+
+    A metadata filter passed at query time (see retrieval.filters.build_filter) is
+    pushed down into both searches.
+
+    Attributes:
+        vectorstore (VectorStore): The dense vector store
+        index (InvertedIndex): The BM25 index holding the same chunks
+        k (int): Number of chunks returned
+        fetch_k (int): Number of chunks fetched from each search before fusion
+        rrf_k (int): Rank offset of the reciprocal rank fusion
+        latency_budget (float): Seconds to wait for both index searches once the query is
+            embedded, None to always wait
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: VectorStore
+    index: InvertedIndex
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    latency_budget: Optional[float] = 1.0
+
+    def _get_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: CallbackManagerForRetrieverRun,
+            filter: Optional[dict] = None
+    ) -> List[Document]:
+        """Retrieve the chunks most relevant to the query.
+
+        Args:
+            query: The search query
+            run_manager: Callback manager of the retriever run
+            filter: Chroma metadata filter the chunks must match. Optional.
+
+        Returns:
+            The k best chunks after fusion
+        """
+        start = time.perf_counter()
+        futures = {
+            "bm25": _executor.submit(
+                lambda: [chunk for chunk, _ in self.index.search(query, k=self.fetch_k, filter=filter)]
+            )
+        }
+        embeddings = self.vectorstore.embeddings
+        if embeddings is None:
+            futures["dense"] = _executor.submit(self.vectorstore.similarity_search, query, k=self.fetch_k, filter=filter)
+        else:
+            try:
+                vector = embeddings.embed_query(query)
+            except Exception as e:
+                logger.warning("Hybrid retrieval: query embedding failed: %s", e)
+            else:
+                futures["dense"] = _executor.submit(
+                    self.vectorstore.similarity_search_by_vector, vector, k=self.fetch_k, filter=filter
+                )
+        done, _ = wait(futures.values(), timeout=self.latency_budget)
+        if not done:
+            done, _ = wait(futures.values(), return_when=FIRST_COMPLETED)
+
+        rankings = []
+        for name, future in futures.items():
+            if future not in done:
+                logger.warning("Hybrid retrieval: %s search exceeded the %ss latency budget", name, self.latency_budget)
+            elif future.exception() is not None:
+                logger.warning("Hybrid retrieval: %s search failed: %s", name, future.exception())
+            else:
+                rankings.append(future.result())
+
+        chunks = reciprocal_rank_fusion(rankings, rrf_k=self.rrf_k)[:self.k]
+        logger.debug("Hybrid retrieval: %d chunks in %.3fs", len(chunks), time.perf_counter() - start)
+        return chunks
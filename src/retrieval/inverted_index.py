@@ -0,0 +1,191 @@
+import os
+import json
+import math
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from retrieval.bm25 import tokenize
+from retrieval.filters import filter_to_sql
+
+
+class InvertedIndex:
+    """Persistent inverted index scoring chunks with Okapi BM25.
+
+    Postings (term, chunk id, term frequency) and the chunks themselves are stored in a
+    local SQLite database, so the index survives restarts and a query only reads the
+    postings of its own terms. The index is kept in sync with the vector store by
+    ChromaVectorStore, which adds and deletes chunks under the same IDs in both.
+
+    Attributes:
+        path (str): Path of the SQLite database file
+        k1 (float): Term frequency saturation parameter
+        b (float): Document length normalization parameter
+
+    Args:
+        path (str, optional): Database path. Defaults to "./chromadb/bm25_index.db".
+        k1 (float, optional): Term frequency saturation. Defaults to 1.5.
+        b (float, optional): Length normalization. Defaults to 0.75.
+    """
+
+    def __init__(self, path: str = "./chromadb/bm25_index.db", k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._build_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the index database, committing and closing it on exit."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _build_db(self) -> None:
+        """Create the index database and tables if they do not exist."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS chunks (
+                    id TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL,
+                    length INTEGER NOT NULL
+                )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS postings (
+                    term TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    tf INTEGER NOT NULL,
+                    PRIMARY KEY (term, chunk_id)
+                ) WITHOUT ROWID"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS postings_chunk_id ON postings (chunk_id)")
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[dict]] = None) -> None:
+        """Index chunks, replacing any chunk already indexed under the same ID.
+
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+            metadatas: Chunk metadata. Optional.
+        """
+        metadatas = metadatas or [{} for _ in ids]
+        rows = []
+        postings = []
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            terms = Counter(tokenize(text))
+            rows.append((chunk_id, text, json.dumps(metadata), sum(terms.values())))
+            postings.extend((term, chunk_id, tf) for term, tf in terms.items())
+
+        with self._lock, self._connect() as conn:
+            conn.executemany("DELETE FROM postings WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (id, content, metadata, length) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.executemany("INSERT INTO postings (term, chunk_id, tf) VALUES (?, ?, ?)", postings)
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]) -> None:
+        """Replace the metadata of indexed chunks, keeping their text and postings.
+
+        Args:
+            ids: Chunk IDs
+            metadatas: New metadata of the chunks
+        """
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas)]
+            )
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove chunks from the index.
+
+        Args:
+            ids: IDs of the chunks to remove
+        """
+        with self._lock, self._connect() as conn:
+            conn.executemany("DELETE FROM postings WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+            conn.executemany("DELETE FROM chunks WHERE id = ?", [(chunk_id,) for chunk_id in ids])
+
+    def get(self, ids: List[str], filter: Optional[dict] = None) -> List[Document]:
+        """Get indexed chunks by ID.
+
+        Args:
+            ids: IDs of the chunks
+            filter: Chroma-style metadata filter the chunks must match. Optional.
+
+        Returns:
+            The chunks found (and matching the filter), in the order of ids
+        """
+        filter_sql, filter_params = filter_to_sql(filter) if filter else ("1", [])
+        chunks = {}
+        with self._connect() as conn:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT id, content, metadata FROM chunks WHERE id IN ({','.join('?' * len(batch))}) AND {filter_sql}",
+                    batch + filter_params
+                ).fetchall()
+                for chunk_id, content, metadata in rows:
+                    chunks[chunk_id] = Document(id=chunk_id, page_content=content, metadata=json.loads(metadata))
+        return [chunks[chunk_id] for chunk_id in ids if chunk_id in chunks]
+
+    def count(self) -> int:
+        """Get the number of indexed chunks."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query: str, k: int = 20, filter: Optional[dict] = None) -> List[Tuple[Document, float]]:
+        """Find the chunks with the best BM25 score for the query.
+
+        Args:
+            query: The search query
+            k: Number of chunks to return. Defaults to 20.
+            filter: Chroma-style metadata filter the chunks must match, see
+                retrieval.filters.filter_to_sql. Optional.
+
+        Returns:
+            (chunk, score) pairs sorted by decreasing score. Chunks carry their ID.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        placeholders = ",".join("?" * len(terms))
+        filter_sql, filter_params = filter_to_sql(filter, column="c.metadata") if filter else ("1", [])
+        with self._connect() as conn:
+            n_chunks, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM chunks").fetchone()
+            if not n_chunks:
+                return []
+            doc_freqs = dict(conn.execute(
+                f"SELECT term, COUNT(*) FROM postings WHERE term IN ({placeholders}) GROUP BY term", terms
+            ).fetchall())
+            postings = conn.execute(
+                f"""SELECT p.term, p.chunk_id, p.tf, c.length FROM postings p
+                JOIN chunks c ON c.id = p.chunk_id WHERE p.term IN ({placeholders}) AND {filter_sql}""",
+                terms + filter_params
+            ).fetchall()
+
+            # Same scoring as retrieval.bm25.BM25, with corpus statistics read from the index
+            avg_length = total_length / n_chunks or 1
+            idf = {
+                term: math.log(1 + (n_chunks - df + 0.5) / (df + 0.5))
+                for term, df in doc_freqs.items()
+            }
+            scores = Counter()
+            for term, chunk_id, tf, length in postings:
+                norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                scores[chunk_id] += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+
+        top = scores.most_common(k)
+        chunks = self.get([chunk_id for chunk_id, _ in top])
+        return [(chunk, score) for chunk, (_, score) in zip(chunks, top)]
@@ -0,0 +1,166 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+from utils import count_tokens
+
+
+class Reranker:
+    """Cross-encoder reranking of retrieved chunks under a token budget.
+
+    Candidate chunks are scored against the query with a cross-encoder, sorted by
+    score, and greedily kept while they fit in max_tokens tokens, so the retriever
+    tool returns the most relevant chunks at a bounded summarizer prefill cost.
+
+    Scores are cached per (query, chunk id), so only new candidates are scored when a
+    query is repeated or refined. The latency of every call is recorded.
+
+    Attributes:
+        scorer: Cross-encoder exposing score(query, texts), e.g. CrossEncoderScorer
+        max_tokens (int): Token budget of the kept chunks
+        max_entries (int): Maximum number of cached scores
+
+    Args:
+        scorer (optional): Cross-encoder. Defaults to a CPU CrossEncoderScorer, loaded on first use.
+        max_tokens (int, optional): Token budget of the kept chunks. Defaults to 2048.
+        max_entries (int, optional): Maximum number of cached scores. Defaults to 10000.
+    """
+
+    def __init__(self, scorer=None, max_tokens: int = 2048, max_entries: int = 10000):
+        self.scorer = scorer
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._scores = OrderedDict()
+        self._stats = {"calls": 0, "hits": 0, "misses": 0, "latency_total": 0.0, "latency_max": 0.0, "last_latency": 0.0}
+
+    def _get_scorer(self):
+        """Get the cross-encoder, loading the default one on first use."""
+        with self._lock:
+            if self.scorer is None:
+                from models.reranker.cross_encoder import CrossEncoderScorer
+                self.scorer = CrossEncoderScorer()
+            return self.scorer
+
+    @staticmethod
+    def _key(query: str, chunk: Document) -> tuple:
+        """Build the cache key of a chunk scored against a query."""
+        chunk_id = chunk.id or hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+        return query, chunk_id
+
+    def score(self, query: str, chunks: List[Document]) -> List[float]:
+        """Score chunks against a query, using cached scores where available.
+
+        Args:
+            query: The search query
+            chunks: The candidate chunks
+
+        Returns:
+            The relevance score of each chunk
+        """
+        keys = [self._key(query, chunk) for chunk in chunks]
+        scores = {}
+        with self._lock:
+            for key in keys:
+                if key in self._scores:
+                    self._scores.move_to_end(key)
+                    scores[key] = self._scores[key]
+            self._stats["hits"] += len(scores)
+
+        missing = {key: chunk.page_content for key, chunk in zip(keys, chunks) if key not in scores}
+        if missing:
+            computed = dict(zip(missing, self._get_scorer().score(query, list(missing.values()))))
+            scores.update(computed)
+            with self._lock:
+                self._stats["misses"] += len(computed)
+                self._scores.update(computed)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+
+        return [scores[key] for key in keys]
+
+    def rerank(self, query: str, chunks: List[Document]) -> List[Document]:
+        """Rerank chunks and keep the best ones that fit the token budget.
+
+        Args:
+            query: The search query
+            chunks: The candidate chunks
+
+        Returns:
+            The kept chunks, best first, with their score in the "rerank_score" metadata
+        """
+        start = time.perf_counter()
+        scores = self.score(query, chunks)
+
+        kept = []
+        budget = self.max_tokens
+        for i in sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True):
+            tokens = count_tokens(chunks[i].page_content)
+            if tokens <= budget:
+                chunk = chunks[i]
+                kept.append(Document(
+                    id=chunk.id,
+                    page_content=chunk.page_content,
+                    metadata={**chunk.metadata, "rerank_score": scores[i]}
+                ))
+                budget -= tokens
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["latency_total"] += latency
+            self._stats["latency_max"] = max(self._stats["latency_max"], latency)
+            self._stats["last_latency"] = latency
+        return kept
+
+    def stats(self) -> dict:
+        """Get the reranker statistics.
+
+        Returns:
+            dict: Number of calls, cache hits and misses, hit rate, and total, maximum,
+            average and last latency in seconds
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["latency_avg"] = stats["latency_total"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+class RerankingRetriever(BaseRetriever):
+    """Retriever over-fetching candidates from a base retriever and reranking them.
+
+    Attributes:
+        base_retriever (BaseRetriever): Retriever returning the candidate chunks
+        reranker (Reranker): Reranker keeping the best candidates within its token budget
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    base_retriever: BaseRetriever
+    reranker: Reranker
+
+    def _get_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: CallbackManagerForRetrieverRun,
+            **kwargs
+    ) -> List[Document]:
+        """Retrieve candidates and keep the best ones within the token budget.
+
+        Args:
+            query: The search query
+            run_manager: Callback manager of the retriever run
+            **kwargs: Search arguments passed to the base retriever (e.g. filter)
+
+        Returns:
+            The reranked chunks, best first
+        """
+        candidates = self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()}, **kwargs)
+        return self.reranker.rerank(query, candidates)
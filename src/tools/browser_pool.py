@@ -0,0 +1,247 @@
+import time
+import atexit
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+
+def new_chrome_driver() -> webdriver.Chrome:
+    """Start a new headless Chrome driver.
+
+    Returns:
+        The started Chrome driver
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """Fixed-size pool of warm headless browsers shared across tool invocations.
+
+    Drivers are started lazily up to the pool size and kept warm between leases, so
+    only the first few page renders pay for a browser launch. A driver is recycled
+    (quit and replaced on the next lease) after it has served a number of pages or
+    when it crashes. All drivers are quit when the application exits.
+
+    Attributes:
+        size (int): Maximum number of drivers alive at once
+        max_pages_per_driver (int): Number of leases after which a driver is recycled
+        lease_timeout (float): Default time in seconds to wait for a free driver
+        driver_factory (Callable): Function starting a new driver
+
+    Args:
+        size (int, optional): Maximum number of drivers. Defaults to 2.
+        max_pages_per_driver (int, optional): Leases before recycling a driver. Defaults to 50.
+        lease_timeout (float, optional): Default lease wait in seconds. Defaults to 30.
+        driver_factory (Callable, optional): Driver constructor. Defaults to new_chrome_driver.
+    """
+
+    def __init__(
+            self,
+            size: int = 2,
+            max_pages_per_driver: int = 50,
+            lease_timeout: float = 30.0,
+            driver_factory: Optional[Callable[[], webdriver.Remote]] = None
+    ):
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.lease_timeout = lease_timeout
+        self.driver_factory = driver_factory or new_chrome_driver
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (driver, pages served) pairs ready to be leased
+        self._alive = 0
+        self._closed = False
+        self._stats = {
+            "leases": 0,
+            "lease_timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "drivers_started": 0,
+            "recycles": 0,
+            "crashes": 0
+        }
+
+    def _acquire(self, timeout: float) -> tuple:
+        """Take an idle driver, or start one if the pool is not full."""
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is shut down.")
+                if self._idle:
+                    entry = self._idle.popleft()
+                    break
+                if self._alive < self.size:
+                    self._alive += 1
+                    entry = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["lease_timeouts"] += 1
+                    raise TimeoutError(f"No browser available within {timeout:.1f}s.")
+                self._cond.wait(remaining)
+
+            wait_time = time.monotonic() - start
+            self._stats["leases"] += 1
+            self._stats["wait_time_total"] += wait_time
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        if entry is None:
+            try:
+                entry = (self.driver_factory(), 0)
+            except Exception:
+                with self._cond:
+                    self._alive -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["drivers_started"] += 1
+        return entry
+
+    def _release(self, driver: webdriver.Remote, pages: int, crashed: bool) -> None:
+        """Return a driver to the pool, recycling it if it crashed or is worn out."""
+        recycle = crashed or pages >= self.max_pages_per_driver
+        with self._cond:
+            if not recycle and not self._closed:
+                self._idle.append((driver, pages))
+                self._cond.notify()
+                return
+            self._alive -= 1
+            self._stats["recycles"] += int(recycle)
+            self._stats["crashes"] += int(crashed)
+            self._cond.notify()
+
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[webdriver.Remote]:
+        """Lease a driver from the pool for the duration of a with-block.
+
+        A WebDriverException other than a page load timeout raised inside the block is
+        treated as a crash and the driver is recycled.
+
+        Args:
+            timeout: Seconds to wait for a free driver. Defaults to lease_timeout.
+
+        Yields:
+            A warm browser driver
+
+        Raises:
+            TimeoutError: If no driver becomes available within the timeout
+        """
+        driver, pages = self._acquire(self.lease_timeout if timeout is None else timeout)
+        crashed = False
+        try:
+            yield driver
+        except TimeoutException:
+            raise
+        except WebDriverException:
+            crashed = True
+            raise
+        finally:
+            self._release(driver, pages + 1, crashed)
+
+    def warm_up(self) -> None:
+        """Start drivers until the pool is full, so the first leases do not wait on a launch."""
+        while True:
+            with self._cond:
+                if self._closed or self._alive >= self.size:
+                    return
+                self._alive += 1
+            try:
+                driver = self.driver_factory()
+            except Exception:
+                with self._cond:
+                    self._alive -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats["drivers_started"] += 1
+                self._idle.append((driver, 0))
+                self._cond.notify()
+
+    def stats(self) -> dict:
+        """Get the pool usage statistics.
+
+        Returns:
+            dict: Lease count, total/max/average wait time, drivers started, recycles,
+            crashes, lease timeouts and the current number of alive and idle drivers
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            stats["wait_time_avg"] = stats["wait_time_total"] / stats["leases"] if stats["leases"] else 0.0
+            stats["alive"] = self._alive
+            stats["idle"] = len(self._idle)
+        return stats
+
+    def shutdown(self) -> None:
+        """Quit all idle drivers and refuse new leases.
+
+        Drivers still leased out are quit when they are returned.
+        """
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._alive -= len(idle)
+            self._cond.notify_all()
+
+        for driver, _ in idle:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get the browser pool shared by the search tools, creating it on first use.
+
+    The pool is shut down automatically when the interpreter exits.
+
+    Returns:
+        BrowserPool: The shared browser pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+    return _pool
+
+
+def pooled_render(url: str, timeout: float) -> str:
+    """Load a page with a browser leased from the shared pool and return its HTML.
+
+    If the page does not finish loading in time, whatever has been rendered so far
+    is returned.
+
+    Args:
+        url: URL of the page to render
+        timeout: Overall time budget in seconds, including the wait for a free browser
+
+    Returns:
+        The rendered page source
+    """
+    start = time.monotonic()
+    with get_browser_pool().lease(timeout=timeout) as driver:
+        driver.set_page_load_timeout(max(1.0, timeout - (time.monotonic() - start)))
+        try:
+            driver.get(url)
+        except TimeoutException:
+            driver.execute_script("window.stop();")
+        return driver.page_source
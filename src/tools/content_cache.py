@@ -0,0 +1,216 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that only track the visitor and never change the page content.
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref_src"}
+TRACKING_PREFIXES = ("utm_",)
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so that trivially different links to the same page share a cache key.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking query
+    parameters and trailing slashes, and sorts the remaining query parameters.
+
+    Args:
+        url: The URL to normalize
+
+    Returns:
+        The normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    """A page served from the ContentCache.
+
+    Attributes:
+        url (str): The normalized URL of the page
+        title (str): Title of the page
+        text (str): Extracted text of the page
+        fetched_at (float): Unix time at which the page was fetched
+    """
+    url: str
+    title: str
+    text: str
+    fetched_at: float
+
+
+class ContentCache:
+    """Persistent URL to extracted-text cache shared by the search tools.
+
+    Entries are stored in a local SQLite database keyed by normalized URL. Each entry
+    belongs to a kind ("web" or "news") with its own time-to-live, and the total size
+    of the stored text is kept under a byte budget by evicting the least recently
+    used entries.
+
+    Attributes:
+        path (str): Path of the SQLite database file
+        ttls (dict): Time-to-live in seconds per kind of content
+        max_bytes (int): Byte budget for the stored text
+
+    Args:
+        path (str, optional): Database path. Defaults to "./cache/content_cache.db".
+        ttls (dict, optional): TTL per kind. Defaults to 7 days for web, 6 hours for news.
+        max_bytes (int, optional): Byte budget. Defaults to 256 MB.
+    """
+
+    def __init__(
+            self,
+            path: str = "./cache/content_cache.db",
+            ttls: Optional[Dict[str, float]] = None,
+            max_bytes: int = 256 * 1024 * 1024
+    ):
+        self.path = path
+        self.ttls = ttls or {"web": 7 * 24 * 3600, "news": 6 * 3600}
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        self._build_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the cache database, committing and closing it on exit."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _build_db(self) -> None:
+        """Create the cache database and table if they do not exist."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+
+    def get(self, url: str, kind: str = "web") -> Optional[CachedPage]:
+        """Look up a page in the cache.
+
+        Args:
+            url: URL of the page
+            kind: Kind of content, used to select the TTL. Defaults to "web".
+
+        Returns:
+            The cached page, or None if it is missing or expired
+        """
+        key = normalize_url(url)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT title, text, fetched_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            title, text, fetched_at = row
+            if now - fetched_at > self.ttls.get(kind, self.ttls["web"]):
+                conn.execute("DELETE FROM pages WHERE url = ?", (key,))
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return None
+
+            conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, key))
+            self._stats["hits"] += 1
+        return CachedPage(url=key, title=title, text=text, fetched_at=fetched_at)
+
+    def put(self, url: str, title: str, text: str, kind: str = "web") -> None:
+        """Store the extracted text of a page, evicting old entries if over budget.
+
+        Args:
+            url: URL of the page
+            title: Title of the page
+            text: Extracted text of the page
+            kind: Kind of content, used to select the TTL. Defaults to "web".
+        """
+        key = normalize_url(url)
+        now = time.time()
+        size = len(text.encode("utf-8")) + len(title.encode("utf-8"))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, kind, title, text, size, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, title, text, size, now, now)
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Delete the least recently used entries until the cache fits the byte budget."""
+        cursor = conn.execute(
+            """DELETE FROM pages WHERE url IN (
+                SELECT url FROM (
+                    SELECT url, SUM(size) OVER (ORDER BY last_access DESC, url) AS running
+                    FROM pages
+                ) WHERE running > ?
+            )""",
+            (self.max_bytes,)
+        )
+        self._stats["evictions"] += max(cursor.rowcount, 0)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+
+    def stats(self) -> dict:
+        """Get the cache statistics.
+
+        Returns:
+            dict: Hit, miss, expiry and eviction counts, plus the number of entries and
+            stored bytes
+        """
+        with self._lock, self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+            stats = dict(self._stats)
+        stats["entries"] = entries
+        stats["bytes"] = size
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_content_cache() -> ContentCache:
+    """Get the content cache shared by the search tools, creating it on first use.
+
+    Returns:
+        ContentCache: The shared content cache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ContentCache()
+    return _cache
@@ -0,0 +1,265 @@
+import re
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+import httpx
+from tools.browser_pool import pooled_render
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+# Status codes of bot blocks, which a real browser may get through
+BOT_BLOCK_STATUS_CODES = (403, 429)
+
+
+@dataclass
+class FetchedPage:
+    """A single page fetched by the PageFetcher.
+
+    Attributes:
+        url (str): The requested URL
+        title (str): Title of the search result the URL came from
+        html (str): Raw HTML of the page, empty if the fetch failed
+        status (int, optional): HTTP status code, None for browser-rendered or failed pages
+        rendered (bool): True if the page was loaded through a headless browser
+        error (str, optional): Reason the fetch failed, None on success
+        elapsed (float): Seconds spent fetching the page
+    """
+    url: str
+    title: str
+    html: str = ""
+    status: Optional[int] = None
+    rendered: bool = False
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether the page was fetched successfully."""
+        return self.error is None and bool(self.html)
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Uses asyncio.run when no event loop is running in the current thread. Otherwise
+    (e.g. when called from inside an async caller) the coroutine is run on a fresh
+    event loop in a separate thread.
+
+    Args:
+        coro: The coroutine to run
+
+    Returns:
+        The result of the coroutine
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def target():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def needs_javascript(html: str, min_words: int = 50) -> bool:
+    """Heuristically decide whether a statically fetched page needs a browser to render.
+
+    A page is considered to need JavaScript when its visible text (outside of script
+    and style tags) is too short, or when it explicitly asks the user to enable
+    JavaScript.
+
+    Args:
+        html: Raw HTML of the page
+        min_words: Minimum number of visible words for a page to be usable as is
+
+    Returns:
+        True if the page should be re-fetched through a headless browser
+    """
+    body = re.sub(r"(?is)<(script|style|noscript)\b.*?</\1>", " ", html)
+    text = re.sub(r"(?s)<[^>]+>", " ", body)
+    if len(re.findall(r"\b\w+\b", text)) < min_words:
+        return True
+    return bool(re.search(r"(?i)(enable|turn on) javascript", html)) and len(text) < 2000
+
+
+class PageFetcher:
+    """Concurrent page fetch engine used by the search tools.
+
+    Pages are fetched concurrently over HTTP with httpx. Pages that failed to load
+    (network errors and timeouts), were blocked as bots (403, 429) or look like they
+    need JavaScript to render are re-loaded through a headless browser leased from the
+    shared BrowserPool, with a separate (smaller) concurrency limit since browsers are
+    expensive. Other error statuses (e.g. 404, 410) and unsupported content types
+    (e.g. PDF) stay failed.
+
+    Every URL has its own deadline and the whole batch has an overall deadline. When
+    the overall deadline is hit, the pages fetched so far are returned and the rest
+    are reported as failed, so a single slow site cannot stall the caller.
+
+    Attributes:
+        concurrency (int): Maximum number of concurrent HTTP fetches
+        browser_concurrency (int): Maximum number of concurrent browser renders
+        per_url_timeout (float): Deadline in seconds for a single URL
+        overall_timeout (float): Deadline in seconds for the whole batch
+        js_fallback (bool): Flag to indicate if JavaScript pages are rendered in a browser
+        renderer (Callable): Function rendering a URL in a browser, returning its HTML
+
+    Args:
+        concurrency (int, optional): Maximum concurrent HTTP fetches. Defaults to 8.
+        browser_concurrency (int, optional): Maximum concurrent browser renders. Defaults to 2.
+        per_url_timeout (float, optional): Per-URL deadline in seconds. Defaults to 8.
+        overall_timeout (float, optional): Overall deadline in seconds. Defaults to 20.
+        js_fallback (bool, optional): Render JavaScript pages in a browser. Defaults to True.
+        renderer (Callable, optional): Browser renderer. Defaults to pooled_render.
+    """
+
+    def __init__(
+            self,
+            concurrency: int = 8,
+            browser_concurrency: int = 2,
+            per_url_timeout: float = 8.0,
+            overall_timeout: float = 20.0,
+            js_fallback: bool = True,
+            renderer: Optional[Callable[[str, float], str]] = None
+    ):
+        self.concurrency = concurrency
+        self.browser_concurrency = browser_concurrency
+        self.per_url_timeout = per_url_timeout
+        self.overall_timeout = overall_timeout
+        self.js_fallback = js_fallback
+        self.renderer = renderer or pooled_render
+        # Browser renders run on a dedicated executor so that an abandoned render
+        # does not block the event loop shutdown once the overall deadline is hit.
+        self._render_executor = ThreadPoolExecutor(
+            max_workers=browser_concurrency,
+            thread_name_prefix="page-render"
+        )
+
+    async def _fetch_http(self, client: httpx.AsyncClient, page: FetchedPage) -> None:
+        """Fetch a page over plain HTTP and store the result in place."""
+        response = await client.get(page.url)
+        page.status = response.status_code
+        content_type = response.headers.get("content-type", "")
+        if response.status_code >= 400:
+            page.error = f"HTTP {response.status_code}"
+        elif "html" not in content_type and "text/plain" not in content_type:
+            page.error = f"Unsupported content type: {content_type}"
+        else:
+            page.html = response.text
+
+    async def _render(self, page: FetchedPage, timeout: float) -> None:
+        """Render a page in a headless browser and store the result in place."""
+        loop = asyncio.get_running_loop()
+        html = await asyncio.wait_for(
+            loop.run_in_executor(self._render_executor, self.renderer, page.url, timeout),
+            timeout=timeout
+        )
+        page.html = html
+        page.status = None
+        page.rendered = True
+        page.error = None
+
+    async def _fetch_one(
+            self,
+            client: httpx.AsyncClient,
+            http_semaphore: asyncio.Semaphore,
+            browser_semaphore: asyncio.Semaphore,
+            page: FetchedPage
+    ) -> None:
+        """Fetch a single page, falling back to the browser if needed."""
+        start = time.monotonic()
+        network_error = False
+        try:
+            async with http_semaphore:
+                await asyncio.wait_for(self._fetch_http(client, page), timeout=self.per_url_timeout)
+        except Exception as e:
+            page.error = f"{type(e).__name__}: {e}"
+            network_error = True
+
+        remaining = self.per_url_timeout - (time.monotonic() - start)
+        if page.error is None:
+            needs_browser = needs_javascript(page.html)
+        else:
+            needs_browser = network_error or page.status in BOT_BLOCK_STATUS_CODES
+        if self.js_fallback and needs_browser and remaining > 1:
+            try:
+                async with browser_semaphore:
+                    remaining = self.per_url_timeout - (time.monotonic() - start)
+                    if remaining > 1:
+                        await self._render(page, remaining)
+            except Exception as e:
+                # Keep whatever the HTTP fetch returned, if anything.
+                if not page.html:
+                    page.error = f"{type(e).__name__}: {e}"
+
+        page.elapsed = time.monotonic() - start
+
+    async def afetch(self, targets: Sequence[Tuple[str, str]]) -> List[FetchedPage]:
+        """Fetch pages concurrently.
+
+        Args:
+            targets: Sequence of (url, title) pairs to fetch
+
+        Returns:
+            The fetched pages, in the same order as targets. Pages not finished before
+            the overall deadline have their error set.
+        """
+        pages = [FetchedPage(url=url, title=title) for url, title in targets]
+        if not pages:
+            return pages
+
+        http_semaphore = asyncio.Semaphore(self.concurrency)
+        browser_semaphore = asyncio.Semaphore(self.browser_concurrency)
+        async with httpx.AsyncClient(
+            follow_redirects=True,
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(max_connections=self.concurrency),
+            timeout=self.per_url_timeout
+        ) as client:
+            tasks = [
+                asyncio.create_task(self._fetch_one(client, http_semaphore, browser_semaphore, page))
+                for page in pages
+            ]
+            _, pending = await asyncio.wait(tasks, timeout=self.overall_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for page in pages:
+            if not page.ok and page.error is None:
+                page.error = "Deadline exceeded"
+        return pages
+
+    def fetch(self, targets: Sequence[Tuple[str, str]]) -> List[FetchedPage]:
+        """Synchronous wrapper around afetch.
+
+        Args:
+            targets: Sequence of (url, title) pairs to fetch
+
+        Returns:
+            The fetched pages, in the same order as targets
+        """
+        return run_sync(self.afetch(targets))
+
+
+# Shared fetcher used by the search tools.
+page_fetcher = PageFetcher()
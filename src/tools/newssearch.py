@@ -1,35 +1,46 @@
-import re
-from duckduckgo_search import DDGS
-from selenium import webdriver
-from bs4 import BeautifulSoup
-from langchain.tools import tool
-
-
-@tool("news_search", return_direct=False)
-def news_search(query: str) -> str:
-    """News-specific search tool for retrieving current information.
-    
-    This tool uses DuckDuckGo's news search to find recent articles and news content.
-    It processes each result using Selenium to extract the full article text while
-    filtering out short or irrelevant content.
-    """
-    with DDGS(timeout=20) as ddgs:
-        results = ddgs.news(query, max_results=10)
-
-    output = []
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    driver = webdriver.Chrome(options=options)
-    for result in results:
-        driver.get(result['url'])
-        response = driver.page_source
-        soup = BeautifulSoup(response, 'html.parser')
-        content = "\n\n".join([x for x in soup.get_text().strip().splitlines() if bool(x)])
-        if len(re.findall(r'\b\w+\b', content)) > 20:
-            output.append("#" + result['title'] + "\n\n" + content)
-
-    driver.quit()
-    output = '\n\n'.join(output)
-    return output
+import asyncio
+from duckduckgo_search import DDGS
+from langchain_core.tools import StructuredTool
+from langchain_core.runnables import RunnableConfig
+from tools.fetcher import run_sync
+from tools.page_content import afetch_page_texts, format_pages, page_limits
+from tools.query_cache import get_query_cache
+
+
+def _ddgs_news(query: str) -> list:
+    """Run a DuckDuckGo news search for the query."""
+    with DDGS(timeout=20) as ddgs:
+        return ddgs.news(query, max_results=10)
+
+
+async def anews_search(query: str, config: RunnableConfig) -> str:
+    """News-specific search tool for retrieving current information.
+
+    This tool uses DuckDuckGo's news search to find recent articles and news content.
+    It fetches the articles concurrently to extract the full article text while
+    filtering out short or irrelevant content.
+    """
+    results = await asyncio.to_thread(get_query_cache().get_or_fetch, "news", query, lambda: _ddgs_news(query))
+
+    use_cache = not config.get("configurable", {}).get("bypass_content_cache", False)
+    pages = await afetch_page_texts(
+        [(result['url'], result['title']) for result in results],
+        kind="news",
+        use_cache=use_cache
+    )
+    return format_pages(pages, **page_limits(config))
+
+
+def _news_search(query: str, config: RunnableConfig) -> str:
+    """Run the news search from synchronous code."""
+    return run_sync(anews_search(query, config))
+
+
+# The tool has both a sync and an async implementation, so that the tools node can run
+# it concurrently with other tool calls on a single event loop.
+news_search = StructuredTool.from_function(
+    func=_news_search,
+    coroutine=anews_search,
+    name="news_search",
+    description=anews_search.__doc__
+)
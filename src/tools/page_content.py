@@ -0,0 +1,226 @@
+import re
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+from lxml import etree
+from langchain_core.runnables import RunnableConfig
+from tools.fetcher import page_fetcher, run_sync
+from tools.content_cache import get_content_cache
+from utils import count_tokens, truncate_tokens
+
+
+# Elements whose text is collected as a content block when they close.
+BLOCK_TAGS = {
+    "p", "li", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "td", "th",
+    "dd", "dt", "figcaption", "div", "section", "article", "main", "body"
+}
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Elements that never contain main content.
+BOILERPLATE_TAGS = {
+    "nav", "header", "footer", "aside", "form", "script", "style", "noscript", "svg",
+    "iframe", "button", "select", "template"
+}
+# Class/id patterns of containers that never contain main content.
+BOILERPLATE_ATTR = re.compile(
+    r"(?i)\b(cookie|consent|gdpr|banner|navbar|nav|menu|breadcrumb|footer|sidebar|"
+    r"subscribe|newsletter|share|social|related|comment|advert|ads?|promo|popup|modal)\b"
+)
+# Default page limits of the search tools output, overridable per run with the
+# "min_words" and "max_tokens_per_page" keys of the run's configurable settings.
+MIN_WORDS = 20
+MAX_TOKENS_PER_PAGE = 1024
+
+
+def _is_boilerplate(element: etree._Element) -> bool:
+    """Check if an element is a container that never holds main content."""
+    if not isinstance(element.tag, str):
+        return True
+    if element.tag.lower() in BOILERPLATE_TAGS:
+        return True
+    if element.tag.lower() in ("html", "body", "main", "article"):
+        return False
+    attrs = " ".join(filter(None, [element.get("class"), element.get("id"), element.get("role")]))
+    return bool(attrs) and bool(BOILERPLATE_ATTR.search(attrs.replace("-", " ").replace("_", " ")))
+
+
+def extract_main_text(html: str, chunk_size: int = 65536) -> str:
+    """Extract the main-content text of an HTML page.
+
+    The page is fed to an incremental lxml parser and every block element (paragraph,
+    list item, heading, ...) is turned into a text block as soon as it is closed, then
+    cleared from the tree so memory stays flat. Blocks inside navigation bars, cookie
+    banners, footers, sidebars and similar containers are dropped, as are blocks made
+    mostly of link text. When the page marks its content with <main> or <article>, only
+    the blocks inside it are kept.
+
+    Args:
+        html: Raw HTML of the page
+        chunk_size: Number of characters fed to the parser at a time. Defaults to 65536.
+
+    Returns:
+        The main-content blocks separated by blank lines
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    boilerplate_depth = 0
+    main_depth = 0
+    main_blocks, other_blocks = [], []
+
+    def handle(events):
+        nonlocal boilerplate_depth, main_depth
+        for event, element in events:
+            tag = element.tag.lower() if isinstance(element.tag, str) else ""
+            if event == "start":
+                if boilerplate_depth or _is_boilerplate(element):
+                    boilerplate_depth += 1
+                elif tag in ("main", "article"):
+                    main_depth += 1
+                continue
+
+            if boilerplate_depth:
+                boilerplate_depth -= 1
+                if not boilerplate_depth:
+                    element.clear(keep_tail=True)
+                continue
+
+            if tag in BLOCK_TAGS:
+                text = " ".join("".join(element.itertext()).split())
+                words = len(text.split())
+                link_chars = sum(len("".join(a.itertext())) for a in element.iter("a"))
+                keep = bool(text) and (
+                    tag in HEADING_TAGS
+                    or (words >= 3 and link_chars <= 0.5 * len(text))
+                )
+                if keep:
+                    (main_blocks if main_depth else other_blocks).append(text)
+                element.clear(keep_tail=True)
+
+            if tag in ("main", "article"):
+                main_depth -= 1
+
+    for start in range(0, len(html), chunk_size):
+        parser.feed(html[start:start + chunk_size])
+        handle(parser.read_events())
+    try:
+        parser.close()
+    except etree.XMLSyntaxError:
+        pass
+    handle(parser.read_events())
+
+    main_words = sum(len(block.split()) for block in main_blocks)
+    blocks = main_blocks if main_words >= 50 else main_blocks + other_blocks
+    return "\n\n".join(blocks)
+
+
+async def afetch_page_texts(
+        targets: Sequence[Tuple[str, str]],
+        kind: str = "web",
+        use_cache: bool = True
+) -> List[Tuple[str, str]]:
+    """Get the extracted text of the given pages, serving them from the content cache when possible.
+
+    Pages missing from the cache (or all pages, when the cache is bypassed) are fetched
+    concurrently, extracted, and written back to the cache.
+
+    Args:
+        targets: Sequence of (url, title) pairs
+        kind: Kind of content ("web" or "news"), used to select the cache TTL. Defaults to "web".
+        use_cache: Flag to indicate if cached pages may be served. Defaults to True.
+
+    Returns:
+        (title, text) pairs of the pages that could be loaded, in the order of targets
+    """
+    cache = get_content_cache()
+    texts = {}
+    if use_cache:
+        for url, _ in targets:
+            cached = cache.get(url, kind=kind)
+            if cached is not None:
+                texts[url] = (cached.title, cached.text)
+
+    missing = [(url, title) for url, title in targets if url not in texts]
+    for page in await page_fetcher.afetch(missing):
+        if page.ok:
+            text = extract_main_text(page.html)
+            cache.put(page.url, page.title, text, kind=kind)
+            texts[page.url] = (page.title, text)
+
+    return [texts[url] for url, _ in targets if url in texts]
+
+
+def fetch_page_texts(
+        targets: Sequence[Tuple[str, str]],
+        kind: str = "web",
+        use_cache: bool = True
+) -> List[Tuple[str, str]]:
+    """Synchronous wrapper around afetch_page_texts.
+
+    Args:
+        targets: Sequence of (url, title) pairs
+        kind: Kind of content ("web" or "news"). Defaults to "web".
+        use_cache: Flag to indicate if cached pages may be served. Defaults to True.
+
+    Returns:
+        (title, text) pairs of the pages that could be loaded, in the order of targets
+    """
+    return run_sync(afetch_page_texts(targets, kind=kind, use_cache=use_cache))
+
+
+def page_limits(config: Optional[RunnableConfig] = None) -> dict:
+    """Get the page limits of the search tools output for a run.
+
+    Args:
+        config: Configuration of the run. Its configurable settings may set "min_words"
+            and "max_tokens_per_page". Optional.
+
+    Returns:
+        The min_words and max_tokens_per_page arguments of format_pages
+    """
+    configurable = (config or {}).get("configurable", {})
+    return {
+        "min_words": configurable.get("min_words", MIN_WORDS),
+        "max_tokens_per_page": configurable.get("max_tokens_per_page", MAX_TOKENS_PER_PAGE)
+    }
+
+
+def format_pages(
+        pages: List[Tuple[str, str]],
+        min_words: int = MIN_WORDS,
+        max_tokens_per_page: int = MAX_TOKENS_PER_PAGE
+) -> str:
+    """Convert page texts into the text returned by the search tools.
+
+    Paragraphs already seen in an earlier page are removed, each page is truncated to
+    a token budget at paragraph boundaries, and pages left with too few words are
+    skipped.
+
+    Args:
+        pages: (title, text) pairs of the pages
+        min_words: Minimum number of words for a page to be kept. Defaults to MIN_WORDS.
+        max_tokens_per_page: Token budget of each page. Defaults to MAX_TOKENS_PER_PAGE.
+
+    Returns:
+        The titled page contents joined into a single string
+    """
+    output = []
+    seen = set()
+    for title, text in pages:
+        paragraphs = []
+        budget = max_tokens_per_page
+        for paragraph in text.split("\n\n"):
+            key = hashlib.sha1(" ".join(re.findall(r'\w+', paragraph.lower())).encode("utf-8")).digest()
+            if not paragraph.strip() or key in seen:
+                continue
+            seen.add(key)
+
+            tokens = count_tokens(paragraph)
+            if tokens > budget:
+                if budget > 0:
+                    paragraphs.append(truncate_tokens(paragraph, budget))
+                break
+            paragraphs.append(paragraph)
+            budget -= tokens
+
+        content = "\n\n".join(paragraphs)
+        if len(re.findall(r'\b\w+\b', content)) > min_words:
+            output.append("#" + title + "\n\n" + content)
+
+    return '\n\n'.join(output)
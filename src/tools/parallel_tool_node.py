@@ -0,0 +1,123 @@
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langgraph.graph import MessagesState
+
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelToolNode:
+    """Graph node running the tool calls of the last AI message concurrently.
+
+    Every tool call of the message is started at once on a single event loop: tools
+    with an async implementation (e.g. web_search and news_search) run as coroutines,
+    and sync-only tools (e.g. the vector store retrievers) run in worker threads. A
+    turn with several tool calls therefore takes as long as its slowest call instead
+    of the sum of all of them.
+
+    Each call has its own timeout. A call that fails or times out returns an error
+    ToolMessage instead of failing the whole step, so the other results still reach
+    the summarizer.
+
+    Attributes:
+        tools_by_name (Dict[str, BaseTool]): The available tools, by name
+        timeout (float): Default timeout in seconds of a tool call
+        timeouts (dict): Timeout in seconds per tool name, overriding the default
+
+    Args:
+        tools (Sequence[BaseTool]): The available tools
+        timeout (float, optional): Default timeout of a tool call. Defaults to 60.
+        timeouts (dict, optional): Timeout per tool name. Defaults to None.
+    """
+
+    def __init__(
+            self,
+            tools: Sequence[BaseTool],
+            timeout: float = 60.0,
+            timeouts: Optional[Dict[str, float]] = None
+    ):
+        self.tools_by_name = {tool.name: tool for tool in tools}
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+
+    async def _run_one(self, tool_call: dict, config: RunnableConfig) -> ToolMessage:
+        """Run a single tool call, turning failures and timeouts into error messages."""
+        name = tool_call["name"]
+        tool = self.tools_by_name.get(name)
+        if tool is None:
+            return ToolMessage(
+                content=f"Error: {name} is not a valid tool, try one of [{', '.join(self.tools_by_name)}].",
+                name=name,
+                tool_call_id=tool_call["id"],
+                status="error"
+            )
+
+        timeout = self.timeouts.get(name, self.timeout)
+        start = time.monotonic()
+        try:
+            output = await asyncio.wait_for(
+                tool.ainvoke({**tool_call, "type": "tool_call"}, config),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            content = f"Error: {name} did not answer within {timeout:.0f} seconds."
+        except Exception as e:
+            content = f"Error: {name} failed with {type(e).__name__}: {e}"
+        else:
+            logger.debug("Tool %s finished in %.2fs", name, time.monotonic() - start)
+            if isinstance(output, ToolMessage):
+                return output
+            return ToolMessage(content=str(output), name=name, tool_call_id=tool_call["id"])
+
+        logger.warning("Tool %s: %s", name, content)
+        return ToolMessage(content=content, name=name, tool_call_id=tool_call["id"], status="error")
+
+    async def ainvoke(self, state: MessagesState, config: Optional[RunnableConfig] = None) -> dict:
+        """Run the tool calls of the last AI message concurrently.
+
+        Args:
+            state: Current conversation state ending with an AI message with tool calls
+            config: Configuration of the graph run, passed to the tools. Optional.
+
+        Returns:
+            dict: One tool message per tool call, in the order of the calls
+        """
+        message = state["messages"][-1]
+        tool_calls: List[dict] = message.tool_calls if isinstance(message, AIMessage) else []
+        results = await asyncio.gather(*(self._run_one(tool_call, config or {}) for tool_call in tool_calls))
+        return {"messages": list(results)}
+
+    def invoke(self, state: MessagesState, config: Optional[RunnableConfig] = None) -> dict:
+        """Synchronous wrapper around ainvoke.
+
+        Args:
+            state: Current conversation state ending with an AI message with tool calls
+            config: Configuration of the graph run, passed to the tools. Optional.
+
+        Returns:
+            dict: One tool message per tool call, in the order of the calls
+        """
+        # Unlike asyncio.run, closing the loop does not wait for the worker threads of
+        # timed out sync tools, so an abandoned call cannot hold the step.
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.ainvoke(state, config))
+        finally:
+            loop.close()
+
+    def __call__(self, state: MessagesState, config: RunnableConfig) -> dict:
+        """Make the node callable, delegating to invoke method.
+
+        Args:
+            state (MessagesState): Current state ending with the tool calls to run
+            config (RunnableConfig): Configuration of the graph run
+
+        Returns:
+            dict: One tool message per tool call
+        """
+        return self.invoke(state, config)
@@ -0,0 +1,127 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so that trivially different phrasings share a cache key.
+
+    Lowercases the query, drops punctuation and collapses whitespace.
+
+    Args:
+        query: The search query
+
+    Returns:
+        The normalized query
+    """
+    query = re.sub(r"['\u2019]", "", query.lower())
+    query = re.sub(r"[^\w\s]", " ", query)
+    return " ".join(query.split())
+
+
+class QueryCache:
+    """In-memory memoization of search engine calls per normalized query.
+
+    Results are kept for a kind-specific time-to-live ("news" results go stale much
+    faster than "web" results) in a bounded LRU. Concurrent calls for the same query
+    are coalesced, so only one upstream request is made and every caller shares its
+    result. Failed calls are not cached.
+
+    Attributes:
+        ttls (dict): Time-to-live in seconds per kind of search
+        max_entries (int): Maximum number of cached queries
+
+    Args:
+        ttls (dict, optional): TTL per kind. Defaults to 1 hour for web, 5 minutes for news.
+        max_entries (int, optional): Maximum number of cached queries. Defaults to 512.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 512):
+        self.ttls = ttls or {"web": 3600, "news": 300}
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (stored at, results)
+        self._inflight = {}  # key -> Future shared by coalesced callers
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def get_or_fetch(self, kind: str, query: str, fetch: Callable[[], List[dict]]) -> List[dict]:
+        """Get the search results for a query, calling fetch only if they are not cached.
+
+        Args:
+            kind: Kind of search ("web" or "news"), used in the key and to select the TTL
+            query: The search query
+            fetch: Function performing the upstream search and returning its results
+
+        Returns:
+            The search results
+        """
+        key = (kind, normalize_query(query))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, results = entry
+                if time.monotonic() - stored_at <= self.ttls.get(kind, self.ttls["web"]):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return list(results)
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            return list(future.result())
+
+        try:
+            results = list(fetch())
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+                self._stats["errors"] += 1
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            self._entries[key] = (time.monotonic(), results)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(results)
+        return list(results)
+
+    def stats(self) -> dict:
+        """Get the cache statistics.
+
+        Returns:
+            dict: Hit, miss, coalesced and error counts, plus the number of cached queries
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> QueryCache:
+    """Get the query cache shared by the search tools, creating it on first use.
+
+    Returns:
+        QueryCache: The shared query cache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache()
+    return _cache
@@ -1,9 +1,73 @@
-from langchain.tools.retriever import create_retriever_tool
-from langchain_core.vectorstores import VectorStoreRetriever
-from langchain_core.tools.simple import Tool
+from typing import Optional
+from pydantic import BaseModel, Field
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.tools import StructuredTool
+from retrieval.filters import build_filter, merge_contiguous
 
 
-def build_my_budget_retriever(retriever: VectorStoreRetriever) -> Tool:
+MY_BUDGET_TOOL_NAME = "malaysia_budget_2025_vectordb"
+MY_BUDGET_DESCRIPTION = """VectorDB retriever for Malaysia's budget 2025.
+
+        This tool retrieves data regarding Malaysia's budget allocations, spending, subsidies,
+        and other economic data in 2025.
+        """
+
+
+class RetrieverToolInput(BaseModel):
+    """Arguments of a vector store retriever tool."""
+    query: str = Field(description="query to look up in the vector store")
+    source: Optional[str] = Field(default=None, description="file name of the document to search, e.g. budget.pdf")
+    page_start: Optional[int] = Field(default=None, description="first page of the page range to search")
+    page_end: Optional[int] = Field(default=None, description="last page of the page range to search")
+    uploaded_after: Optional[str] = Field(default=None, description="only search documents uploaded on or after this date (YYYY-MM-DD)")
+    uploaded_before: Optional[str] = Field(default=None, description="only search documents uploaded on or before this date (YYYY-MM-DD)")
+
+
+def build_collection_retriever_tool(retriever: BaseRetriever, name: str, description: str) -> StructuredTool:
+    """Create a tool for retrieving information from a vector store collection.
+
+    The optional filters of the tool (source, page range, upload date) are pushed down
+    into the search, and contiguous chunks of the same document are merged into a
+    single result before being returned, each with its source and pages.
+
+    Args:
+        retriever: The retriever over the collection to wrap as a tool
+        name: Name of the tool
+        description: Description of the collection content, telling the agent when to use the tool
+
+    Returns:
+        StructuredTool: A LangChain tool searching the collection
+    """
+    def retrieve(
+            query: str,
+            source: Optional[str] = None,
+            page_start: Optional[int] = None,
+            page_end: Optional[int] = None,
+            uploaded_after: Optional[str] = None,
+            uploaded_before: Optional[str] = None
+    ) -> str:
+        where = build_filter(source, page_start, page_end, uploaded_after, uploaded_before)
+        chunks = retriever.invoke(query, filter=where) if where else retriever.invoke(query)
+        results = []
+        for chunk in merge_contiguous(chunks):
+            metadata = chunk.metadata
+            first_page = metadata.get("page_start", metadata.get("page"))
+            last_page = metadata.get("page_end", first_page)
+            header = f"Source: {metadata.get('file_name') or metadata.get('source', 'unknown')}"
+            if first_page is not None:
+                header += f", page {first_page + 1}" if first_page == last_page else f", pages {first_page + 1}-{last_page + 1}"
+            results.append(f"{header}\n{chunk.page_content}")
+        return "\n\n".join(results)
+
+    return StructuredTool.from_function(
+        func=retrieve,
+        name=name,
+        description=description,
+        args_schema=RetrieverToolInput
+    )
+
+
+def build_my_budget_retriever(retriever: BaseRetriever) -> StructuredTool:
     """Create a tool for retrieving information from the vector store.
 
     This function creates a LangChain tool that wraps a vector store retriever,
@@ -11,18 +75,13 @@ def build_my_budget_retriever(retriever: VectorStoreRetriever) -> Tool:
     a natural language interface to the vector database.
 
     Args:
-        retriever: The base vector store retriever to wrap as a tool
+        retriever: The retriever over the vector store to wrap as a tool
 
     Returns:
-        Tool: A LangChain tool configured for budget data retrieval
+        StructuredTool: A LangChain tool configured for budget data retrieval
     """
-    vector_store_retriever = create_retriever_tool(
+    return build_collection_retriever_tool(
         retriever,
-        name="malaysia_budget_2025_vectordb",
-        description="""VectorDB retriever for Malaysia's budget 2025.
-        
-        This tool retrieves data regarding Malaysia's budget allocations, spending, subsidies, 
-        and other economic data in 2025.
-        """,
+        name=MY_BUDGET_TOOL_NAME,
+        description=MY_BUDGET_DESCRIPTION
     )
-    return vector_store_retriever
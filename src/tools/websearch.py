@@ -1,35 +1,46 @@
-import re
-from duckduckgo_search import DDGS
-from selenium import webdriver
-from bs4 import BeautifulSoup
-from langchain.tools import tool
-
-
-@tool("web_search", return_direct=False)
-def web_search(query: str) -> str:
-    """Web search tool for retrieving information from websites.
-    
-    This tool uses DuckDuckGo to search the web and retrieves content from matching
-    pages using Selenium. It processes the content to extract meaningful text while
-    filtering out short or irrelevant sections.
-    """
-    with DDGS(timeout=20) as ddgs:
-        results = ddgs.text(query, max_results=10)
-
-    output = []
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    driver = webdriver.Chrome(options=options)
-    for result in results:
-        driver.get(result['href'])
-        response = driver.page_source
-        soup = BeautifulSoup(response, 'html.parser')
-        content = "\n\n".join([x for x in soup.get_text().strip().splitlines() if bool(x)])
-        if len(re.findall(r'\b\w+\b', content)) > 20:
-            output.append("#" + result['title'] + "\n\n" + content)
-
-    driver.quit()
-    output = '\n\n'.join(output)
-    return output
+import asyncio
+from duckduckgo_search import DDGS
+from langchain_core.tools import StructuredTool
+from langchain_core.runnables import RunnableConfig
+from tools.fetcher import run_sync
+from tools.page_content import afetch_page_texts, format_pages, page_limits
+from tools.query_cache import get_query_cache
+
+
+def _ddgs_text(query: str) -> list:
+    """Run a DuckDuckGo web search for the query."""
+    with DDGS(timeout=20) as ddgs:
+        return ddgs.text(query, max_results=10)
+
+
+async def aweb_search(query: str, config: RunnableConfig) -> str:
+    """Web search tool for retrieving information from websites.
+
+    This tool uses DuckDuckGo to search the web and fetches the matching pages
+    concurrently. It processes the content to extract meaningful text while
+    filtering out short or irrelevant sections.
+    """
+    results = await asyncio.to_thread(get_query_cache().get_or_fetch, "web", query, lambda: _ddgs_text(query))
+
+    use_cache = not config.get("configurable", {}).get("bypass_content_cache", False)
+    pages = await afetch_page_texts(
+        [(result['href'], result['title']) for result in results],
+        kind="web",
+        use_cache=use_cache
+    )
+    return format_pages(pages, **page_limits(config))
+
+
+def _web_search(query: str, config: RunnableConfig) -> str:
+    """Run the web search from synchronous code."""
+    return run_sync(aweb_search(query, config))
+
+
+# The tool has both a sync and an async implementation, so that the tools node can run
+# it concurrently with other tool calls on a single event loop.
+web_search = StructuredTool.from_function(
+    func=_web_search,
+    coroutine=aweb_search,
+    name="web_search",
+    description=aweb_search.__doc__
+)
@@ -1,5 +1,12 @@
 import re
-from typing import List, Union
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import pymupdf
+import pymupdf4llm
+import tiktoken
 from langchain_core.documents import Document
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.datamodel.pipeline_options import PdfPipelineOptions
@@ -7,47 +14,225 @@ from docling.datamodel.base_models import InputFormat
 from docling_core.types.doc.document import ContentLayer
 
 
-def read_pdf(path: str, return_string: bool = False) -> Union[List[Document], str]:
-    """Read a PDF file and convert it to a list of documents.
+# Extractors of PDF pages:
+# - "auto": pymupdf4llm first, docling only for the pages where the fast extraction failed
+# - "pymupdf": pymupdf4llm only
+# - "docling": docling only
+PDF_EXTRACTORS = ("auto", "pymupdf", "docling")
+
+# Pipeline profiles of the docling converter:
+# - "lean": pages with a usable text layer, text is taken from the PDF, no OCR, no images
+# - "ocr": scanned pages and garbled text layers, full-page OCR, no images
+PDF_PROFILES = ("lean", "ocr")
 
-    Each page of the PDF is converted to a Document object with appropriate metadata.
+
+@lru_cache(maxsize=None)
+def get_pdf_converter(profile: str = "lean") -> DocumentConverter:
+    """Get the long-lived docling converter of a pipeline profile.
+
+    The converter (and its layout models) is built once per profile and process, and
+    reused for every PDF. Page and picture images are never generated since only the
+    text is used.
 
     Args:
-        path: Path to the PDF file
+        profile: Pipeline profile, "lean" or "ocr". Defaults to "lean".
 
     Returns:
-        List of Document objects, one per page
+        The initialized docling converter
     """
+    if profile not in PDF_PROFILES:
+        raise ValueError(f"Unknown PDF pipeline profile: {profile}. Must be one of {PDF_PROFILES}.")
+
     pipeline_options = PdfPipelineOptions()
-    pipeline_options.generate_page_images = True
-    pipeline_options.generate_picture_images = True
+    pipeline_options.generate_page_images = False
+    pipeline_options.generate_picture_images = False
+    pipeline_options.do_ocr = profile == "ocr"
+    pipeline_options.ocr_options.force_full_page_ocr = profile == "ocr"
     converter = DocumentConverter(
         format_options={
             InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
         }
     )
-    converted_doc = converter.convert(path)
-    md = converted_doc.document.export_to_markdown(page_break_placeholder="<!-- page break -->", included_content_layers=(ContentLayer.BODY, ContentLayer.FURNITURE))
-    md_remove_img = md.replace("<!-- image -->\n\n", "")
+    converter.initialize_pipeline(InputFormat.PDF)
+    return converter
 
-    if return_string:
-        return md_remove_img
-
-    md_split = [pg.strip() for pg in md_remove_img.split("<!-- page break -->\n\n")]
-    content = []
-    for i, page in enumerate(md_split):
-        #TODO: Add last 128 tokens/words from previous page to the beginning of current page.
-        content.append(
-            Document(
-                page_content=page.encode("utf-8"),
-                metadata={
-                    "source": path,
-                    "page": i
-                }
+
+def pdf_page_count(path: str) -> int:
+    """Get the number of pages of a PDF file.
+
+    Args:
+        path: Path to the PDF file
+
+    Returns:
+        The number of pages
+    """
+    with pymupdf.open(path) as pdf:
+        return pdf.page_count
+
+
+def page_fallback_reason(
+        page: pymupdf.Page,
+        tables: list,
+        min_chars: int = 50,
+        max_bad_ratio: float = 0.05
+) -> Optional[str]:
+    """Check whether the fast text extraction of a page failed and the page needs docling.
+
+    Args:
+        page: The PyMuPDF page
+        tables: Tables found on the page by pymupdf4llm
+        min_chars: Minimum number of characters for a page with images to count as having
+            a text layer. Defaults to 50.
+        max_bad_ratio: Maximum ratio of unreadable characters (replacement, private use
+            and control characters) in the text layer. Defaults to 0.05.
+
+    Returns:
+        "scanned" if the page is an image without a text layer, "garbled" if the text layer
+        cannot be decoded, "tables" if the page has tables, or None if the fast extraction
+        can be used
+    """
+    text = page.get_text()
+    chars = [c for c in text if not c.isspace()]
+    if len(chars) < min_chars:
+        return "scanned" if page.get_images() else None
+    bad = sum(c == "\ufffd" or unicodedata.category(c) in ("Co", "Cc", "Cs") for c in chars)
+    if bad / len(chars) > max_bad_ratio:
+        return "garbled"
+    if tables:
+        return "tables"
+    return None
+
+
+def _docling_pages(path: str, page_nos: List[int], profile: str) -> Dict[int, str]:
+    """Convert pages of a PDF file with docling.
+
+    Args:
+        path: Path to the PDF file
+        page_nos: 1-based page numbers to convert
+        profile: Pipeline profile of the converter, "lean" or "ocr"
+
+    Returns:
+        Page markdown by page number
+    """
+    converter = get_pdf_converter(profile)
+    pages = {}
+    # docling converts contiguous page ranges, so convert each run of pages at once
+    runs = []
+    for page_no in sorted(page_nos):
+        if runs and runs[-1][1] == page_no - 1:
+            runs[-1][1] = page_no
+        else:
+            runs.append([page_no, page_no])
+    for start, end in runs:
+        converted_doc = converter.convert(path, page_range=(start, end))
+        for page_no in range(start, end + 1):
+            pages[page_no] = converted_doc.document.export_to_markdown(
+                page_no=page_no,
+                included_content_layers=(ContentLayer.BODY, ContentLayer.FURNITURE)
             )
-        )
-    
-    return content
+    return pages
+
+
+def iter_pdf_pages(path: str, pages_per_batch: int = 8, extractor: str = "auto") -> Iterator[Document]:
+    """Convert a PDF file page by page, yielding each page as soon as it is converted.
+
+    With the "auto" extractor, pages are first extracted with PyMuPDF/pymupdf4llm, which
+    is fast on born-digital PDFs. Pages where the fast extraction failed (scanned
+    images, garbled text layers, tables) are converted again with docling, using the
+    OCR profile for scanned and garbled pages. The "pymupdf" and "docling" extractors use a single
+    tier for every page.
+
+    Pages are converted in small batches so that downstream chunking and embedding
+    can start before the last page is converted.
+
+    Args:
+        path: Path to the PDF file
+        pages_per_batch: Number of pages converted at a time. Defaults to 8.
+        extractor: "auto", "pymupdf" or "docling". Defaults to "auto".
+
+    Yields:
+        One Document per page, with source, (0-based) page and extractor metadata
+    """
+    if extractor not in PDF_EXTRACTORS:
+        raise ValueError(f"Unknown PDF extractor: {extractor}. Must be one of {PDF_EXTRACTORS}.")
+
+    with pymupdf.open(path) as pdf:
+        n_pages = pdf.page_count
+        for start in range(1, n_pages + 1, pages_per_batch):
+            end = min(n_pages, start + pages_per_batch - 1)
+            page_nos = list(range(start, end + 1))
+            markdown = {}
+            fallback = {}
+            if extractor == "docling":
+                fallback = {page_no: None for page_no in page_nos}
+            else:
+                chunks = pymupdf4llm.to_markdown(
+                    pdf, pages=[page_no - 1 for page_no in page_nos], page_chunks=True, ignore_images=True
+                )
+                for page_no, chunk in zip(page_nos, chunks):
+                    # pymupdf4llm ends every page with a horizontal rule
+                    markdown[page_no] = chunk["text"].rstrip().removesuffix("-----")
+                    if extractor == "auto":
+                        reason = page_fallback_reason(pdf[page_no - 1], chunk["tables"])
+                        if reason is not None:
+                            fallback[page_no] = reason
+
+            for profile in PDF_PROFILES:
+                profile_pages = [
+                    page_no for page_no, reason in fallback.items()
+                    if (profile == "ocr") == (reason in ("scanned", "garbled"))
+                ]
+                if profile_pages:
+                    markdown.update(_docling_pages(path, profile_pages, profile))
+
+            for page_no in page_nos:
+                yield Document(
+                    page_content=markdown[page_no].replace("<!-- image -->", "").strip(),
+                    metadata={
+                        "source": path,
+                        "page": page_no - 1,
+                        "extractor": "docling" if page_no in fallback else "pymupdf"
+                    }
+                )
+
+
+def read_pdf(path: str, return_string: bool = False, extractor: str = "auto") -> Union[List[Document], str]:
+    """Read a PDF file and convert it to a list of documents.
+
+    Each page of the PDF is converted to a Document object with appropriate metadata.
+    See iter_pdf_pages for the extractors.
+
+    Args:
+        path: Path to the PDF file
+        return_string: Return the whole document as a single markdown string instead
+        extractor: "auto", "pymupdf" or "docling". Defaults to "auto".
+
+    Returns:
+        List of Document objects, one per page, or the markdown string
+    """
+    pages = list(iter_pdf_pages(path, extractor=extractor))
+    if return_string:
+        return "\n\n".join(page.page_content for page in pages)
+    return pages
+
+
+def read_pdfs(paths: List[str], max_workers: Optional[int] = None) -> Iterator[Tuple[str, List[Document]]]:
+    """Read several PDF files in parallel on a process pool.
+
+    Each worker process keeps its own long-lived converters, so the layout models are
+    loaded once per worker rather than once per file.
+
+    Args:
+        paths: Paths to the PDF files
+        max_workers: Number of worker processes. Defaults to the number of CPUs.
+
+    Yields:
+        (path, pages) pairs, in the order the files finish converting
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn")) as executor:
+        futures = {executor.submit(read_pdf, path): path for path in paths}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
 
 
 def remove_think(text: str) -> str:
@@ -62,3 +247,100 @@ def remove_think(text: str) -> str:
     pattern = r"<think>(?s:.)*?</think>"
     text = re.sub(pattern, '', text).strip()
     return text
+
+
+class ThinkFilter:
+    """Incremental counterpart of remove_think for streamed text.
+
+    Text is fed piece by piece as it is generated, and only the text outside <think>
+    spans is returned. A tag split across pieces is held back until it is complete.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+
+    def feed(self, text: str) -> str:
+        """Filter the next piece of streamed text.
+
+        Args:
+            text: The next piece of generated text
+
+        Returns:
+            The visible text that can be displayed so far
+        """
+        self._buffer += text
+        visible = []
+        while True:
+            tag = self.CLOSE_TAG if self._in_think else self.OPEN_TAG
+            pos = self._buffer.find(tag)
+            if pos == -1:
+                # Hold back the end of the buffer if it may be the start of the tag
+                keep = next((n for n in range(len(tag) - 1, 0, -1) if self._buffer.endswith(tag[:n])), 0)
+                if not self._in_think:
+                    visible.append(self._buffer[:len(self._buffer) - keep])
+                self._buffer = self._buffer[len(self._buffer) - keep:]
+                break
+            if not self._in_think:
+                visible.append(self._buffer[:pos])
+            self._buffer = self._buffer[pos + len(tag):]
+            self._in_think = not self._in_think
+        return "".join(visible)
+
+    def flush(self) -> str:
+        """Get the visible text held back at the end of the stream.
+
+        Returns:
+            The remaining visible text
+        """
+        text = "" if self._in_think else self._buffer
+        self._buffer = ""
+        self._in_think = False
+        return text
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base") -> tiktoken.Encoding:
+    """Get a (cached) tiktoken encoding.
+
+    Args:
+        encoding_name: Name of the tiktoken encoding. Defaults to "cl100k_base".
+
+    Returns:
+        The tiktoken encoding
+    """
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str, encoding_name: str = "cl100k_base") -> int:
+    """Count the number of tokens in the text.
+
+    Args:
+        text: The input text
+        encoding_name: Name of the tiktoken encoding. Defaults to "cl100k_base".
+
+    Returns:
+        The number of tokens
+    """
+    return len(get_encoding(encoding_name).encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, encoding_name: str = "cl100k_base") -> str:
+    """Truncate the text to at most max_tokens tokens.
+
+    Args:
+        text: The input text
+        max_tokens: Maximum number of tokens to keep
+        encoding_name: Name of the tiktoken encoding. Defaults to "cl100k_base".
+
+    Returns:
+        The truncated text
+    """
+    encoding = get_encoding(encoding_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
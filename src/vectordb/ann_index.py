@@ -0,0 +1,434 @@
+import os
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+class AnnIndex(ABC):
+    """Abstract base class for the local vector index backends.
+
+    Vectors are L2-normalized and stored as rows, and scores are cosine similarities.
+    The base class maps chunk IDs to rows and keeps track of deleted rows
+    (tombstones), so that backends only have to store rows and search them. Deleted
+    rows are skipped at search time and dropped by compact().
+
+    The index directory holds ids.txt (the chunk ID of every row, one per line),
+    deleted.json (the deleted rows) and meta.json (the vector dimension), next to
+    the backend's own files. Rows are always written before their IDs, so after a
+    crash between the two writes the backend holds rows without an ID. They are
+    marked deleted when the index is opened, so that every ID keeps pointing at its
+    own row.
+
+    Backends may buffer writes, flush() persists them, e.g. at the end of an ingestion.
+
+    Attributes:
+        path (str): Directory of the index
+        dim (int): Vector dimension, known once the first vectors are added
+
+    Args:
+        path (str): Directory of the index
+    """
+    backend = None
+
+    def __init__(self, path: str):
+        self.path = path
+        self.dim = None
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []
+        self._rows = {}
+        os.makedirs(path, exist_ok=True)
+        self._load_ids()
+        if self.dim is not None:
+            self._open()
+            self._reconcile()
+
+    def _file(self, name: str) -> str:
+        """Get the path of a file of the index."""
+        return os.path.join(self.path, name)
+
+    def _load_ids(self) -> None:
+        """Load the row bookkeeping of the index."""
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json"), "r") as f:
+                self.dim = json.load(f)["dim"]
+        if os.path.exists(self._file("ids.txt")):
+            with open(self._file("ids.txt"), "r") as f:
+                lines = f.readlines()
+            # A last line without its newline was cut by a crash, its row has no ID yet
+            if lines and not lines[-1].endswith("\n"):
+                lines.pop()
+            self._ids = [line.rstrip("\n") or None for line in lines]
+        deleted = []
+        if os.path.exists(self._file("deleted.json")):
+            with open(self._file("deleted.json"), "r") as f:
+                deleted = json.load(f)
+        for row in deleted:
+            if row < len(self._ids):
+                self._ids[row] = None
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids) if chunk_id is not None}
+
+    def _save_ids(self) -> None:
+        """Atomically rewrite the chunk ID of every row, an empty line for deleted rows."""
+        tmp_path = self._file("ids.txt.tmp")
+        with open(tmp_path, "w") as f:
+            f.writelines((chunk_id or "") + "\n" for chunk_id in self._ids)
+        os.replace(tmp_path, self._file("ids.txt"))
+
+    def _reconcile(self) -> None:
+        """Align the IDs with the rows of the backend after an interrupted write."""
+        n_rows = self._n_rows()
+        if n_rows == len(self._ids):
+            return
+        logger.warning(
+            "Vector index %s has %d rows for %d IDs, recovering from an interrupted write",
+            self.path, n_rows, len(self._ids)
+        )
+        if n_rows > len(self._ids):
+            # Rows written without their IDs are dropped
+            self._ids.extend([None] * (n_rows - len(self._ids)))
+        else:
+            # IDs written without their rows (unflushed backend writes) are dropped
+            self._ids = self._ids[:n_rows]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids) if chunk_id is not None}
+        self._save_ids()
+        self._save_deleted()
+
+    def _save_deleted(self) -> None:
+        """Persist the deleted rows."""
+        deleted = [row for row, chunk_id in enumerate(self._ids) if chunk_id is None]
+        tmp_path = self._file("deleted.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(deleted, f)
+        os.replace(tmp_path, self._file("deleted.json"))
+
+    @abstractmethod
+    def _open(self) -> None:
+        """Open (or create) the backend storage once the dimension is known."""
+        pass
+
+    @abstractmethod
+    def _add_rows(self, vectors: np.ndarray) -> None:
+        """Append normalized float32 vectors as new rows."""
+        pass
+
+    @abstractmethod
+    def _n_rows(self) -> int:
+        """Get the number of rows of the backend storage, deleted ones included."""
+        pass
+
+    def flush(self) -> None:
+        """Persist the rows buffered by the backend."""
+        pass
+
+    @abstractmethod
+    def _search_rows(self, vector: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the n best rows for a normalized query vector.
+
+        Returns:
+            (rows, scores), best first
+        """
+        pass
+
+    @abstractmethod
+    def _get_rows(self, start: int, end: int) -> np.ndarray:
+        """Get the vectors of rows start to end (exclusive) as float32."""
+        pass
+
+    @abstractmethod
+    def _reset(self) -> None:
+        """Remove all rows from the backend storage."""
+        pass
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, ids: List[str], vectors: List[List[float]]) -> None:
+        """Add vectors, replacing the vectors already stored under the same IDs.
+
+        Args:
+            ids: Chunk IDs
+            vectors: Embedding vectors
+        """
+        if not ids:
+            return
+        matrix = np.array(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                with open(self._file("meta.json"), "w") as f:
+                    json.dump({"backend": self.backend, "dim": self.dim}, f)
+                self._open()
+
+            replaced = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+            self._add_rows(matrix)
+            with open(self._file("ids.txt"), "a") as f:
+                f.writelines(chunk_id + "\n" for chunk_id in ids)
+            for row in replaced:
+                self._ids[row] = None
+            for chunk_id in ids:
+                self._rows[chunk_id] = len(self._ids)
+                self._ids.append(chunk_id)
+            if replaced:
+                self._save_deleted()
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete the vectors of chunks.
+
+        Args:
+            ids: IDs of the chunks to delete
+        """
+        with self._lock:
+            rows = [self._rows.pop(chunk_id) for chunk_id in ids if chunk_id in self._rows]
+            for row in rows:
+                self._ids[row] = None
+            if rows:
+                self._save_deleted()
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        """Find the chunks most similar to a query vector.
+
+        Args:
+            vector: The query embedding
+            k: Number of chunks to return
+
+        Returns:
+            (chunk ID, cosine similarity) pairs, best first
+        """
+        with self._lock:
+            if not self._rows:
+                return []
+            query = np.array(vector, dtype=np.float32)
+            query /= max(float(np.linalg.norm(query)), 1e-12)
+            n = min(len(self._ids), k + len(self._ids) - len(self._rows))
+            rows, scores = self._search_rows(query, n)
+            results = []
+            for row, score in zip(rows, scores):
+                if 0 <= row < len(self._ids) and self._ids[row] is not None:
+                    results.append((self._ids[row], float(score)))
+                    if len(results) == k:
+                        break
+            return results
+
+    def export(self, batch_size: int = 4096) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Iterate over the stored vectors.
+
+        Args:
+            batch_size: Number of rows per batch. Defaults to 4096.
+
+        Yields:
+            (IDs, vectors) batches, vectors as a float32 matrix
+        """
+        with self._lock:
+            n_rows = len(self._ids)
+        for start in range(0, n_rows, batch_size):
+            end = min(n_rows, start + batch_size)
+            with self._lock:
+                matrix = self._get_rows(start, end)
+                live = [i for i, chunk_id in enumerate(self._ids[start:end]) if chunk_id is not None]
+                ids = [self._ids[start + i] for i in live]
+            if ids:
+                yield ids, matrix[live]
+
+    def compact(self) -> None:
+        """Rewrite the index without its deleted rows."""
+        with self._lock:
+            batches = list(self.export())
+            self._reset()
+            self._ids = []
+            self._rows = {}
+            for name in ("ids.txt", "deleted.json"):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            for ids, matrix in batches:
+                self.add(ids, matrix)
+            self.flush()
+
+
+class MmapFloat16Index(AnnIndex):
+    """Exact search over an on-disk, memory-mapped float16 matrix.
+
+    Vectors are appended to vectors.f16 and searched by brute force in blocks, so the
+    memory footprint stays small and recall is exact. Suited to small and medium
+    corpora, and as the ground truth when measuring the recall of approximate indexes.
+
+    Args:
+        path (str): Directory of the index
+        block_size (int, optional): Number of rows scored at a time. Defaults to 65536.
+    """
+    backend = "mmap"
+
+    def __init__(self, path: str, block_size: int = 65536, **kwargs):
+        self.block_size = block_size
+        self._matrix = None
+        super().__init__(path)
+
+    def _open(self) -> None:
+        if not os.path.exists(self._file("vectors.f16")):
+            open(self._file("vectors.f16"), "wb").close()
+        # Drop a row cut by a crash, so that new rows are appended at a row boundary
+        row_bytes = 2 * self.dim
+        size = os.path.getsize(self._file("vectors.f16"))
+        if size % row_bytes:
+            os.truncate(self._file("vectors.f16"), size - size % row_bytes)
+        self._map()
+
+    def _map(self) -> None:
+        """Memory-map the matrix file."""
+        n_rows = os.path.getsize(self._file("vectors.f16")) // (2 * self.dim)
+        self._matrix = (
+            np.memmap(self._file("vectors.f16"), dtype=np.float16, mode="r", shape=(n_rows, self.dim))
+            if n_rows else np.zeros((0, self.dim), dtype=np.float16)
+        )
+
+    def _add_rows(self, vectors: np.ndarray) -> None:
+        with open(self._file("vectors.f16"), "ab") as f:
+            f.write(vectors.astype(np.float16).tobytes())
+        self._map()
+
+    def _n_rows(self) -> int:
+        return len(self._matrix)
+
+    def _search_rows(self, vector: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for start in range(0, len(self._matrix), self.block_size):
+            scores = self._matrix[start:start + self.block_size].astype(np.float32) @ vector
+            rows = np.arange(start, start + len(scores))
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > n:
+                top = np.argpartition(-best_scores, n)[:n]
+                best_rows, best_scores = best_rows[top], best_scores[top]
+        order = np.argsort(-best_scores)
+        return best_rows[order], best_scores[order]
+
+    def _get_rows(self, start: int, end: int) -> np.ndarray:
+        return np.asarray(self._matrix[start:end], dtype=np.float32)
+
+    def _reset(self) -> None:
+        self._matrix = None
+        open(self._file("vectors.f16"), "wb").close()
+        self._map()
+
+
+class FaissHnswIndex(AnnIndex):
+    """Approximate search with a FAISS HNSW graph (requires faiss-cpu).
+
+    Writing index.faiss rewrites the whole graph, so new rows are only appended to a
+    log (pending.f32) as they are added, and the graph is written by flush(). The log
+    is replayed when the index is opened, so rows added since the last flush survive
+    a crash.
+
+    Args:
+        path (str): Directory of the index
+        M (int, optional): Number of neighbors per graph node. Defaults to 32.
+        ef_construction (int, optional): Candidate list size while building. Defaults to 200.
+        ef_search (int, optional): Candidate list size while searching. Defaults to 64.
+    """
+    backend = "faiss"
+
+    def __init__(self, path: str, M: int = 32, ef_construction: int = 200, ef_search: int = 64, **kwargs):
+        try:
+            import faiss
+        except ImportError as e:
+            raise ImportError("The faiss backend requires faiss-cpu: pip install faiss-cpu") from e
+        self._faiss = faiss
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = None
+        super().__init__(path)
+
+    def _open(self) -> None:
+        if os.path.exists(self._file("index.faiss")):
+            self._index = self._faiss.read_index(self._file("index.faiss"))
+        else:
+            self._reset()
+        self._index.hnsw.efSearch = self.ef_search
+        self._replay()
+
+    def _replay(self) -> None:
+        """Add the rows of the log that are missing from the graph, then flush."""
+        if not os.path.exists(self._file("pending.f32")):
+            return
+        data = np.fromfile(self._file("pending.f32"), dtype=np.uint8)
+        if len(data) >= 8:
+            # The log starts with the row number of its first row
+            base = int(data[:8].view(np.int64)[0])
+            n_rows = (len(data) - 8) // (4 * self.dim)
+            rows = data[8:8 + n_rows * 4 * self.dim].view(np.float32).reshape(n_rows, self.dim)
+            skip = self._index.ntotal - base
+            if 0 <= skip < n_rows:
+                self._index.add(np.ascontiguousarray(rows[skip:]))
+        self.flush()
+
+    def _add_rows(self, vectors: np.ndarray) -> None:
+        new_log = not os.path.exists(self._file("pending.f32"))
+        with open(self._file("pending.f32"), "ab") as f:
+            if new_log:
+                f.write(np.array([self._index.ntotal], dtype=np.int64).tobytes())
+            f.write(vectors.astype(np.float32).tobytes())
+        self._index.add(vectors)
+
+    def _n_rows(self) -> int:
+        return self._index.ntotal
+
+    def flush(self) -> None:
+        """Write the graph to index.faiss and clear the log."""
+        with self._lock:
+            if self._index is None or not os.path.exists(self._file("pending.f32")):
+                return
+            self._write_index()
+            os.remove(self._file("pending.f32"))
+
+    def _write_index(self) -> None:
+        """Atomically write the graph to index.faiss."""
+        tmp_path = self._file("index.faiss.tmp")
+        self._faiss.write_index(self._index, tmp_path)
+        os.replace(tmp_path, self._file("index.faiss"))
+
+    def _search_rows(self, vector: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        self._index.hnsw.efSearch = max(self.ef_search, n)
+        scores, rows = self._index.search(vector[None, :], n)
+        return rows[0], scores[0]
+
+    def _get_rows(self, start: int, end: int) -> np.ndarray:
+        return self._index.reconstruct_n(start, end - start)
+
+    def _reset(self) -> None:
+        self._index = self._faiss.IndexHNSWFlat(self.dim, self.M, self._faiss.METRIC_INNER_PRODUCT)
+        self._index.hnsw.efConstruction = self.ef_construction
+        self._index.hnsw.efSearch = self.ef_search
+        self._write_index()
+        if os.path.exists(self._file("pending.f32")):
+            os.remove(self._file("pending.f32"))
+
+
+# define local vector index backends here
+ann_backends = {
+    "mmap": MmapFloat16Index,
+    "faiss": FaissHnswIndex
+}
+
+
+def ann_index_factory(backend: str, path: str, **kwargs) -> AnnIndex:
+    """Factory function for creating local vector index instances.
+
+    Args:
+        backend (str): Name of the backend, "mmap" or "faiss"
+        path (str): Directory of the index
+        **kwargs: Backend parameters (HNSW parameters M, ef_construction, ef_search)
+
+    Returns:
+        AnnIndex: The opened index
+
+    Raises:
+        KeyError: If the requested backend is not found in the supported backends
+    """
+    return ann_backends[backend](path, **kwargs)
@@ -1,10 +1,25 @@
-from uuid import uuid4
-from typing import List
+import os
+import json
+import time
+import hashlib
+from collections import Counter, defaultdict
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.retrievers import BaseRetriever
 from langchain_chroma import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from models.text_embedding.stella import Stella
+from models.text_embedding.embedding_factory import embedding_factory
+from retrieval.hybrid import HybridRetriever
+from retrieval.inverted_index import InvertedIndex
+from retrieval.reranker import Reranker, RerankingRetriever
+from vectordb.ann_index import ann_index_factory
+from vectordb.chunker import TokenChunker
+from vectordb.local_store import LocalVectorStore
+
+
+class SourceConflictError(ValueError):
+    """Raised when a document shares its source key with a different stored document."""
+    pass
 
 
 class ChromaVectorStore:
@@ -15,36 +30,116 @@ class ChromaVectorStore:
     vector store management.
 
     The store uses a default embedding model (Stella) but can be configured with other
-    embedding functions. Documents are split into chunks for more effective retrieval.
+    embedding functions. Documents are split into chunks for more effective retrieval,
+    chunks are identified by their content so re-uploads only embed what changed, and
+    chunks are embedded and stored in batches, possibly while the document is still
+    being read. Stored chunks are checkpointed so that an interrupted ingestion
+    resumes where it stopped. Every chunk is also indexed in a persistent BM25 inverted
+    index, which the hybrid retriever queries alongside the vector store.
+
+    Vectors are stored in Chroma's HNSW index by default. Local backends can be used
+    instead: "mmap" (exact search over a memory-mapped float16 matrix, for small
+    corpora) or "faiss" (FAISS HNSW graph, for large ones). Vectors can be exported from
+    one backend and imported into another without re-embedding.
 
     Attributes:
+        collection_name: Name of the Chroma collection
+        persist_directory: Directory of the Chroma database
+        collection_metadata: Metadata of the collection, e.g. its description
+        backend: Vector index backend, "chroma", "mmap" or "faiss"
+        hnsw: HNSW parameters (M, ef_construction, ef_search) of the chroma and faiss backends
         embedding_function: The function used to generate embeddings for documents
+        batch_size: Number of chunks embedded and stored at a time
+        manifest_dir: Directory holding the chunk IDs stored for each source document
         text_splitter: Splitter for breaking documents into manageable chunks
         vectorstore: The underlying Chroma vector store instance
+        index: The BM25 inverted index holding the same chunks as the vector store
     """
 
-    def __init__(self, embedding_function=Stella()):
+    def __init__(
+            self,
+            embedding_function=None,
+            batch_size: int = 64,
+            collection_name: str = "documents",
+            persist_directory: str = "./chromadb",
+            collection_metadata: Optional[dict] = None,
+            client=None,
+            manifest_dir: Optional[str] = None,
+            index_path: Optional[str] = None,
+            backend: str = "chroma",
+            hnsw: Optional[dict] = None
+    ):
         """Initialize the vector store with an embedding function.
 
         Args:
             embedding_function: Function to generate embeddings. Defaults to Stella model.
+            batch_size: Number of chunks embedded and stored at a time. Defaults to 64.
+            collection_name: Name of the Chroma collection. Defaults to "documents".
+            persist_directory: Directory of the Chroma database. Defaults to "./chromadb".
+            collection_metadata: Metadata set on the collection when it is created.
+                Defaults to {"type": "pdf"}.
+            client: Chroma client shared with other collections. Defaults to a client
+                of its own on persist_directory.
+            manifest_dir: Directory holding the per-source chunk manifests and the
+                ingestion checkpoints. Defaults to "<persist_directory>/manifests/<collection_name>".
+            index_path: Path of the BM25 inverted index database.
+                Defaults to "<persist_directory>/bm25/<collection_name>.db".
+            backend: Vector index backend, "chroma", "mmap" or "faiss". Defaults to "chroma".
+            hnsw: HNSW parameters {"M", "ef_construction", "ef_search"} of the chroma and faiss
+                backends. For chroma, M and ef_construction only apply to new collections.
+                Defaults to the backend defaults.
         """
-        self.embedding_function = embedding_function
+        self.embedding_function = embedding_function if embedding_function is not None else embedding_factory()
+        self.batch_size = batch_size
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.collection_metadata = collection_metadata or {"type": "pdf"}
+        self.client = client
+        self.backend = backend
+        self.hnsw = hnsw or {}
+        self.manifest_dir = manifest_dir or os.path.join(persist_directory, "manifests", collection_name)
         self._build_docs_splitter()
+        self.index = InvertedIndex(index_path or os.path.join(persist_directory, "bm25", f"{collection_name}.db"))
         self.build_vector_store()
+        self._sync_index()
 
     def build_vector_store(self) -> None:
-        """Initialize the Chroma vector store.
+        """Initialize the vector store.
 
-        Creates a new Chroma collection for documents with the configured embedding function
-        and persistence settings.
+        Opens the Chroma collection, creating it if needed, with the configured embedding
+        function, persistence settings and HNSW parameters. With a local backend, opens
+        the vector index under "<persist_directory>/ann/<collection_name>/<backend>".
         """
-        self.vectorstore = Chroma(
-            collection_name="documents",
-            collection_metadata={"type": "pdf"},
-            embedding_function=self.embedding_function,
-            persist_directory="./chromadb"
-        )
+        if self.backend == "chroma":
+            hnsw_keys = {"M": "hnsw:M", "ef_construction": "hnsw:construction_ef", "ef_search": "hnsw:search_ef"}
+            self.vectorstore = Chroma(
+                collection_name=self.collection_name,
+                collection_metadata={
+                    **self.collection_metadata,
+                    **{hnsw_keys[key]: value for key, value in self.hnsw.items()}
+                },
+                embedding_function=self.embedding_function,
+                client=self.client,
+                persist_directory=None if self.client is not None else self.persist_directory
+            )
+        else:
+            ann_index = ann_index_factory(
+                self.backend,
+                os.path.join(self.persist_directory, "ann", self.collection_name, self.backend),
+                **self.hnsw
+            )
+            self.vectorstore = LocalVectorStore(ann_index, self.index, self.embedding_function)
+
+    def _sync_index(self) -> None:
+        """Index the chunks stored before the inverted index existed.
+
+        Runs once, when the index is empty but the vector store is not.
+        """
+        if self.backend != "chroma" or self.index.count() > 0:
+            return
+        stored = self.vectorstore.get(include=["documents", "metadatas"])
+        if stored["ids"]:
+            self.index.add(stored["ids"], stored["documents"], stored["metadatas"])
 
     def _build_docs_splitter(self, chunk_size: int = 512, chunk_overlap: int = 128) -> None:
         """Configure the document splitter with specified parameters.
@@ -53,38 +148,334 @@ class ChromaVectorStore:
             chunk_size: Maximum size of text chunks in tokens. Defaults to 512.
             chunk_overlap: Number of overlapping tokens between chunks. Defaults to 128.
         """
-        self.text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-            chunk_size=chunk_size, chunk_overlap=chunk_overlap
-        )
+        self.text_splitter = TokenChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
-    def _docs_splitter(self, docs: List[Document]) -> List[Document]:
+    def _docs_splitter(self, docs: Iterable[Document]) -> Iterator[Document]:
         """Split documents into chunks for storage.
 
+        Chunks overlap across page boundaries and carry the span of pages they cover.
+
         Args:
-            docs: List of documents to split
+            docs: Pages of the documents to split, possibly a lazy iterable
 
-        Returns:
-            List of split document chunks
+        Yields:
+            Document chunks
         """
-        return self.text_splitter.split_documents(docs)
+        return self.text_splitter.split(docs)
     
-    def add_documents(self, docs: List[Document]) -> None:
+    @staticmethod
+    def source_key(metadata: dict) -> str:
+        """Get the key identifying a source document across uploads.
+
+        Uploaded files land in a different temporary directory on every upload, so
+        sources are identified by the "doc_id" metadata if the caller gives one, and by
+        their file name otherwise.
+
+        Args:
+            metadata: The metadata of a document (page)
+
+        Returns:
+            The source key
+        """
+        return str(metadata.get("doc_id") or os.path.basename(str(metadata.get("source", ""))))
+
+    def _manifest_path(self, source_key: str, partial: bool = False) -> str:
+        """Get the manifest file listing the chunk IDs stored for a source.
+
+        The partial manifest lists the chunks stored so far by an ingestion that has not
+        finished yet, and serves as its checkpoint.
+        """
+        name = hashlib.sha256(source_key.encode("utf-8")).hexdigest()
+        return os.path.join(self.manifest_dir, name + (".partial.json" if partial else ".json"))
+
+    def _load_manifest(self, source_key: str, partial: bool = False) -> List[str]:
+        """Load the chunk IDs stored for a source."""
+        path = self._manifest_path(source_key, partial)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return json.load(f)["ids"]
+
+    def _save_manifest(self, source_key: str, ids: List[str], partial: bool = False) -> None:
+        """Atomically record the chunk IDs stored for a source."""
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        path = self._manifest_path(source_key, partial)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"source": source_key, "ids": ids}, f)
+        os.replace(tmp_path, path)
+
+    def iter_add_documents(self, docs: Iterable[Document], replace: bool = False) -> Iterator[Tuple[int, Optional[int]]]:
+        """Add documents to the vector store batch by batch, yielding progress.
+
+        Documents are split into chunks and every chunk gets an ID derived from its
+        source and content. The IDs are compared against the manifest of each source,
+        so only new or changed chunks are embedded and chunks that disappeared from a
+        revised document are deleted. The metadata of the chunks kept from the previous
+        revision (chunk index, pages, upload date) is refreshed. Re-uploading an
+        unchanged document is a no-op.
+
+        Sources are keyed by "doc_id" or file name (see source_key). A document sharing
+        no chunk with the stored document of the same key is taken for a different
+        document with the same name rather than a revision: its chunks are removed
+        again and SourceConflictError is raised, unless replace is set.
+
+        New chunks are embedded and stored in batches of batch_size. docs may be a lazy
+        iterable (e.g. pages yielded by utils.iter_pdf_pages), in which case batches are
+        embedded while later documents are still being produced. After each batch the
+        stored IDs are checkpointed to a partial manifest, so if the ingestion is
+        interrupted, adding the same documents again skips the chunks already stored.
+
+        Args:
+            docs: Documents to add to the store
+            replace: Replace the stored documents with the same keys even if they share
+                no chunk with the new ones. Defaults to False.
+
+        Yields:
+            (batches done, total batches) after each batch. The total is None when docs
+            is a lazy iterable.
+
+        Raises:
+            SourceConflictError: If a document is not a revision of the stored document
+                with the same key
+        """
+        manifests = {}
+        resumed = {}
+        occurrences = Counter()
+        source_ids = defaultdict(list)
+        kept = defaultdict(list)
+        uploaded_at = int(time.time())
+
+        def pending_chunks() -> Iterator[Tuple[str, str, Document]]:
+            stored = {}
+            for chunk in self._docs_splitter(docs):
+                key = self.source_key(chunk.metadata)
+                if key not in manifests:
+                    manifests[key] = (
+                        self._load_manifest(key),
+                        self._load_manifest(key, partial=True)
+                    )
+                    resumed[key] = len(manifests[key][1])
+                    stored[key] = set(manifests[key][0]) | set(manifests[key][1])
+                chunk_id = self._chunk_id(key, chunk.page_content, occurrences)
+                # Metadata used by the retrieval filters and to merge contiguous chunks
+                chunk.metadata.update(
+                    file_name=os.path.basename(str(chunk.metadata.get("source", ""))),
+                    uploaded_at=uploaded_at,
+                    chunk_index=len(source_ids[key])
+                )
+                source_ids[key].append(chunk_id)
+                if chunk_id not in stored[key]:
+                    yield key, chunk_id, chunk
+                else:
+                    kept[key].append((chunk_id, chunk.metadata))
+
+        chunks = pending_chunks()
+        total = None
+        if isinstance(docs, Sequence):
+            chunks = list(chunks)
+            total = (len(chunks) + self.batch_size - 1) // self.batch_size
+
+        done = 0
+        batch = []
+        for item in chunks:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                self._store_batch(batch, manifests)
+                done += 1
+                yield done, total
+                batch = []
+        if batch:
+            self._store_batch(batch, manifests)
+            done += 1
+            yield done, total
+
+        conflicts = []
+        for key, new_ids in source_ids.items():
+            old_ids, partial_ids = manifests[key]
+            previous = old_ids + partial_ids[:resumed[key]]
+            new_ids_set = set(new_ids)
+            if previous and not replace and new_ids_set.isdisjoint(previous):
+                # Not a revision of the stored document, undo instead of deleting it
+                added = partial_ids[resumed[key]:]
+                if added:
+                    self.vectorstore.delete(ids=added)
+                    self.index.delete(added)
+                self._restore_partial_manifest(key, partial_ids[:resumed[key]])
+                conflicts.append(key)
+                continue
+
+            stale = [chunk_id for chunk_id in dict.fromkeys(old_ids + partial_ids) if chunk_id not in new_ids_set]
+            if stale:
+                self.vectorstore.delete(ids=stale)
+                self.index.delete(stale)
+            if new_ids != old_ids:
+                self._update_metadata(kept[key])
+            self._save_manifest(key, new_ids)
+            self._restore_partial_manifest(key, [])
+
+        if self.backend != "chroma":
+            # Local backends may buffer their writes until the end of the ingestion
+            self.vectorstore.ann_index.flush()
+        if conflicts:
+            raise SourceConflictError(
+                f"A different document is already stored as {', '.join(conflicts)}. "
+                "Rename the file, give it a doc_id, or replace the stored document."
+            )
+
+    def _restore_partial_manifest(self, source_key: str, ids: List[str]) -> None:
+        """Reset the partial manifest of a source to the given IDs, removing it if there are none."""
+        if ids:
+            self._save_manifest(source_key, ids, partial=True)
+            return
+        partial_path = self._manifest_path(source_key, partial=True)
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    def _update_metadata(self, chunks: List[Tuple[str, dict]]) -> None:
+        """Refresh the metadata of stored chunks without re-embedding them."""
+        for start in range(0, len(chunks), self.batch_size):
+            batch = chunks[start:start + self.batch_size]
+            ids = [chunk_id for chunk_id, _ in batch]
+            metadatas = [metadata for _, metadata in batch]
+            if self.backend == "chroma":
+                self.vectorstore._collection.update(ids=ids, metadatas=metadatas)
+            self.index.update_metadata(ids, metadatas)
+
+    def _chunk_id(self, source_key: str, content: str, occurrences: Counter) -> str:
+        """Derive a stable ID for a chunk from its source key and content hash.
+
+        Identical chunks within the same source are told apart by their occurrence
+        number, so every ID in a document is unique.
+        """
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        occurrence = occurrences[(source_key, content_hash)]
+        occurrences[(source_key, content_hash)] += 1
+        return hashlib.sha256(f"{source_key}\0{content_hash}\0{occurrence}".encode("utf-8")).hexdigest()
+
+    def _store_batch(self, batch: List[Tuple[str, str, Document]], manifests: dict) -> None:
+        """Embed and store a batch of chunks, index them, then checkpoint their IDs."""
+        chunks = [chunk for _, _, chunk in batch]
+        ids = [chunk_id for _, chunk_id, _ in batch]
+        self.vectorstore.add_documents(chunks, ids=ids)
+        self.index.add(ids, [chunk.page_content for chunk in chunks], [chunk.metadata for chunk in chunks])
+        for key in dict.fromkeys(key for key, _, _ in batch):
+            old_ids, partial_ids = manifests[key]
+            partial_ids.extend(chunk_id for batch_key, chunk_id, _ in batch if batch_key == key)
+            self._save_manifest(key, partial_ids, partial=True)
+
+    def add_documents(
+            self,
+            docs: Iterable[Document],
+            progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+            replace: bool = False
+    ) -> None:
         """Add documents to the vector store.
 
-        Documents are split into chunks before being added to the store. Each chunk
-        gets a unique UUID.
+        Documents are split into chunks before being added to the store in batches.
+        Each chunk gets an ID derived from its content, and only chunks not already
+        stored for the same source are embedded.
+
+        Args:
+            docs: Documents to add to the store, either a list or a lazy iterable
+            progress_callback: Called with (batches done, total batches) after each batch.
+                The total is None when docs is a lazy iterable. Optional.
+            replace: Replace stored documents with the same keys even if they are not
+                revisions of them (see iter_add_documents). Defaults to False.
+        """
+        for done, total in self.iter_add_documents(docs, replace=replace):
+            if progress_callback is not None:
+                progress_callback(done, total)
+
+    def export_vectors(self, batch_size: int = 4096) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Iterate over the stored chunk vectors, e.g. to import them into another backend.
 
         Args:
-            docs: List of documents to add to the store
+            batch_size: Number of vectors per batch. Defaults to 4096.
+
+        Yields:
+            (chunk IDs, vectors) batches, vectors as a float32 matrix
         """
-        doc_splits = self._docs_splitter(docs)
-        uuids = [str(uuid4()) for _ in range(len(doc_splits))]
-        self.vectorstore.add_documents(doc_splits, ids=uuids)
+        if self.backend != "chroma":
+            yield from self.vectorstore.ann_index.export(batch_size)
+            return
+
+        offset = 0
+        while True:
+            batch = self.vectorstore._collection.get(include=["embeddings"], limit=batch_size, offset=offset)
+            if not batch["ids"]:
+                return
+            yield batch["ids"], np.asarray(batch["embeddings"], dtype=np.float32)
+            offset += len(batch["ids"])
+
+    def import_vectors(self, batches: Iterable[Tuple[List[str], np.ndarray]]) -> int:
+        """Import chunk vectors exported from another backend of the same collection.
 
-    def get_retriever(self) -> VectorStoreRetriever:
-        """Get a retriever interface to the vector store.
+        The chunks are not re-embedded. Their texts and metadata are read from the BM25
+        index, which is shared by all backends of the collection.
+
+        Args:
+            batches: (chunk IDs, vectors) batches, e.g. from export_vectors
 
         Returns:
-            A VectorStoreRetriever instance for querying the store
+            The number of imported vectors
         """
-        return self.vectorstore.as_retriever()
+        imported = 0
+        for ids, vectors in batches:
+            if self.backend != "chroma":
+                self.vectorstore.ann_index.add(ids, vectors)
+                imported += len(ids)
+                continue
+
+            chunks = {chunk.id: chunk for chunk in self.index.get(ids)}
+            keep = [i for i, chunk_id in enumerate(ids) if chunk_id in chunks]
+            if keep:
+                self.vectorstore._collection.upsert(
+                    ids=[ids[i] for i in keep],
+                    embeddings=[vectors[i].tolist() for i in keep],
+                    documents=[chunks[ids[i]].page_content for i in keep],
+                    metadatas=[chunks[ids[i]].metadata for i in keep]
+                )
+            imported += len(keep)
+        if self.backend != "chroma":
+            self.vectorstore.ann_index.flush()
+        return imported
+
+    def get_retriever(
+            self,
+            k: int = 4,
+            fetch_k: int = 20,
+            latency_budget: Optional[float] = 1.0,
+            reranker: Optional[Reranker] = None,
+            candidates: int = 30
+    ) -> BaseRetriever:
+        """Get a hybrid (BM25 + dense) retriever over the store.
+
+        Args:
+            k: Number of chunks returned per query. Defaults to 4.
+            fetch_k: Number of chunks fetched from each search before fusion. Defaults to 20.
+            latency_budget: Seconds to wait for both index searches, once the query is
+                embedded, before answering with the results available. None to always
+                wait. Defaults to 1.0.
+            reranker: Cross-encoder reranker. If given, `candidates` chunks are retrieved and
+                the reranker keeps the best ones that fit its token budget. Optional.
+            candidates: Number of chunks retrieved for reranking. Defaults to 30.
+
+        Returns:
+            A HybridRetriever instance for querying the store, wrapped in a
+            RerankingRetriever if a reranker is given
+        """
+        if reranker is not None:
+            k = candidates
+            fetch_k = max(fetch_k, candidates)
+
+        retriever = HybridRetriever(
+            vectorstore=self.vectorstore,
+            index=self.index,
+            k=k,
+            fetch_k=fetch_k,
+            latency_budget=latency_budget
+        )
+        if reranker is not None:
+            retriever = RerankingRetriever(base_retriever=retriever, reranker=reranker)
+        return retriever
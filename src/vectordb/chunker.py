@@ -0,0 +1,140 @@
+from itertools import groupby
+from typing import Iterable, Iterator, List, Tuple
+from langchain_core.documents import Document
+from utils import get_encoding
+
+
+class TokenChunker:
+    """Token-window chunker working on the token offsets of the pages of documents.
+
+    Every page is tokenized once with tiktoken and cut into windows of chunk_size
+    tokens overlapping by chunk_overlap tokens. The windows restart at every page, so
+    an edit only changes the chunks of its own page (and the first chunk of the next
+    page), and re-uploading a revised document only re-embeds those chunks. The first
+    window of a page starts with the last chunk_overlap tokens of the previous page,
+    so the end of a page and the start of the next one always share a chunk. Each
+    chunk records the span of pages it covers.
+
+    Only the text of each window is decoded, and no text is tokenized more than once,
+    unlike the recursive splitter that re-tokenizes candidate splits to measure them.
+
+    Attributes:
+        chunk_size (int): Number of tokens per chunk
+        chunk_overlap (int): Number of tokens shared by consecutive chunks
+        encoding_name (str): Name of the tiktoken encoding
+
+    Args:
+        chunk_size (int, optional): Number of tokens per chunk. Defaults to 512.
+        chunk_overlap (int, optional): Number of tokens shared by consecutive chunks. Defaults to 128.
+        encoding_name (str, optional): Name of the tiktoken encoding. Defaults to "cl100k_base".
+    """
+
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 128, encoding_name: str = "cl100k_base"):
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap must be non-negative and smaller than chunk_size.")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding_name = encoding_name
+
+    def _window(
+            self,
+            tokens: List[int],
+            pages: List[Tuple[int, int]],
+            start: int,
+            end: int,
+            metadata: dict
+    ) -> Document:
+        """Decode the window tokens[start:end] into a chunk with its page span.
+
+        Args:
+            tokens: Tokens of the page, preceded by the end of the previous page
+            pages: (token offset, page number) of every page start in tokens
+            start: Token offset of the window start
+            end: Token offset of the window end
+            metadata: Metadata of the first page of the document
+
+        Returns:
+            The chunk
+        """
+        # Windows can cut a multi-byte character, so drop incomplete characters at the edges
+        text = get_encoding(self.encoding_name).decode_bytes(tokens[start:end]).decode("utf-8", errors="ignore")
+        page_start = next(page for offset, page in reversed(pages) if offset <= start)
+        page_end = next(page for offset, page in reversed(pages) if offset < end)
+        return Document(
+            page_content=text.strip(),
+            metadata={**metadata, "page": page_start, "page_start": page_start, "page_end": page_end}
+        )
+
+    def _split_source(self, docs: Iterable[Document]) -> Iterator[Document]:
+        """Chunk the pages of a single document.
+
+        Args:
+            docs: The pages of the document, in order
+
+        Yields:
+            The chunks of the document
+        """
+        encoding = get_encoding(self.encoding_name)
+        separator = encoding.encode_ordinary("\n\n")
+        step = self.chunk_size - self.chunk_overlap
+        metadata = None
+        tail = []
+        tail_page = None
+        for doc in docs:
+            if metadata is None:
+                metadata = {
+                    key: value for key, value in doc.metadata.items()
+                    if key not in ("page", "page_start", "page_end", "extractor")
+                }
+            if not doc.page_content.strip():
+                continue
+            page = doc.metadata.get("page", 0)
+            page_tokens = encoding.encode_ordinary(doc.page_content)
+            # The first window of the page starts with the end of the previous page.
+            # The separator before a page is attributed to that page.
+            if tail:
+                tokens = tail + separator + page_tokens
+                pages = [(0, tail_page), (len(tail), page)]
+            else:
+                tokens = page_tokens
+                pages = [(0, page)]
+
+            start = 0
+            while True:
+                end = min(start + self.chunk_size, len(tokens))
+                yield self._window(tokens, pages, start, end, metadata)
+                if end == len(tokens):
+                    break
+                start += step
+
+            tail = page_tokens[-self.chunk_overlap:] if self.chunk_overlap else []
+            tail_page = page
+
+    def split(self, docs: Iterable[Document]) -> Iterator[Document]:
+        """Chunk documents given as a stream of pages.
+
+        Consecutive pages with the same source form one document. docs may be a lazy
+        iterable, chunks are yielded as soon as enough pages have been read.
+
+        Args:
+            docs: Pages of one or more documents, e.g. from utils.iter_pdf_pages
+
+        Yields:
+            Chunks with the metadata of their document and the pages they span
+            (page, page_start and page_end, 0-based)
+        """
+        for _, pages in groupby(docs, key=lambda doc: doc.metadata.get("source")):
+            for chunk in self._split_source(pages):
+                if chunk.page_content:
+                    yield chunk
+
+    def split_documents(self, docs: Iterable[Document]) -> List[Document]:
+        """Chunk documents given as a list of pages.
+
+        Args:
+            docs: Pages of one or more documents
+
+        Returns:
+            The chunks of all documents
+        """
+        return list(self.split(docs))
@@ -0,0 +1,223 @@
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+import chromadb
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.tools import BaseTool
+from pydantic import ConfigDict
+from models.text_embedding.embedding_factory import embedding_factory
+from tools.vector_store_retriever import build_collection_retriever_tool
+from vectordb.chroma import ChromaVectorStore
+
+
+class CollectionManager:
+    """Manager of several Chroma collections sharing one database and embedding model.
+
+    Corpora (e.g. one per customer or per document type) live in their own collection,
+    with their own BM25 index and manifests. Collections are opened lazily on first use
+    and their handles are cached, so a query or an upload only touches the indexes of
+    its own collection. Every collection gets its own retriever tool, described by the
+    "description" (and optionally named by the "tool_name") of its metadata.
+
+    Attributes:
+        persist_directory (str): Directory of the Chroma database
+        embedding_function: Embedding model shared by all collections
+        store_kwargs (dict): Extra arguments passed to every ChromaVectorStore
+        retriever_kwargs (dict): Arguments passed to ChromaVectorStore.get_retriever
+
+    Args:
+        embedding_function (optional): Embedding model. Defaults to the Stella model.
+        persist_directory (str, optional): Database directory. Defaults to "./chromadb".
+        retriever_kwargs (dict, optional): Retriever arguments (k, fetch_k, reranker, ...). Defaults to None.
+        **store_kwargs: Extra arguments passed to every ChromaVectorStore (e.g. batch_size,
+            backend, hnsw)
+    """
+
+    def __init__(
+            self,
+            embedding_function=None,
+            persist_directory: str = "./chromadb",
+            retriever_kwargs: Optional[dict] = None,
+            **store_kwargs
+    ):
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function if embedding_function is not None else embedding_factory()
+        self.retriever_kwargs = retriever_kwargs or {}
+        self.store_kwargs = store_kwargs
+        self._lock = threading.Lock()
+        self._client = None
+        self._stores: Dict[str, ChromaVectorStore] = {}
+        self._retrievers: Dict[str, BaseRetriever] = {}
+
+    @property
+    def client(self) -> chromadb.ClientAPI:
+        """The Chroma client shared by all collections, created on first use."""
+        with self._lock:
+            if self._client is None:
+                self._client = chromadb.PersistentClient(path=self.persist_directory)
+            return self._client
+
+    def list_collections(self) -> List[str]:
+        """Get the names of the existing collections."""
+        return sorted(str(getattr(collection, "name", collection)) for collection in self.client.list_collections())
+
+    def collection_metadata(self, name: str) -> dict:
+        """Get the metadata of a collection without opening its store and index.
+
+        Args:
+            name: Name of the collection
+
+        Returns:
+            The collection metadata
+        """
+        return dict(self.client.get_collection(name).metadata or {})
+
+    def ensure_collection(self, name: str, metadata: Optional[dict] = None) -> None:
+        """Create a collection if it does not exist, without opening its store and index.
+
+        Metadata keys missing from an existing collection are added, e.g. to describe
+        a collection created before it had a description.
+
+        Args:
+            name: Name of the collection
+            metadata: Metadata of the collection, e.g. {"description": ..., "tool_name": ...}. Optional.
+        """
+        collection = self.client.get_or_create_collection(name, metadata=metadata)
+        current = dict(collection.metadata or {})
+        missing = {key: value for key, value in (metadata or {}).items() if key not in current}
+        if missing:
+            collection.modify(metadata={**current, **missing})
+
+    def get_store(self, name: str, metadata: Optional[dict] = None) -> ChromaVectorStore:
+        """Get the store of a collection, opening (or creating) it on first use.
+
+        Args:
+            name: Name of the collection
+            metadata: Metadata of the collection if it has to be created. Optional.
+
+        Returns:
+            The vector store of the collection
+        """
+        with self._lock:
+            store = self._stores.get(name)
+        if store is not None:
+            return store
+
+        # The Chroma collections also serve as the catalog of collections of the local backends
+        self.ensure_collection(name, metadata)
+        store = ChromaVectorStore(
+            embedding_function=self.embedding_function,
+            collection_name=name,
+            persist_directory=self.persist_directory,
+            collection_metadata=metadata,
+            client=self.client,
+            **self.store_kwargs
+        )
+        with self._lock:
+            return self._stores.setdefault(name, store)
+
+    def get_retriever(self, name: str) -> BaseRetriever:
+        """Get the (cached) retriever of a collection.
+
+        Args:
+            name: Name of the collection
+
+        Returns:
+            The retriever of the collection
+        """
+        with self._lock:
+            retriever = self._retrievers.get(name)
+        if retriever is not None:
+            return retriever
+
+        retriever = self.get_store(name).get_retriever(**self.retriever_kwargs)
+        with self._lock:
+            return self._retrievers.setdefault(name, retriever)
+
+    def add_documents(
+            self,
+            name: str,
+            docs: Iterable[Document],
+            metadata: Optional[dict] = None,
+            progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+            replace: bool = False
+    ) -> None:
+        """Add documents to a collection, creating it if needed.
+
+        Args:
+            name: Name of the collection the documents are routed to
+            docs: Documents to add, either a list or a lazy iterable
+            metadata: Metadata of the collection if it has to be created. Optional.
+            progress_callback: Called with (batches done, total batches). Optional.
+            replace: Replace stored documents with the same keys even if they are not
+                revisions of them. Defaults to False.
+        """
+        self.get_store(name, metadata).add_documents(docs, progress_callback=progress_callback, replace=replace)
+
+    def tool_name(self, name: str) -> str:
+        """Get the name of the retriever tool of a collection.
+
+        Args:
+            name: Name of the collection
+
+        Returns:
+            The "tool_name" of the collection metadata, or "<name>_vectordb"
+        """
+        return self.collection_metadata(name).get("tool_name") or re.sub(r"\W+", "_", name).strip("_").lower() + "_vectordb"
+
+    def build_retriever_tools(self, names: Optional[List[str]] = None) -> List[BaseTool]:
+        """Build one retriever tool per collection.
+
+        The tools resolve their collection lazily, so building them does not open any
+        store or index.
+
+        Args:
+            names: Collections to build tools for. Defaults to all existing collections.
+
+        Returns:
+            The retriever tools
+        """
+        tools = []
+        for name in names if names is not None else self.list_collections():
+            metadata = self.collection_metadata(name)
+            tools.append(build_collection_retriever_tool(
+                CollectionRetriever(manager=self, collection_name=name),
+                name=self.tool_name(name),
+                description=metadata.get("description") or f"VectorDB retriever for the documents of the {name} collection."
+            ))
+        return tools
+
+
+class CollectionRetriever(BaseRetriever):
+    """Retriever resolving the retriever of a managed collection on first use.
+
+    Attributes:
+        manager (CollectionManager): The collection manager
+        collection_name (str): Name of the collection to search
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    manager: CollectionManager
+    collection_name: str
+
+    def _get_relevant_documents(
+            self,
+            query: str,
+            *,
+            run_manager: CallbackManagerForRetrieverRun,
+            **kwargs
+    ) -> List[Document]:
+        """Retrieve the chunks of the collection most relevant to the query.
+
+        Args:
+            query: The search query
+            run_manager: Callback manager of the retriever run
+            **kwargs: Search arguments passed to the collection retriever (e.g. filter)
+
+        Returns:
+            The retrieved chunks
+        """
+        retriever = self.manager.get_retriever(self.collection_name)
+        return retriever.invoke(query, config={"callbacks": run_manager.get_child()}, **kwargs)
@@ -0,0 +1,118 @@
+from typing import Any, Iterable, List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from retrieval.inverted_index import InvertedIndex
+from vectordb.ann_index import AnnIndex
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store over a local vector index backend.
+
+    Vectors live in an AnnIndex, while the chunk texts and metadata are read from the
+    BM25 inverted index of the same collection, which already stores them under the
+    same IDs. Metadata filters are applied to the index candidates, over-fetching
+    until k matching chunks are found.
+
+    Attributes:
+        ann_index (AnnIndex): The vector index backend
+        docstore (InvertedIndex): The inverted index holding the chunk texts and metadata
+        embedding_function (Embeddings): The embedding model
+
+    Args:
+        ann_index (AnnIndex): The vector index backend
+        docstore (InvertedIndex): The inverted index holding the chunk texts and metadata
+        embedding_function (Embeddings): The embedding model
+    """
+
+    def __init__(self, ann_index: AnnIndex, docstore: InvertedIndex, embedding_function: Embeddings):
+        self.ann_index = ann_index
+        self.docstore = docstore
+        self.embedding_function = embedding_function
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def add_texts(
+            self,
+            texts: Iterable[str],
+            metadatas: Optional[List[dict]] = None,
+            *,
+            ids: Optional[List[str]] = None,
+            **kwargs: Any
+    ) -> List[str]:
+        """Embed texts and add their vectors to the index.
+
+        The texts and metadata themselves are stored by the inverted index.
+
+        Args:
+            texts: Texts to add
+            metadatas: Metadata of the texts, unused
+            ids: IDs of the texts
+
+        Returns:
+            The IDs of the added texts
+        """
+        texts = list(texts)
+        if ids is None:
+            raise ValueError("LocalVectorStore requires explicit IDs.")
+        self.ann_index.add(ids, self.embedding_function.embed_documents(texts))
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        """Delete the vectors of chunks.
+
+        Args:
+            ids: IDs of the chunks to delete
+        """
+        if ids:
+            self.ann_index.delete(ids)
+
+    def similarity_search(
+            self,
+            query: str,
+            k: int = 4,
+            filter: Optional[dict] = None,
+            **kwargs: Any
+    ) -> List[Document]:
+        """Find the chunks most similar to the query.
+
+        Args:
+            query: The search query
+            k: Number of chunks to return. Defaults to 4.
+            filter: Chroma-style metadata filter the chunks must match. Optional.
+
+        Returns:
+            The most similar chunks, best first
+        """
+        return self.similarity_search_by_vector(self.embedding_function.embed_query(query), k=k, filter=filter)
+
+    def similarity_search_by_vector(
+            self,
+            embedding: List[float],
+            k: int = 4,
+            filter: Optional[dict] = None,
+            **kwargs: Any
+    ) -> List[Document]:
+        """Find the chunks most similar to a query vector.
+
+        Args:
+            embedding: The query vector
+            k: Number of chunks to return. Defaults to 4.
+            filter: Chroma-style metadata filter the chunks must match. Optional.
+
+        Returns:
+            The most similar chunks, best first
+        """
+        fetch_k = k if filter is None else 4 * k
+        while True:
+            ids = [chunk_id for chunk_id, _ in self.ann_index.search(embedding, fetch_k)]
+            chunks = self.docstore.get(ids, filter=filter)
+            if len(chunks) >= k or len(ids) < fetch_k:
+                return chunks[:k]
+            fetch_k *= 4
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any):
+        raise NotImplementedError("Create a LocalVectorStore through ChromaVectorStore(backend=...).")